@@ -0,0 +1,291 @@
+"""Benchmark of the reading, pre-processing and plotting of the CROSS model comparison at several scales"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+#  For every scale, a synthetic file with scale times the rows of the template is generated
+#  (see synthetic.py) and the following steps are timed (seconds, wall clock):
+#
+#    read_csv      pandas reading the columns of the csv file that are used
+#    ingest        Results without cache: reading and pre-processing
+#    cache_write   Results with cache, the first time (pre-processing and writing of the cache)
+#    cache_read    Results with cache, the second time
+#    derive        deriveVariables on all the data
+#    all_data      building of allData from the stores
+#    cube          building of the ResultCube with the blocks of all the annual variables
+#    update        Plots.update with the upload of one model, scenario and variant
+#    matrices      matrices of the stacked bars (annual, signed) and the hourly components
+#    render        every public plot method, one entry per method
+#
+#  and the stages recorded by the profiler of Plots (see cross_tools/profiling.py): the stages of the
+#  reading without cache (stages.ingest) and the data, drawing and files of the plots (stages.render).
+#
+#  Every scale runs in its own process, so that the peak memory (peak_rss_mb) is the one of that scale.
+#  The results are written as JSON, to compare runs and find regressions:
+#
+#      python benchmarks/run.py --scales 1 10 100 --output benchmarks/results/today.json
+
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import synthetic
+
+
+def jobs(info, year=2050):
+    """
+    One call of every public plot method, with the models, scenarios and variants of the synthetic data
+    """
+    models = [m['id'] for m in info['model_list']]
+    sce = {(s, 'reference'): s for s in info['scenarios'][:4]}
+    supply = [{'name':'Hydro','data':['hydro_dam','hydro_ror'],'color':'#0377CA'},
+              {'name':'Nuclear','data':['nuclear'],'color':'#FF007F'},
+              {'name':'Solar','data':['spv'],'color':'#FAC748'},
+              {'name':'Wind','data':['wind'],'color':'#F2960E'},
+              {'name':'Methane','data':['methane_pp','fuel_cell_methane'],'color':'#1f6228'},
+              {'name':'Storage','data':['net_storage_out'],'color':'#939CAC'},
+              {'name':'Net-imports','data':['net_imports'],'color':'#CCCCCC'}]
+    signed = [dict(name=c['name'], varName='electricity_supply', techs=c['data'], sign=1, color=c['color']) for c in supply] + [
+        {'name':'Base','varName':'electricity_consumption','techs':['elec_appliances'],'sign':-1,'color':'#097F6D'},
+        {'name':'Road','varName':'electricity_consumption','techs':['road_public','road_private','truck','ldv'],'sign':-1,'color':'#09c5c9'},
+        {'name':'Net-exports','varName':'electricity_consumption','techs':['net_exports','net_storage_in'],'sign':-1,'color':'#CCCCCC'}]
+    hourly = [dict(c, varName=c['varName'] + '_typical_day') for c in signed]
+    fuels = {
+        'Electricity': [{'name':'Imports','varName':'electricity_supply','techs':['imports'],'sign':1,'color':'#cccccc'},
+                        {'name':'Exports','varName':'electricity_consumption','techs':['exports'],'sign':-1,'color':'#CF4832'}],
+        'Hydrogen': [{'name':'Imports','varName':'h2_supply','techs':['imports'],'sign':1,'color':'#cccccc'},
+                     {'name':'Exports','varName':'h2_fec','techs':['exports'],'sign':-1,'color':'#CF4832'}],
+    }
+    lines = {(s, v): (v, x) for v in info['variants'] for x, s in enumerate(info['scenarios'])}
+    days = {m['id']: m['winterDay'] for m in info['model_list']}
+
+    return [
+        {'plot':'plotBarVertical', 'listModelsid':models, 'listSce':sce, 'varName':'electricity_supply', 'varList':supply,
+         'year':year, 'scale':1, 'label':'Electricity (TWh)', 'figmax':101, 'fileName':'barVertical', 'invert':False,
+         'legend':True, 'pos_legend':'upper right', 'width':12, 'height':5, 'group_by':'scenario'},
+        {'plot':'plotBarVerticalBatch', 'listModelsid':models, 'groups':{'first':dict(list(sce.items())[:2]), 'all':sce},
+         'varName':'electricity_supply', 'varList':supply, 'year':year, 'scale':1, 'label':'Electricity (TWh)', 'figmax':101,
+         'fileName':'barVerticalBatch', 'invert':False, 'legend':True, 'pos_legend':'upper right', 'width':12, 'height':5,
+         'group_by':'scenario'},
+        {'plot':'plotBarHorizontal', 'listModelsid':models, 'listSce':sce, 'varName':'electricity_supply', 'varList':supply,
+         'year':year, 'scale':1, 'label':'Electricity (TWh)', 'figmax':101, 'fileName':'barHorizontal', 'invert':False,
+         'legend':True, 'pos_legend':'upper right', 'width':5, 'height':12, 'group_by':'model'},
+        {'plot':'plotBarVerticalSigned', 'listModelsid':models, 'listSce':sce, 'signedVarList':signed, 'year':year,
+         'scale':1, 'label':'Electricity (TWh)', 'figmax':120, 'fileName':'barVerticalSigned'},
+        {'plot':'plotBarHorizontalSigned', 'listModelsid':models, 'listSce':sce, 'signedVarList':signed, 'year':year,
+         'scale':1, 'label':'Electricity (TWh)', 'figmax':120, 'fileName':'barHorizontalSigned', 'multi':True},
+        {'plot':'plotScatter', 'listModelsid':models, 'listSce':sce, 'varName':'electricity_supply', 'use_technology_fuel':'total',
+         'year':year, 'scale':1, 'label':'Electricity (TWh)', 'figmax':100, 'fileName':'scatter', 'width':12, 'height':5,
+         'orientation':'vertical', 'group_by':'scenario'},
+        {'plot':'plotHourlySignedProfile', 'listModelsid':models, 'listSce':list(sce)[:1], 'signedVarList':hourly,
+         'day_by_model':days, 'fileName':'hourlySignedProfile'},
+        {'plot':'plotBarVerticalSignedFuels', 'scenario':list(sce)[0], 'listModelsid':models, 'signedVarByFuel':fuels,
+         'year':year, 'scale':1, 'label':'Energy (TWh)', 'fileName':'barVerticalSignedFuels'},
+        {'plot':'plotLineByScenario', 'listModelsid':models, 'map_sce_xaxis':lines, 'varName':'electricity_supply',
+         'use_technology_fuel':'spv', 'year':year, 'scale':1, 'xlabel':'Scenario', 'ylabel':'Solar (TWh)',
+         'fileName':'lineByScenario', 'width':18, 'height':10},
+        {'plot':'plotTechDist', 'listModelsid':models, 'varName':'electricity_supply', 'varList':supply, 'year':year,
+         'order':[c['name'] for c in supply], 'ylabel':'Electricity (TWh)', 'ymax':100, 'fileName':'techDist', 'legend':True},
+    ]
+
+
+def measure(info, fileResults, folder, formats):
+    """
+    Times all the steps on the synthetic file (in this process), returns a dictionary with the timings
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from cross_tools import data as crossData
+    from cross_tools.cube import ResultCube
+    from cross_tools.derived import DERIVED_VARIABLES, deriveVariables
+    from cross_tools.plots import Plots
+
+    timings, errors = {}, {}
+    def timed(name, f):
+        t = time.perf_counter()
+        result = f()
+        timings[name] = time.perf_counter() - t
+        return result
+
+    model_list = info['model_list']
+    sceColors = ['#333333'] * len(info['scenarios'])
+    rows = timed('read_csv', lambda: pd.read_csv(fileResults + '.csv', header=0, usecols=crossData.READ_COLUMNS))
+    ingest = timed('ingest', lambda: Plots(fileResults, model_list, info['scenarios'], sceColors, folder, cache=False,
+                                           formats=formats, profile=True))
+    stages = {'ingest': _walls(ingest.profiler.report())}
+    del ingest
+    timed('cache_write', lambda: Plots(fileResults, model_list, info['scenarios'], sceColors, folder, formats=formats))
+    p = timed('cache_read', lambda: Plots(fileResults, model_list, info['scenarios'], sceColors, folder, formats=formats,
+                                          profile=True))
+    p.profiler.reset()
+    allData = timed('all_data', lambda: p.allData)
+    timed('derive', lambda: deriveVariables(allData.reset_index(), DERIVED_VARIABLES))
+    # p keeps allData once it is built, setting a store drops it so that the plots run without it in memory
+    del allData
+    p.annualData = p.annualData
+    def cube():
+        cube = ResultCube(p.annualData, p.hourlyData)
+        for variable in p.annualData.index.get_level_values('variable').unique():
+            cube.block('annual', variable)
+    timed('cube', cube)
+
+    upload = rows.iloc[:0]
+    first = rows.iloc[0] if len(rows) else None
+    if first is not None:
+        upload = rows[(rows['model'] == first['model']) & (rows['scenario_name'] == first['scenario_name']) &
+                      (rows['scenario_variant'] == first['scenario_variant'])]
+    timed('update', lambda: p.update(upload))
+    del rows, upload
+
+    allJobs = jobs(info)
+    byPlot = {job['plot']: job for job in allJobs}
+    bars, hourly = byPlot['plotBarVerticalSigned'], byPlot['plotHourlySignedProfile']
+    def matrices():
+        p._compute_matrices_mi(bars['listModelsid'], list(bars['listSce']), bars['year'], 1, None, bars['signedVarList'], True)
+        mapping, _ = p._component_mapping(hourly['signedVarList'], True)
+        days = [pd.to_datetime(hourly['day_by_model'][m], dayfirst=True).normalize() for m in hourly['listModelsid']]
+        p._extract_hourly_components(mapping, hourly['listModelsid'], hourly['listSce'][0], days, 'typical-day')
+    try:
+        timed('matrices', matrices)
+    except Exception:
+        errors['matrices'] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+
+    render = {}
+    for job in allJobs:
+        args = {k: v for k, v in job.items() if k != 'plot'}
+        t = time.perf_counter()
+        try:
+            getattr(p, job['plot'])(**args)
+            p.exporter.wait()
+            render[job['plot']] = time.perf_counter() - t
+        except Exception:
+            errors[job['plot']] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+        plt.close('all')
+    timings['render'] = render
+    stages['render'] = _walls(p.profiler.report(), exclude='update')
+
+    return {'timings': timings, 'stages': stages, 'errors': errors}
+
+
+def _walls(report, exclude=None):
+    # total wall time by path of the stages of a profiler report
+    walls = {}
+    for stage in report.stages:
+        if exclude is None or stage['path'].split('/')[0] != exclude:
+            walls[stage['path']] = walls.get(stage['path'], 0) + stage['wall']
+    return walls
+
+
+def runScale(scale, folder, template, formats, keep):
+    """
+    Generates the file of one scale and measures it, returns the results of the scale
+    """
+    fileResults = os.path.join(folder, f'synthetic_x{scale}')
+    t = time.perf_counter()
+    info = synthetic.generate(fileResults, scale, template)
+    generate = time.perf_counter() - t
+
+    figures = os.path.join(folder, f'figures_x{scale}')
+    result = measure(info, fileResults, figures, formats)
+    result['timings'] = {'generate': generate, **result['timings']}
+
+    size = os.path.getsize(fileResults + '.csv')
+    if not keep:
+        for f in [fileResults + '.csv', fileResults + '.cache.parquet', fileResults + '.duplicates.cache.parquet']:
+            if os.path.exists(f):
+                os.remove(f)
+        shutil.rmtree(figures, ignore_errors=True)
+
+    return {
+        'scale': scale,
+        'rows': info['rows'],
+        'models': len(info['model_list']),
+        'variants': len(info['variants']),
+        'csv_mb': size / 1e6,
+        **result,
+        # ru_maxrss is in kB on Linux, in bytes on macOS
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == 'darwin' else 1e3),
+    }
+
+
+def _metadata():
+    import matplotlib, numpy, pandas
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'matplotlib': matplotlib.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the CROSS model comparison plots at several scales')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], help='scales to measure, e.g. 1 10 100 1000')
+    parser.add_argument('--template', default=synthetic.TEMPLATE, help='csv file used as template, without extension')
+    parser.add_argument('--output', default=None, help='JSON file with the results (default: benchmarks/results/<date>.json)')
+    parser.add_argument('--folder', default=None, help='folder for the synthetic files and the figures (default: temporary)')
+    parser.add_argument('--formats', nargs='+', default=['png'], help='formats of the figures (default: png)')
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic files and the figures')
+    parser.add_argument('--one-scale', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    folder = args.folder or tempfile.mkdtemp(prefix='cross_benchmark_')
+    os.makedirs(folder, exist_ok=True)
+
+    # Run of one scale, in the process started below: the result goes to stdout
+    if args.one_scale is not None:
+        result = runScale(args.one_scale, folder, args.template, args.formats, args.keep)
+        print(json.dumps(result))
+        return
+
+    runs = []
+    for scale in args.scales:
+        command = [sys.executable, os.path.abspath(__file__), '--one-scale', str(scale), '--folder', folder,
+                   '--template', args.template, '--formats', *args.formats] + (['--keep'] if args.keep else [])
+        out = subprocess.run(command, capture_output=True, text=True)
+        if out.returncode != 0:
+            print(out.stderr, file=sys.stderr)
+            raise RuntimeError(f"The benchmark of scale {scale} failed")
+        run = json.loads(out.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        t = run['timings']
+        print(f"x{scale}: {run['rows']} rows, ingest {t['ingest']:.2f} s, cache_read {t['cache_read']:.2f} s, "
+              f"render {sum(t['render'].values()):.2f} s, peak {run['peak_rss_mb']:.0f} MB"
+              + (f", errors in {sorted(run['errors'])}" if run['errors'] else ''))
+
+    if args.folder is None and not args.keep:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         datetime.datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'metadata': _metadata(), 'runs': runs}, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Synthetic results in the format of CROSSHub, to measure how the plots scale with the size of the data"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+#  The synthetic file is made of copies of a real export (the template): every copy is the data of
+#  the template with other model names and/or scenario variants and values scaled by random factors,
+#  so that the variables, technologies, units and typical days are the ones of real uploads.
+#  A file at scale k has k copies (k times the rows of the template), e.g.
+#
+#      python benchmarks/synthetic.py results/synthetic_x10 --scale 10
+#
+#  Like in the real exports:
+#    - some rows are uploaded twice (duplicates, the second time with a later uploaded_at)
+#    - some models report in GWh and MW instead of TWh and GW (mixed units)
+#    - some models report only the subcategories of a technology, e.g. spv_rooftop and spv_mountain
+#      instead of spv (see SUBCATEGORIES in cross_tools/derived.py)
+
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cross_tools.derived import SUBCATEGORIES
+
+
+# Template used by default, csv file without extension, relative to the repository
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'results_20251110')
+
+# Units that some models use instead of the ones of the template: unit -> (other unit, factor of the values)
+OTHER_UNITS = {'TWh': ('GWh', 1000), 'GW': ('MW', 1000)}
+
+
+def generate(fileResults, scale=1, template=TEMPLATE, seed=0, duplicates=0.01, mixedUnits=0.25, subcategoryOnly=0.25):
+    """
+    Writes a synthetic csv file with scale times the rows of the template.
+
+    Parameters:
+    ----------
+    fileResults: name of the csv file to write, without extension (as for Plots)
+    scale: number of copies of the template
+    template: name of the csv file used as template, without extension
+    seed: seed of the random numbers, the same parameters always give the same file
+    duplicates: share of the rows that are uploaded a second time
+    mixedUnits: share of the models that report in GWh and MW
+    subcategoryOnly: share of the models that report only the subcategories of the technologies
+
+    Returns a dictionary with the number of rows, the model_list (as for Plots), the scenarios and the variants
+    """
+    rng = np.random.default_rng(seed)
+    data = pd.read_csv(template + '.csv', header=0, dtype={'timestamp': str})
+    data['value'] = pd.to_numeric(data['value'], errors='coerce')
+    baseModels = list(data['model'].unique())
+
+    # The copies are spread over models and variants: about sqrt(scale) of each
+    nModels = math.ceil(math.sqrt(scale))
+    nVariants = math.ceil(scale / nModels)
+    copies = [(i, j) for j in range(nVariants) for i in range(nModels)][:scale]
+
+    # Categories and their subcategories, by variable
+    subcats = {(v['varName'] + ('_typical_day' if resolution != 'annual' else ''), item['cat']): item['subcats']
+               for v in SUBCATEGORIES for resolution in v['time_resolution'] for item in v['data']}
+
+    rows = 0
+    models, variants = {}, []
+    fileTmp = fileResults + '.csv.tmp'
+    with open(fileTmp, 'w', newline='') as f:
+        f.write(','.join(data.columns) + '\n')
+        for i, j in copies:
+            copy = data.copy()
+            modelOf = {m: m if i == 0 else f'{m}_{i}' for m in baseModels}
+            variant = None if j == 0 else f'variant_{j}'
+            copy['model'] = copy['model'].map(modelOf)
+            if variant is not None:
+                copy['scenario_variant'] = variant
+            copy['uploaded_by'] = copy['model']
+
+            # Values of another model or variant: every (model, variable, technology) is scaled by its own factor
+            if i > 0 or j > 0:
+                groups = copy.groupby(['model', 'variable', 'use_technology_fuel'], sort=False).ngroup().to_numpy()
+                copy['value'] = copy['value'] * rng.lognormal(0, 0.2, groups.max() + 1)[groups]
+
+            for m in modelOf.values():
+                isModel = (copy['model'] == m).to_numpy()
+                if rng.random() < mixedUnits:
+                    for unit, (other, factor) in OTHER_UNITS.items():
+                        rowsUnit = isModel & (copy['unit'] == unit).to_numpy()
+                        copy.loc[rowsUnit, 'value'] = copy.loc[rowsUnit, 'value'] * factor
+                        copy.loc[rowsUnit, 'unit'] = other
+                if rng.random() < subcategoryOnly:
+                    copy = _splitCategories(copy, isModel, subcats, rng)
+
+            # Rows uploaded twice, the second upload is one day later and slightly different
+            repeated = copy[rng.random(len(copy)) < duplicates].copy()
+            repeated['uploaded_at'] = (pd.to_datetime(repeated['uploaded_at'], format='ISO8601') + pd.Timedelta(days=1)).astype(str)
+            repeated['value'] = repeated['value'] * rng.normal(1, 0.01, len(repeated))
+            copy = pd.concat([copy, repeated], ignore_index=True)
+
+            copy.to_csv(f, header=False, index=False)
+            rows += len(copy)
+            for base, m in modelOf.items():
+                models.setdefault(m, base)
+            if variant is not None and variant not in variants:
+                variants.append(variant)
+    os.replace(fileTmp, fileResults + '.csv')
+
+    return {
+        'rows': rows,
+        'model_list': [dict(_typicalDays(data, base), name=m, id=m, color=_color(n)) for n, (m, base) in enumerate(models.items())],
+        'scenarios': list(data['scenario_name'].unique()),
+        'variants': ['reference'] + variants,
+    }
+
+
+def _splitCategories(data, isModel, subcats, rng):
+    """
+    Replaces the rows of the model (isModel) of the categories by rows of their first two subcategories,
+    with random shares of the value
+    """
+    isCat = isModel & pd.MultiIndex.from_arrays([data['variable'], data['use_technology_fuel']]).isin(list(subcats))
+    if not isCat.any():
+        return data
+    cats = data[isCat]
+    share = rng.uniform(0.2, 0.8, len(cats))
+    parts = []
+    for k, weight in enumerate([share, 1 - share]):
+        part = cats.copy()
+        part['use_technology_fuel'] = [subcats[key][k] for key in zip(cats['variable'], cats['use_technology_fuel'])]
+        part['value'] = part['value'] * weight
+        parts.append(part)
+    return pd.concat([data[~isCat]] + parts, ignore_index=True)
+
+
+def _typicalDays(data, model):
+    """
+    Typical days of a model of the template (as in the model_list of Plots): the day in April to September
+    is the summer day, the other one the winter day
+    """
+    days = pd.to_datetime(data.loc[(data['model'] == model) & (data['time_resolution'] != 'annual'), 'timestamp'],
+                          format='%d.%m.%Y %H:%M', errors='coerce').dt.normalize().dropna().unique()
+    summer = [d for d in days if 4 <= d.month <= 9] or list(days[:1]) or [pd.Timestamp('2050-07-01')]
+    winter = [d for d in days if not 4 <= d.month <= 9] or list(days[:1]) or [pd.Timestamp('2050-02-01')]
+    return {'summer': 'Typical day', 'summerDay': summer[0].strftime('%d.%m.%Y'),
+            'winter': 'Typical day', 'winterDay': winter[0].strftime('%d.%m.%Y')}
+
+
+def _color(n):
+    colors = ['#9565BD', '#2A9E2A', '#D52426', '#00BFC4', '#BCBD21', '#1E75B3', '#FF7F0E', '#8C564B']
+    return colors[n % len(colors)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Synthetic results in the format of CROSSHub')
+    parser.add_argument('fileResults', help='csv file to write, without extension')
+    parser.add_argument('--scale', type=int, default=10, help='number of copies of the template (default: 10)')
+    parser.add_argument('--template', default=TEMPLATE, help='csv file used as template, without extension')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicates', type=float, default=0.01, help='share of the rows uploaded twice')
+    parser.add_argument('--mixed-units', type=float, default=0.25, help='share of the models that report in GWh and MW')
+    parser.add_argument('--subcategory-only', type=float, default=0.25, help='share of the models that report only subcategories')
+    args = parser.parse_args(argv)
+
+    info = generate(args.fileResults, args.scale, args.template, args.seed,
+                    args.duplicates, args.mixed_units, args.subcategory_only)
+    print(f"{info['rows']} rows, {len(info['model_list'])} models, {len(info['variants'])} variants: {args.fileResults}.csv")
+
+
+if __name__ == '__main__':
+    main()
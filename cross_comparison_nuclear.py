@@ -95,38 +95,37 @@ scenario_list={
     },
     }
 
-for name, scenarios in scenario_list.items():
-    #cross_plots.plotBarHorizontal(
-    cross_plots.plotBarVertical(   
-        listModelsid=listModels, 
-        listSce=scenarios,
-        varName = varName, 
-        varList=varList_supply_net, 
-        year=year, 
-        scale=1,
-        label=xlabel, 
-        figmax = xmax,
-        fileName = fileName+'_'+name,
-        invert=False, legend=True,
+# The scenarios of all the groups are read once
+cross_plots.plotBarVerticalBatch(
+    listModelsid=listModels, 
+    groups=scenario_list,
+    varName = varName, 
+    varList=varList_supply_net, 
+    year=year, 
+    scale=1,
+    label=xlabel, 
+    figmax = xmax,
+    fileName = fileName,  # one figure per group: fileName_nores, fileName_res, ...
+    invert=False, legend=True,
    #     pos_legend={# This puts the legend outside-right for horizontal plots
    #              "loc": "lower center",
    #              "bbox_to_anchor": (0.5, 1.05),
    #              "ncol": 4,
    #             },
-        pos_legend={# This puts the legend outside-right for vertical plots
-                "loc": "center left",
-                "bbox_to_anchor": (1.02, 0.5),
-                },
+    pos_legend={# This puts the legend outside-right for vertical plots
+            "loc": "center left",
+            "bbox_to_anchor": (1.02, 0.5),
+            },
    #    pos_legend={ # This puts the legend outside-bottom 
    #     "loc": "upper center",
    #     "bbox_to_anchor": (0.5, -0.15),  #(0.5, -0.15) for vertical plots, this is the shift of the legend 
    #     "ncol": 4,#number of columns of the legend
    #     },
-    #    width=5, height=12,
-        width=12, height=5,
-        group_by="scenario", # 'scenario' or 'model'
-        multi=False,          # <--- one plot
-    )
+#    width=5, height=12,
+    width=12, height=5,
+    group_by="scenario", # 'scenario' or 'model'
+    multi=False,          # <--- one plot
+)
 
 
 # Hydrogen supply by technology https://sweet-cross.github.io/instructions-data/docs/sets/tech_hydrogen/
@@ -145,28 +144,27 @@ xmax = 40
 fileName = 'h2Supply_tech'
 year = 2050
 
-for name, scenarios in scenario_list.items():
-    #cross_plots.plotBarHorizontal(
-    cross_plots.plotBarVertical(   
-        listModelsid=listModels, 
-        listSce=scenarios,
-        varName = varName, 
-        varList=varList_h2_supply, 
-        year=year, 
-        scale=1,
-        label=xlabel, 
-        figmax = xmax,
-        fileName = fileName+'_'+name,
-        invert=False, legend=True, 
-        pos_legend={# This puts the legend outside-right for vertical plots
-                "loc": "center left",
-                "bbox_to_anchor": (1.02, 0.5),
-                },
+# The scenarios of all the groups are read once
+cross_plots.plotBarVerticalBatch(
+    listModelsid=listModels, 
+    groups=scenario_list,
+    varName = varName, 
+    varList=varList_h2_supply, 
+    year=year, 
+    scale=1,
+    label=xlabel, 
+    figmax = xmax,
+    fileName = fileName,  # one figure per group: fileName_nores, fileName_res, ...
+    invert=False, legend=True, 
+    pos_legend={# This puts the legend outside-right for vertical plots
+            "loc": "center left",
+            "bbox_to_anchor": (1.02, 0.5),
+            },
  #    width=5, height=12,
-        width=12, height=5,
-        group_by="scenario", # 'scenario' or 'model'
-        multi=False,          # <--- one plot
-    )
+    width=12, height=5,
+    group_by="scenario", # 'scenario' or 'model'
+    multi=False,          # <--- one plot
+)
 
 
 varList_h2_consump = [
@@ -187,28 +185,27 @@ xlabel = 'Hydrogen (TWh)'
 xmax = 40
 fileName = 'h2Use'
 year = 2050
-for name, scenarios in scenario_list.items():
-    #cross_plots.plotBarHorizontal(
-    cross_plots.plotBarVertical(   
-        listModelsid=listModels, 
-        listSce=scenarios,
-        varName = varName, 
-        varList=varList_h2_consump, 
-        year=year, 
-        scale=1,
-        label=xlabel, 
-        figmax = xmax,
-        fileName = fileName+'_'+name,
-        invert=False, legend=True, 
-        pos_legend={# This puts the legend outside-right for vertical plots
-                "loc": "center left",
-                "bbox_to_anchor": (1.02, 0.5),
-                },
+# The scenarios of all the groups are read once
+cross_plots.plotBarVerticalBatch(
+    listModelsid=listModels, 
+    groups=scenario_list,
+    varName = varName, 
+    varList=varList_h2_consump, 
+    year=year, 
+    scale=1,
+    label=xlabel, 
+    figmax = xmax,
+    fileName = fileName,  # one figure per group: fileName_nores, fileName_res, ...
+    invert=False, legend=True, 
+    pos_legend={# This puts the legend outside-right for vertical plots
+            "loc": "center left",
+            "bbox_to_anchor": (1.02, 0.5),
+            },
 #    width=5, height=12,
-        width=12, height=5,
-        group_by="scenario", # 'scenario' or 'model'
-        multi=False,          # <--- one plot
-    )
+    width=12, height=5,
+    group_by="scenario", # 'scenario' or 'model'
+    multi=False,          # <--- one plot
+)
 
 
 # Electricity consumption by use with net exports
@@ -263,28 +260,27 @@ scenario_list={
     }
 
 
-for name, scenarios in scenario_list.items():
-    #cross_plots.plotBarHorizontal(
-    cross_plots.plotBarVertical(   
-        listModelsid=listModels, 
-        listSce=scenarios,
-        varName = varName, 
-        varList=varList_use_net, 
-        year=year, 
-        scale=1,
-        label=xlabel, 
-        figmax = xmax,
-        fileName = fileName+'_'+name,
-        invert=True, legend=True, 
-        pos_legend={# This puts the legend outside-right for vertical plots
-                "loc": "center left",
-                "bbox_to_anchor": (1.02, 0.5),
-                },
+# The scenarios of all the groups are read once
+cross_plots.plotBarVerticalBatch(
+    listModelsid=listModels, 
+    groups=scenario_list,
+    varName = varName, 
+    varList=varList_use_net, 
+    year=year, 
+    scale=1,
+    label=xlabel, 
+    figmax = xmax,
+    fileName = fileName,  # one figure per group: fileName_nores, fileName_res, ...
+    invert=True, legend=True, 
+    pos_legend={# This puts the legend outside-right for vertical plots
+            "loc": "center left",
+            "bbox_to_anchor": (1.02, 0.5),
+            },
 #    width=5, height=12,
-        width=12, height=5,
-        group_by="scenario", # 'scenario' or 'model'
-        multi=False,          # <--- one plot
-    )
+    width=12, height=5,
+    group_by="scenario", # 'scenario' or 'model'
+    multi=False,          # <--- one plot
+)
 
 
 # Total System Costs
@@ -325,24 +321,23 @@ scenario_list={
     }
 
 
-for name, scenarios in scenario_list.items():
-    #cross_plots.plotBarHorizontal(
-    cross_plots.plotBarVertical(   
-        listModelsid=listModels, 
-        listSce=scenarios,
-        varName = varName, 
-        varList=varList_cost, 
-        year=year, 
-        scale=1,
-        label=xlabel, 
-        figmax = xmax,
-        fileName = fileName+'_'+name,
-        invert=False, legend=False, pos_legend="upper right",
-    #    width=5, height=12,
-        width=12, height=5,
-        group_by="scenario", # 'scenario' or 'model'
-        multi=False,          # <--- one plot
-    )
+# The scenarios of all the groups are read once
+cross_plots.plotBarVerticalBatch(
+    listModelsid=listModels, 
+    groups=scenario_list,
+    varName = varName, 
+    varList=varList_cost, 
+    year=year, 
+    scale=1,
+    label=xlabel, 
+    figmax = xmax,
+    fileName = fileName,  # one figure per group: fileName_nores, fileName_res, ...
+    invert=False, legend=False, pos_legend="upper right",
+#    width=5, height=12,
+    width=12, height=5,
+    group_by="scenario", # 'scenario' or 'model'
+    multi=False,          # <--- one plot
+)
 
 for name, scenarios in scenario_list.items():
     cross_plots.plotScatter(
@@ -398,24 +393,23 @@ scenario_list={
     }
 
 
-for name, scenarios in scenario_list.items():
-    #cross_plots.plotBarHorizontal(
-    cross_plots.plotBarVertical(   
-        listModelsid=listModels, 
-        listSce=scenarios,
-        varName = varName, 
-        varList=varList_cost, 
-        year=year, 
-        scale=1,
-        label=xlabel, 
-        figmax = xmax,
-        fileName = fileName+'_'+name,
-        invert=False, legend=False, pos_legend="upper right",
-    #    width=5, height=12,
-        width=12, height=5,
-        group_by="scenario", # 'scenario' or 'model'
-        multi=False,          # <--- one plot
-    )
+# The scenarios of all the groups are read once
+cross_plots.plotBarVerticalBatch(
+    listModelsid=listModels, 
+    groups=scenario_list,
+    varName = varName, 
+    varList=varList_cost, 
+    year=year, 
+    scale=1,
+    label=xlabel, 
+    figmax = xmax,
+    fileName = fileName,  # one figure per group: fileName_nores, fileName_res, ...
+    invert=False, legend=False, pos_legend="upper right",
+#    width=5, height=12,
+    width=12, height=5,
+    group_by="scenario", # 'scenario' or 'model'
+    multi=False,          # <--- one plot
+)
 
 #### Capacity vs. cost plot
 
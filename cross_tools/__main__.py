@@ -0,0 +1,50 @@
+"""Command line to build the plots of the CROSS model comparison: python -m cross_tools build manifest.yaml"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m cross_tools', description='Plots for the CROSS model comparison')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='build all the figures of a manifest (YAML or JSON)')
+    build.add_argument('manifest', help='path to the manifest')
+    build.add_argument('--workers', type=int, default=None, help='number of processes (default: number of cores)')
+    build.add_argument('--dry-run', action='store_true', help='only list the figures, without reading the data')
+    build.add_argument('--force', action='store_true', help='render all the figures, also the ones that did not change')
+    build.add_argument('--profile', metavar='FILE', default=None,
+                       help='write the time and memory of every stage to FILE (JSON), and print a summary')
+    build.add_argument('--trace', metavar='FILE', default=None,
+                       help='write the stages to FILE in the Chrome trace format (chrome://tracing, ui.perfetto.dev)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        # Figures are only written to files
+        import matplotlib
+        matplotlib.use('Agg')
+        from .deck import build as buildDeck
+        from .profiling import Profiler
+
+        profiler = Profiler() if args.profile or args.trace else None
+        figures = buildDeck(args.manifest, workers=args.workers, dryRun=args.dry_run, force=args.force, profile=profiler)
+        for fileName in figures:
+            print(fileName)
+        if not args.dry_run:
+            print(f"{len(figures)} figures rendered")
+
+        if profiler is not None:
+            report = profiler.report()
+            print(report.summary())
+            if args.profile:
+                report.toJSON(args.profile)
+            if args.trace:
+                report.toChromeTrace(args.trace)
+
+
+if __name__ == '__main__':
+    main()
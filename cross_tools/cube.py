@@ -0,0 +1,156 @@
+"""Dense array with the results of the CROSS model comparison for fast lookups"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import numpy as np
+import pandas as pd
+
+
+class ResultCube:
+
+    def __init__(self, annual, hourly):
+        """
+        Dense arrays of the results, so that the plots can read many values with a single fancy-indexing 
+        operation instead of one .loc per value.
+
+        There is one block per time resolution and variable, with the axes scenario_name, scenario_variant, 
+        model, use_technology_fuel and timestamp, and only the labels of the rows of that variable: the blocks 
+        of the variables stay dense, where one block of all the variables would be mostly empty. 
+        A block is built at the first lookup of its variable, from the rows of the stores, so creating 
+        the cube costs nothing and only the variables that are plotted take memory.
+        Every axis has one extra slot at the end that is always NaN: labels that are not in the data
+        get the code -1 and therefore read NaN.
+
+        Attributes:
+            annual: annual data, Series (or DataFrame with a 'value' column) indexed by scenario_name, 
+                    scenario_variant, model, variable, use_technology_fuel, timestamp (year)
+            hourly: typical-day and hourly data, indexed by the same levels and time_resolution before the timestamp
+        """
+        annual, hourly = _values(annual), _values(hourly)
+        self.axes = list(annual.index.names)
+        self.stores = {'annual': annual, 'hourly': hourly}
+        self.blocks = {}   # (time_resolution, variable) -> (axis -> Index with the labels (position = code), ndarray), None if no rows
+
+    def block(self, time_resolution, variable):
+        """
+        Labels of the axes and block of the variable in the time resolution (built at the first call), 
+        None if the variable has no rows
+        """
+        key = (time_resolution, variable)
+        if key not in self.blocks:
+            self.blocks[key] = self.__build(time_resolution, variable)
+        return self.blocks[key]
+
+    def __build(self, time_resolution, variable):
+        store = self.stores['annual' if time_resolution == 'annual' else 'hourly']
+        index = store.index
+        rows = _rowsOf(index, 'variable', variable)
+        if time_resolution != 'annual':
+            rows &= _rowsOf(index, 'time_resolution', time_resolution)
+        rows = np.flatnonzero(rows)
+
+        axes = [name for name in self.axes if name != 'variable']
+        codes = [index.codes[index.names.index(name)][rows] for name in axes]
+        values = store.to_numpy(dtype=float)[rows]
+
+        # Rows with a missing label (code -1, e.g. no variant) can't be looked up: they are left out, 
+        # so that the last position of every axis (labels that are not in the data) stays NaN
+        known = np.logical_and.reduce([c >= 0 for c in codes])
+        if not known.all():
+            codes, values = [c[known] for c in codes], values[known]
+        if not len(values):
+            return None
+
+        labels = {}
+        for i, name in enumerate(axes):
+            used, codes[i] = np.unique(codes[i], return_inverse=True)
+            labels[name] = index.levels[index.names.index(name)][used]
+        shape = tuple(len(labels[name]) + 1 for name in axes)
+        codes = tuple(codes)
+
+        # The stores are sorted and have one row per key (the duplicated rows are resolved when the data 
+        # is read), so the values are assigned directly. Duplicated keys would be added with np.add.at
+        block = np.full(shape, np.nan)
+        flat = np.ravel_multi_index(codes, shape)
+        if (np.diff(flat) > 0).all():
+            block.flat[flat] = values
+        else:
+            block[codes] = 0
+            np.add.at(block, codes, values)
+        return labels, block
+
+    def replace(self, annual, hourly, keys, newAnnual, newHourly):
+        """
+        Takes the stores (annual, hourly) in which the rows of the keys (frame with scenario_name, 
+        scenario_variant and model) were replaced by the rows of newAnnual and newHourly (indexed as the stores).
+        The blocks that are built are patched in place: the values of the keys are removed and the values 
+        of the new rows are written. A block is only built again, at the next lookup of its variable, 
+        if the new rows have labels that it doesn't have
+        """
+        self.stores = {'annual': _values(annual), 'hourly': _values(hourly)}
+        news = {'annual': _values(newAnnual), 'hourly': _values(newHourly)}
+        for key, entry in list(self.blocks.items()):
+            time_resolution, variable = key
+            new = news['annual' if time_resolution == 'annual' else 'hourly']
+            rows = _rowsOf(new.index, 'variable', variable)
+            if time_resolution != 'annual':
+                rows &= _rowsOf(new.index, 'time_resolution', time_resolution)
+            rows = np.flatnonzero(rows)
+            if entry is None:
+                if len(rows):
+                    del self.blocks[key]
+                continue
+            
+            labels, block = entry
+            codes = tuple(labels[name].get_indexer(new.index.get_level_values(name)[rows]) for name in labels)
+            if any((c < 0).any() for c in codes):
+                del self.blocks[key]
+                continue
+            # The keys are the first three axes of the block
+            removed = [labels[name].get_indexer(pd.Index(keys[name])) for name in ['scenario_name', 'scenario_variant', 'model']]
+            found = np.logical_and.reduce([c >= 0 for c in removed])
+            block[tuple(c[found] for c in removed)] = np.nan
+            block[codes] = new.to_numpy(dtype=float)[rows]
+
+    def lookup(self, time_resolution, **labels):
+        """
+        Values for the given labels of every axis. The labels can be scalars or arrays, the arrays are
+        broadcast against each other like numpy indices, e.g. models as a column and technologies
+        as a row give a (models x technologies) array. Missing values are NaN.
+
+        Parameters:
+        ----------
+        time_resolution: str, 'annual', 'typical-day' or 'hourly'
+        labels: one keyword per axis (scenario_name, scenario_variant, model, variable, use_technology_fuel, timestamp)
+        """
+        arrays = [np.asarray(labels[name], dtype=object) for name in self.axes]
+        shape = np.broadcast_shapes(*[a.shape for a in arrays])
+        arrays = {name: np.broadcast_to(a, shape) for name, a in zip(self.axes, arrays)}
+
+        values = np.full(shape, np.nan)
+        variables = arrays.pop('variable')
+        for variable in pd.unique(variables.reshape(-1)):
+            entry = self.block(time_resolution, variable)
+            if entry is None:
+                continue
+            axisLabels, block = entry
+            rows = variables == variable
+            codes = tuple(axisLabels[name].get_indexer(a[rows]) for name, a in arrays.items())
+            values[rows] = block[codes]
+        return values[()]
+
+
+def _values(store):
+    # the values of a store as a Series
+    return store['value'] if isinstance(store, pd.DataFrame) else store
+
+
+def _rowsOf(index, name, label):
+    # rows of the index whose level name has the label
+    n = index.names.index(name)
+    code = index.levels[n].get_indexer([label])[0]
+    if code < 0:
+        return np.zeros(len(index), dtype=bool)
+    return index.codes[n] == code
@@ -0,0 +1,907 @@
+"""Code to read and pre-process the results of the CROSS model comparison, without the plotting libraries"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import pandas as pd
+import numpy as np
+import inspect
+import os
+import warnings
+import hashlib
+import json
+
+from .cube import ResultCube
+from .derived import DERIVED_VARIABLES, deriveVariables
+from .profiling import Profiler, profiled
+from .query import QueryCache
+
+
+# Factors to convert the units reported in CROSSHub to the units used in the plots,
+# by time resolution: (time_resolution, unit in lower case) -> factor
+UNIT_FACTORS = {
+    **{('annual', unit): factor for unit, factor in {
+        'twh':1,'gwh':1/1000, 'mwh':1/1e6,'gj':1/3.6,'mtco2':1,'gtco2':1000,'gw':1,'mw':1/1000,
+        'bchf':1,'mchf':1/1000,'chf/tco2':1}.items()},
+    **{(resolution, unit): factor
+       for resolution in ['typical-day', 'hourly']
+       for unit, factor in {'gw':1,'gwh/h':1, 'mw':1/1000,'mwh/h':1/1000}.items()},
+}
+
+# Version of the pre-processing stored in the cache, increase it when the pre-processing changes
+# so that the caches written by older versions are not used
+CACHE_VERSION = 3
+
+# Columns of the csv file from CROSSHub that are used, uploaded_at can be missing
+READ_COLUMNS = ['scenario_name','scenario_variant','variable','use_technology_fuel','model','unit',
+                'time_resolution','timestamp','value','uploaded_at']
+OPTIONAL_COLUMNS = ['uploaded_at']
+
+# Format of the timestamps of the typical days in CROSSHub, the ones in another format are parsed by pandas (day first)
+TIMESTAMP_FORMAT = '%d.%m.%Y %H:%M'
+
+# Columns of the data that are stored as categories (index levels once the index is set)
+CATEGORY_COLUMNS = ['scenario_name','scenario_variant','model','variable','use_technology_fuel','time_resolution']
+
+# Index of the annual data (timestamp: year) and of the typical-day and hourly data (timestamp: datetime)
+ANNUAL_INDEX = ['scenario_name','scenario_variant','model','variable','use_technology_fuel','timestamp']
+HOURLY_INDEX = ['scenario_name','scenario_variant','model','variable','use_technology_fuel','time_resolution','timestamp']
+
+# Columns that can be used to select the rows of the csv file, and number of rows read at once
+SELECT_COLUMNS = ['model','scenario_name','scenario_variant','variable','time_resolution']
+READ_CHUNKSIZE = 500000
+
+# Keys of the rows that are replaced together by Results.update (one upload of a model)
+UPDATE_KEYS = ['scenario_name','scenario_variant','model']
+
+# Keys of a value: the rows with the same keys are duplicates (e.g. a result uploaded twice), and how they
+# are resolved: 'latest' keeps the row with the latest uploaded_at (the last one in the file if equal),
+# 'sum' and 'mean' keep one row with the sum or the mean of the values, 'error' raises a ValueError
+DUPLICATE_KEYS = ['scenario_name','scenario_variant','model','variable','use_technology_fuel','time_resolution','timestamp']
+DUPLICATE_POLICIES = ['latest','sum','mean','error']
+
+
+class Results:
+
+    def __init__(self, fileResults,model_list,scenarios,cache=True,select=None,
+                 derivedVariables=DERIVED_VARIABLES,duplicates='latest',queryCache=256,verbose=False,profile=False):
+
+        """ 
+        Data of the model comparison, read and pre-processed, without the plots: it doesn't import 
+        matplotlib, so that the data can be queried or exported without its start-up time.
+        Plots adds the plots to it.
+
+        Attributes:
+            fileResults: Name of the file with the results
+            model_list: list of dictionary with model names and the color to use for each model
+            scenarios: list with the scenario names
+            cache: True to keep the pre-processed data in a parquet file next to the csv file 
+                   (fileResults.cache.parquet), which is used instead of the csv file in the next runs
+                   as long as the csv file, the models and the scenarios do not change. The duplicated
+                   rows are kept next to it (fileResults.duplicates.cache.parquet) for self.duplicateReport
+            select: dictionary to keep only some rows of the csv file, column -> list of values, 
+                    e.g. {'model': ['secmod','stem'], 'scenario_name': scenarios, 'time_resolution': ['annual']}.
+                    The columns can be model, scenario_name, scenario_variant, variable and time_resolution.
+                    The file is then read by chunks and only the selected rows are kept, so the memory
+                    and the time scale with the selection instead of the whole file.
+                    The variables used to calculate other variables (e.g. imports and exports for the
+                    net imports) must be selected too
+            derivedVariables: list of rules of the variables calculated from the reported ones
+                    (net imports, categories, total supply), see derived.py. Add rules to 
+                    DERIVED_VARIABLES to calculate other quantities
+            duplicates: what to do with the rows that have the same keys (scenario, variant, model, variable, 
+                    technology, time resolution and timestamp, after the units and the timestamps are parsed): 
+                    'latest' keeps the row uploaded last (uploaded_at), 'sum' or 'mean' keeps one row with 
+                    the sum or the mean of the values, 'error' raises a ValueError with the duplicated rows.
+                    The duplicated rows are listed in self.duplicateReport (see DUPLICATE_KEYS)
+            queryCache: memory (MB) of the blocks of values kept by query for the next plots that read 
+                    the same slice of the data (self.queries, see query.py), 0 to keep nothing
+            verbose: True to print the attributes and the methods of the object (see summary)
+            profile: True to record the time and the peak memory of the stages of the reading and of the
+                     plots in self.profiler (see profiling.py), 'memory' to also trace the memory allocated
+                     by each stage (slower). The report is self.profiler.report()
+        """
+        self.profiler = Profiler(enabled=bool(profile), memory=(profile == 'memory'))
+        self.queries = QueryCache(maxBytes=int(queryCache * 2**20))
+        with self.profiler.stage('init'):
+            self.__init(fileResults, model_list, scenarios, cache, select, derivedVariables, duplicates)
+        
+        if verbose:
+            print(self.summary())
+        
+    def __init(self, fileResults, model_list, scenarios, cache, select, derivedVariables, duplicates):
+        
+        # Get the models names
+        self.models = {f['id']: f['name'] for f in model_list}
+        self.modelsid = [ f['id'] for f in model_list ]
+        self.model_colors = [ f['color'] for f in model_list ]
+        self.typicalDays = {}
+        self.typicalDays['summer'] = {
+                                    'name':  {f['id']: f['summer'] for f in model_list},
+                                    'value': {f['id']: f['summerDay'] for f in model_list}
+                                }
+                                
+        self.typicalDays['winter'] =  {
+                                    'name':  {f['id']: f['winter'] for f in model_list},
+                                    'value': {f['id']: f['winterDay'] for f in model_list}
+                                }
+        
+        self.sce = scenarios
+        
+        if select is not None:
+            unknown = [c for c in select if c not in SELECT_COLUMNS]
+            if unknown:
+                raise ValueError(f"Rows can't be selected by {unknown}, valid columns: {SELECT_COLUMNS}")
+            select = {c: sorted(set(values)) for c, values in select.items()}
+        self.select = select
+        self.derivedVariables = derivedVariables
+        
+        if duplicates not in DUPLICATE_POLICIES:
+            raise ValueError(f"Unknown policy for the duplicated rows: {duplicates}, valid policies: {DUPLICATE_POLICIES}")
+        self.duplicates = duplicates
+        # Rows that had the same keys as another row (read from the cache with the data)
+        self.duplicateReport = None
+
+        # Read the pre-processed data from the cache if it is still valid,
+        # otherwise read and pre-process the csv file and update the cache
+        fileCache = fileResults + '.cache.parquet'
+        with self.profiler.stage('cache_key'):
+            cacheKey = self.__cacheKey(fileResults, scenarios) if cache else None
+        with self.profiler.stage('read_cache'):
+            cached = cache and self.__readCache(fileCache, cacheKey)
+        if not cached:
+            with self.profiler.stage('process'):
+                self.__processData(fileResults)
+            if cache:
+                with self.profiler.stage('write_cache'):
+                    self.__writeCache(fileCache, cacheKey)
+
+        self.sceVariants= self.__getReportedSceVariants()
+        
+        # Dense array with all the values, used by the plots to read many values at once
+        with self.profiler.stage('cube'):
+            self.cube = ResultCube(self.annualData, self.hourlyData)
+        
+    def summary(self):
+        """ 
+        Text with the attributes and the public methods of the object
+        """
+        lines = [f"=== {type(self).__name__} object initialized ===", "", "Attributes:"]
+        lines += [f"  {name}: {type(value).__name__}" for name, value in self.__dict__.items()]
+        lines += ["", "Methods:"]
+        lines += [f"  {name}()" for name, func in inspect.getmembers(type(self), predicate=inspect.isfunction)
+                  if not name.startswith("_")]   # skip internal methods
+        lines += ["", "================================", ""]
+        return '\n'.join(lines)
+       
+    def __processData(self, fileResults):
+        """ 
+        Reads the csv file and does all the pre-processing of the data.
+        
+        The steps only read the data: the rows that they calculate are collected in a buffer 
+        (self.__derived) and appended once at the end, and the data is never copied as a whole.
+        Memory budget: after the csv file is parsed, the pre-processing needs at most as much memory 
+        again as the parsed data (the derived rows, one copy of the values and the codes of the stores; 
+        measured 0.75x on the nuclear files, 0.5x on the synthetic ones). With what the reading keeps 
+        besides the frame, the peak is about 3.2x the parsed frame on the small nuclear files (0.6 MB) 
+        and about 1.5x on large files; the cube is built later, one block at a time. Checked in 
+        tests/test_data.py on nuclear_results_20251217 and on a synthetic file
+        """
+        # Read the file with the data
+        self.__data = self.__readData(fileResults) 
+        
+        with self.profiler.stage('reported'):
+            self.yearsModel = self.__getReportedYearsByModel()
+            self.sceModel = self.__getReportedScenariosByModel()
+        
+        
+        self.__deriveRows()
+        
+        # Annual data with the years as int, typical-day and hourly data with datetimes
+        with self.profiler.stage('stores'):
+            data = self.__data
+            del self.__data
+            mask_annual = (data['time_resolution'] == 'annual').to_numpy()
+            timestamps = data['timestamp'].to_numpy()
+            self.__setData(
+                data, mask_annual, 
+                timestamps[mask_annual].astype('int64'), 
+                pd.to_datetime(timestamps[~mask_annual], errors='coerce'),
+            )
+        
+    def __deriveRows(self):
+        """
+        Pre-processing of the rows that were read (self.__data): cleans the technologies of the variables 
+        without subcategories and appends the derived variables. The derived variables only combine rows of 
+        the same scenario, variant, model and timestamp, so any set of complete uploads can be pre-processed alone
+        """
+        self.__derived = []
+        
+        variables = ['total_system_costs','carbon_price']
+        self.__checkVariablesNoSub(variables)
+        
+        # Net imports and exports, categories that were only reported by subcategories and total supply,
+        # calculated by the rules in self.derivedVariables (see derived.py)
+        with self.profiler.stage('derive'):
+            self.__derived.append(deriveVariables(self.__data, self.derivedVariables))
+
+        # All the derived rows are appended at once
+        with self.profiler.stage('append'):
+            self.__appendRows(self.__derived)
+        del self.__derived
+        
+    def __setData(self, data, mask_annual, years, datetimes):
+        """
+        Stores the pre-processed data: 
+            annualData indexed by ANNUAL_INDEX, the timestamp is the year (int)
+            hourlyData indexed by HOURLY_INDEX, the timestamp is a datetime
+        Each one has its own index with only the labels that it uses. 
+        The keys are categories, sorted so that the index is sorted by name as with strings.
+        The stores are built column by column from the rows of data selected by mask_annual 
+        (and the other rows), so the data is never copied as a whole
+        """
+        self.annualData = _store(data, mask_annual, ANNUAL_INDEX, years)
+        self.hourlyData = _store(data, ~mask_annual, HOURLY_INDEX, datetimes)
+    
+    @property
+    def annualData(self):
+        """ 
+        Annual data indexed by ANNUAL_INDEX (see __setData). Setting it removes the blocks of the query cache and allData
+        """
+        return self._annualData
+    
+    @annualData.setter
+    def annualData(self, data):
+        self._annualData = data
+        self._allData = None
+        self.queries.clear()
+    
+    @property
+    def hourlyData(self):
+        """ 
+        Typical-day and hourly data indexed by HOURLY_INDEX (see __setData). Setting it removes the blocks of the query cache and allData
+        """
+        return self._hourlyData
+    
+    @hourlyData.setter
+    def hourlyData(self, data):
+        self._hourlyData = data
+        self._allData = None
+        self.queries.clear()
+    
+    @profiled
+    def query(self, pairs, models, scenarios, timestamps, time_resolution='annual'):
+        """
+        Values of the (variable, use_technology_fuel) pairs for the models, the (scenario_name, scenario_variant)
+        and the timestamps: array (pairs x models x scenarios x timestamps), NaN where nothing was reported.
+        
+        The values are read from the cube in one lookup and the block is kept in self.queries, keyed on
+        the time resolution and the sets of pairs, models, scenarios and timestamps (the order doesn't matter,
+        the names are compared as strings and the years as int). 
+        The next queries of the same sets, e.g. the other plots of the same technologies, year and scenarios, 
+        only take the block from the cache. The blocks are removed when annualData or hourlyData are set 
+        (e.g. by update); a change made in place in these frames is not seen by the cache.
+        """
+        # The labels are normalized so that e.g. 2050, np.int64(2050) and '2050' share a block
+        timestamp = int if time_resolution == 'annual' else pd.Timestamp
+        requested = [[(str(v), str(t)) for v, t in pairs], [str(m) for m in models], 
+                     [(str(s), str(v)) for s, v in scenarios], [timestamp(t) for t in timestamps]]
+        axes = [sorted(set(labels)) for labels in requested]
+        key = (time_resolution,) + tuple(tuple(labels) for labels in axes)
+        
+        block = self.queries.get(key)
+        if block is None:
+            def column(labels, axis):
+                # labels as an object array along its axis of the block
+                shape = [1, 1, 1, 1]
+                shape[axis] = len(labels)
+                values = np.empty(len(labels), dtype=object)
+                values[:] = labels
+                return values.reshape(shape)
+            
+            block = self.queries.put(key, self.cube.lookup(
+                time_resolution,
+                scenario_name=column([s for s, _ in axes[2]], 2),
+                scenario_variant=column([v for _, v in axes[2]], 2),
+                model=column(axes[1], 1),
+                variable=column([v for v, _ in axes[0]], 0),
+                use_technology_fuel=column([t for _, t in axes[0]], 0),
+                timestamp=column(axes[3], 3),
+            ))
+        
+        positions = []
+        for a, labels in zip(axes, requested):
+            position = {label: i for i, label in enumerate(a)}
+            positions.append([position[label] for label in labels])
+        return block[np.ix_(*positions)]
+    
+    @property
+    def allData(self):
+        """ 
+        All the data in one frame indexed by scenario_name, scenario_variant, model, variable, use_technology_fuel,
+        time_resolution and timestamp (year for the annual data, datetime otherwise), as it was stored before
+        annualData and hourlyData. The frame is built from annualData and hourlyData at the first call and kept 
+        until they are set again (e.g. by update); a change made in place in the frame is not seen by the plots.
+        Setting allData replaces annualData and hourlyData by the rows of the frame
+        """
+        if self._allData is None:
+            annual = self.annualData.reset_index()
+            annual.insert(annual.columns.get_loc('timestamp'), 'time_resolution', 'annual')
+            hourly = self.hourlyData.reset_index()
+            frames = [d.astype({'timestamp': object}) for d in [annual, hourly] if not d.empty]
+            data = pd.concat(frames, ignore_index=True) if frames else annual
+            self._allData = data.set_index(HOURLY_INDEX).sort_index()
+        return self._allData
+    
+    @allData.setter
+    def allData(self, data):
+        data = data.reset_index()[HOURLY_INDEX + ['value']]
+        mask_annual = (data['time_resolution'] == 'annual').to_numpy()
+        self.__setData(
+            data, mask_annual, 
+            data['timestamp'][mask_annual].astype('int64'), 
+            pd.to_datetime(data['timestamp'][~mask_annual], errors='coerce'),
+        )
+        self.cube = ResultCube(self.annualData, self.hourlyData)
+        
+    @profiled
+    def update(self, newData):
+        """
+        Replaces the data of the models that uploaded new results, without reading and pre-processing 
+        the whole file again.
+        
+        All the rows of the (model, scenario_name, scenario_variant) that are in newData are removed and 
+        replaced by the new rows. The duplicated rows of newData are resolved as in the reading
+        (self.duplicates) and self.duplicateReport lists them. Only the new rows are pre-processed (units, timestamps, 
+        derived variables), so this part grows with the size of the upload. The rows of every key are one range 
+        of annualData and hourlyData, which are patched by slices: the stores are copied once, without sorting 
+        them or comparing their labels, so this part grows with the whole data but stays small 
+        (about 0.06 s for 800k rows). The blocks of the cube that were built are patched in place.
+        
+        The cache file is not changed, it still holds the data of the csv file it was written from.
+        
+        Parameters:
+        ----------
+        newData: frame with the columns of the csv file from CROSSHub, or name of a csv file (with or without .csv)
+        
+        Returns the list of (model, scenario_name, scenario_variant) that were replaced
+        """
+        if isinstance(newData, str):
+            fileName = newData if newData.endswith('.csv') else newData + '.csv'
+            data = _readCsv(fileName)
+        else:
+            data = newData[[c for c in READ_COLUMNS if c in newData.columns]].copy()
+        if self.select is not None:
+            data = data[self.__selectRows(data)]
+        
+        self.__data = self.__prepareData(data.reset_index(drop=True))
+        self.__deriveRows()
+        data = self.__data
+        del self.__data
+        
+        keys = data[UPDATE_KEYS].drop_duplicates().astype(object)
+        replaced = [tuple(k) for k in keys[['model','scenario_name','scenario_variant']].to_numpy()]
+        
+        mask_annual = (data['time_resolution'] == 'annual').to_numpy()
+        years = data['timestamp'][mask_annual].astype('int64')
+        datetimes = pd.to_datetime(data['timestamp'][~mask_annual], errors='coerce')
+        newAnnual = _store(data, mask_annual, ANNUAL_INDEX, years)
+        newHourly = _store(data, ~mask_annual, HOURLY_INDEX, datetimes)
+        with self.profiler.stage('stores'):
+            self.annualData = _replaceRows(self.annualData, keys, newAnnual)
+            self.hourlyData = _replaceRows(self.hourlyData, keys, newHourly)
+        
+        # Years and scenarios of the models that were updated, in the order in which they were reported
+        annual = data.loc[mask_annual, ['model','scenario_name','scenario_variant']].assign(timestamp=years.to_numpy())
+        for m in keys['model'].unique():
+            if m not in self.modelsid:
+                continue
+            combos, years_m = _reportedByModel(self.annualData, m)
+            new = annual[annual['model'] == m]
+            newCombos = list(map(tuple, new[['scenario_name','scenario_variant']].drop_duplicates().astype(object).to_numpy()))
+            self.sceModel[m] = [c for c in dict.fromkeys(self.sceModel.get(m, []) + newCombos) if c in combos]
+            self.yearsModel[m] = [y for y in dict.fromkeys(self.yearsModel.get(m, []) + new['timestamp'].tolist()) if y in years_m]
+        
+        self.sceVariants = self.__getReportedSceVariants()
+        self.cube.replace(self.annualData, self.hourlyData, keys, newAnnual, newHourly)
+        return replaced
+        
+    def __cacheKey(self, fileResults, scenarios):
+        """ 
+        Key of the cache: hash of the content of the csv file, models, scenarios, selection, rules of the
+        derived variables, policy of the duplicated rows and version of the pre-processing
+        """
+        sha = hashlib.sha256()
+        with open(fileResults + '.csv', 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        sha.update(json.dumps([CACHE_VERSION, self.modelsid, list(scenarios), self.select, self.derivedVariables,
+                               self.duplicates]).encode())
+        return sha.hexdigest()
+    
+    def __readCache(self, fileCache, cacheKey):
+        """ 
+        Reads the pre-processed data from the cache file, and the duplicated rows from the file next to it,
+        if they exist and were written with the same key. Returns False if the cache can't be used
+        (e.g. a file that was not written completely, which is then written again from the csv file)
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return False
+        fileReport = _reportFile(fileCache)
+        if not (os.path.exists(fileCache) and os.path.exists(fileReport)):
+            return False
+        
+        try:
+            metadata = pq.read_schema(fileCache).metadata or {}
+            info = json.loads(metadata.get(b'cross_tools', b'{}'))
+            reportMetadata = pq.read_schema(fileReport).metadata or {}
+            if info.get('key') != cacheKey or json.loads(reportMetadata.get(b'cross_tools', b'{}')).get('key') != cacheKey:
+                return False
+            
+            data = pq.read_table(fileCache).to_pandas()
+            report = pq.read_table(fileReport).to_pandas()
+        except (OSError, ValueError) as e:
+            print(f"The cache file can't be read ({e}), the csv file is read instead")
+            return False
+        
+        # The timestamp is the year for annual data and the datetime for hourly data
+        mask_annual = (data['time_resolution'] == 'annual').to_numpy()
+        self.__setData(
+            data, mask_annual,
+            data['timestamp_year'][mask_annual].astype('int64'),
+            data['timestamp_datetime'][~mask_annual],
+        )
+        self.yearsModel = info['yearsModel']
+        self.sceModel = {m: [tuple(combo) for combo in combos] for m, combos in info['sceModel'].items()}
+        self.duplicateReport = _reportFromTable(report)
+        return True
+    
+    def __writeCache(self, fileCache, cacheKey):
+        """ 
+        Writes the pre-processed data to the cache file, annual and hourly data in one table 
+        with the years and the datetimes in two columns, and the duplicated rows to the file next to it
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("pyarrow is not installed, the pre-processed data is not cached")
+            return
+        
+        annual = self.annualData.reset_index()
+        annual.insert(annual.columns.get_loc('timestamp'), 'time_resolution', 'annual')
+        annual['timestamp_year'] = annual.pop('timestamp').astype('Int16')
+        annual['timestamp_datetime'] = pd.Series(pd.NaT, index=annual.index, dtype='datetime64[ns]')
+        
+        hourly = self.hourlyData.reset_index()
+        hourly['timestamp_year'] = pd.Series(pd.NA, index=hourly.index, dtype='Int16')
+        hourly['timestamp_datetime'] = hourly.pop('timestamp')
+        
+        data = pd.concat([annual.astype({c: object for c in CATEGORY_COLUMNS}), 
+                          hourly.astype({c: object for c in CATEGORY_COLUMNS})], ignore_index=True)
+        
+        info = {'key': cacheKey, 'yearsModel': self.yearsModel, 'sceModel': self.sceModel}
+        tables = [(_reportFile(fileCache), pa.Table.from_pandas(_reportToTable(self.duplicateReport)), {'key': cacheKey}),
+                  (fileCache, pa.Table.from_pandas(data, preserve_index=False), info)]
+        for fileName, table, info in tables:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'cross_tools': json.dumps(info).encode()})
+            
+            # Write to a temporary file first so that an interrupted run never leaves a broken cache
+            fileTmp = fileName + '.tmp'
+            pq.write_table(table, fileTmp)
+            os.replace(fileTmp, fileName)
+
+    #  Reads the annual data from the csv file from CROSSHub
+    #  returns a dataFrame with all the data (only the selected rows if there is a selection)
+    def __readData(self,fileResults):
+        
+        # Only the columns that are used are read
+        with self.profiler.stage('read_csv'):
+            if self.select is None:
+                data = _readCsv(fileResults+'.csv')
+            else:
+                data = pd.concat(
+                    [chunk[self.__selectRows(chunk)] for chunk in _readCsv(fileResults+'.csv', chunksize=READ_CHUNKSIZE)],
+                    ignore_index=True,
+                )
+        return self.__prepareData(data)
+    
+    def __prepareData(self,data):
+        """
+        Prepares the rows read from CROSSHub (columns READ_COLUMNS): numeric values in the units of the plots,
+        parsed timestamps, categorical keys and one row per key (see DUPLICATE_KEYS)
+        """
+        # Get the annual values and make them numeric instead of text
+        with self.profiler.stage('units'):
+            data['value']=pd.to_numeric(data['value'])
+            
+            # Correct the unit
+            data['value']=data['value'] * self.__unitFactors(data)
+            data = data.drop(['unit'], axis=1)
+
+        # Make timestamp either an int for annual or a datetime for hourly data 
+        with self.profiler.stage('timestamps'):
+            mask_annual = (data['time_resolution'] == 'annual').to_numpy()
+            mask_hourly = data['time_resolution'].isin(['typical-day', 'hourly']).to_numpy()
+            years, datetimes = self.__parseTimestamps(data['timestamp'], mask_annual, mask_hourly)
+            
+            timestamp = data['timestamp'].to_numpy(dtype=object, copy=True)
+            timestamp[mask_annual] = years.tolist()
+            timestamp[mask_hourly] = list(datetimes)
+            data['timestamp'] = timestamp
+            
+            # The timestamps as integers, to compare the keys without hashing the objects: 
+            # the years, the datetimes in ns and the number of the text in the other time resolutions
+            timestampKey = np.zeros(len(data), dtype='int64')
+            other = ~(mask_annual | mask_hourly)
+            timestampKey[other] = pd.factorize(data['timestamp'][other])[0]
+            timestampKey[mask_annual] = years
+            timestampKey[mask_hourly] = datetimes.asi8
+        
+        # The keys are stored as categories: the masks and groupbys compare integer codes instead of strings
+        with self.profiler.stage('categories'):
+            for column in CATEGORY_COLUMNS:
+                data[column] = data[column].astype('category')
+        
+        # One row per key: the keys are compared once the units and the timestamps are parsed, 
+        # so that e.g. a value uploaded again in GWh instead of TWh is a duplicate too
+        with self.profiler.stage('duplicates'):
+            data, self.duplicateReport = _resolveDuplicates(data, timestampKey, self.duplicates)
+       
+        return data
+    
+    def __selectRows(self,data):
+        """
+        Rows of the data that are in the selection (self.select)
+        """
+        mask = np.ones(len(data), dtype=bool)
+        for column, values in self.select.items():
+            mask &= data[column].isin(values).to_numpy()
+        return mask
+
+    def __parseTimestamps(self,timestamps,mask_annual,mask_hourly):
+        """
+        Parses the timestamps of the annual rows as years (int16) and the ones of the hourly rows as 
+        datetimes with minute precision (datetime64). Every distinct text is parsed only once and the 
+        results are mapped back to the rows: a file has millions of rows but only a few hundred timestamps.
+        The hourly timestamps are parsed with TIMESTAMP_FORMAT, the ones in another format by pandas,
+        the ones that can't be parsed are NaT
+        """
+        def parseUnique(values, parse):
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            return parse(uniques).take(codes)
+        
+        def parseDatetimes(uniques):
+            texts = pd.Index(uniques).astype(str)
+            parsed = pd.to_datetime(texts, format=TIMESTAMP_FORMAT, errors='coerce').to_numpy()
+            other = np.isnat(parsed)
+            if other.any():
+                parsed[other] = pd.to_datetime(texts[other], dayfirst=True, errors='coerce').to_numpy()
+            return pd.DatetimeIndex(parsed).floor('min')
+        
+        years = parseUnique(timestamps[mask_annual], lambda uniques: pd.Index(uniques).astype(int).astype('int16'))
+        datetimes = parseUnique(timestamps[mask_hourly], parseDatetimes)
+        return years, datetimes
+
+    def __appendRows(self,frames):
+        """
+        Appends the rows calculated in the pre-processing (list of frames) to the data. The new labels are 
+        added to the categories of the data and the rows use the same categories, so the columns stay categorical
+        """
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return
+        rows = pd.concat(frames, ignore_index=True)
+        for column in CATEGORY_COLUMNS:
+            current = self.__data[column].cat.categories
+            new = pd.Index(rows[column].unique()).difference(current)
+            if len(new):
+                self.__data[column] = self.__data[column].cat.add_categories(new)
+            rows[column] = rows[column].astype(self.__data[column].dtype)
+        
+        self.__data = pd.concat([self.__data, rows], ignore_index=True)
+
+    def __unitFactors(self,data):
+        """
+        Conversion factor of every row, looked up in UNIT_FACTORS by (time_resolution, unit) in one pass.
+        All the units that are not in the table are reported together and get a factor of 0
+        """
+        table = pd.Series(UNIT_FACTORS)
+        keys = pd.MultiIndex.from_arrays([data['time_resolution'], data['unit'].str.lower()])
+        factors = table.reindex(keys).to_numpy()
+
+        unknown = np.isnan(factors)
+        if unknown.any():
+            counts = keys[unknown].value_counts()
+            listUnknown = ', '.join(f"{unit} ({resolution}, {n} rows)" for (resolution, unit), n in counts.items())
+            warnings.warn(f"Unknown units, the values are set to 0: {listUnknown}")
+            factors[unknown] = 0
+
+        return factors
+            
+    def __getReportedYearsByModel(self):
+        years =  {}
+        for m in self.modelsid:
+            data_annual_m = self.__data.loc[
+                (self.__data["model"] == m) &
+                (self.__data["time_resolution"] == "annual"),
+                "timestamp"
+            ]
+            years_m = (
+                pd.to_numeric(data_annual_m, errors='coerce')
+                  .dropna()
+                  .astype(int)
+                  .unique()
+                  .tolist()
+                  )
+            years[m]=years_m
+            
+        return years
+    
+    
+    def __getReportedScenariosByModel(self):
+        sceModel = {}
+
+        for m in self.modelsid:
+            df = self.__data.loc[
+                (self.__data["model"] == m) &
+                (self.__data["time_resolution"] == "annual"),
+                ["scenario_name", "scenario_variant"]
+            ]
+    
+            combos = list(map(tuple, df.drop_duplicates().to_numpy()))
+            sceModel[m] = combos
+    
+        return sceModel
+    
+    def __getReportedSceVariants(self):
+        seen = set()
+        union_list = []
+        
+        for pairs in self.sceModel.values():
+            for combo in pairs:
+                if combo not in seen:
+                    seen.add(combo)
+                    union_list.append(combo)
+        return union_list
+   
+
+
+    def __checkVariablesNoSub(self,variables):
+        """ 
+        Remove any text that was reported in use_technology_fuel for variables without subcategories 
+        """ 
+        # Create mask on the 'variable' index level
+        mask = self.__data['variable'].isin(variables)
+        
+        # Set use_technology_fuel to '' where condition holds
+        if '' not in self.__data['use_technology_fuel'].cat.categories:
+            self.__data['use_technology_fuel'] = self.__data['use_technology_fuel'].cat.add_categories([''])
+        self.__data.loc[mask, 'use_technology_fuel'] = ''
+
+
+def _readCsv(fileName, **kwargs):
+    """
+    Reads the columns READ_COLUMNS of a csv file from CROSSHub (the optional ones only if they are in the file),
+    uploaded_at as a category since the rows of an upload share it
+    """
+    columns = pd.read_csv(fileName, nrows=0).columns
+    missing = [c for c in READ_COLUMNS if c not in columns and c not in OPTIONAL_COLUMNS]
+    if missing:
+        raise ValueError(f"Columns missing in {fileName}: {missing}")
+    return pd.read_csv(fileName, header=0, usecols=[c for c in READ_COLUMNS if c in columns], 
+                       dtype={'uploaded_at': 'category'}, **kwargs)
+
+def _resolveDuplicates(data, timestampKey, policy):
+    """
+    Rows of data with one row per key (DUPLICATE_KEYS) and report of the rows that had the same keys, 
+    resolved by the policy (see DUPLICATE_POLICIES). The keys are numbered in one groupby and the 
+    duplicates are resolved with arrays of these numbers, without a groupby per key.
+    timestampKey is the timestamp of every row as an integer, compared instead of the timestamps.
+    
+    The report has the keys, the value and uploaded_at of every duplicated row, the number of rows 
+    with its keys (rows) and whether the row was kept (kept, with the sum or the mean as value for 'sum' and 'mean')
+    """
+    keys = [data[c] for c in DUPLICATE_KEYS if c != 'timestamp'] + [pd.Series(timestampKey, index=data.index)]
+    group = data.groupby(keys, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+    counts = np.bincount(group, minlength=1)
+    
+    # Positions of the duplicated rows, the rows with the same keys next to each other
+    rows = np.flatnonzero(counts[group] > 1)
+    rows = rows[np.argsort(group[rows], kind='stable')]
+    uploaded = data['uploaded_at'] if 'uploaded_at' in data.columns else pd.Series(np.nan, index=data.index)
+    report = data.iloc[rows][DUPLICATE_KEYS + ['value']].assign(
+        uploaded_at=uploaded.iloc[rows].astype(object).to_numpy(), rows=counts[group[rows]])
+    data = data.drop(columns=['uploaded_at'], errors='ignore')
+    if not len(rows):
+        return data, report.assign(kept=np.ones(0, dtype=bool))
+    
+    if policy == 'error':
+        raise ValueError(f"{len(rows)} rows have the same keys as another row ({np.sum(counts > 1)} keys), "
+                         f"e.g.\n{report.head(10).to_string()}\n"
+                         "Use duplicates='latest', 'sum' or 'mean' to keep one row per key")
+    
+    keep = np.zeros(len(data), dtype=bool)
+    if policy == 'latest':
+        # Last row of every key once the rows are sorted by key and time of upload (lexsort is stable)
+        order = np.lexsort((_uploadTimes(uploaded), group))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = group[order][1:] != group[order][:-1]
+        keep[order[last]] = True
+        data = data[keep]
+    else:
+        # First row of every key, with the sum or the mean of the values (NaN if none has a value)
+        keep[np.unique(group, return_index=True)[1]] = True
+        values = data['value'].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        total = np.bincount(group[valid], weights=values[valid], minlength=len(counts))
+        count = np.bincount(group[valid], minlength=len(counts))
+        with np.errstate(invalid='ignore'):
+            result = np.where(count > 0, total / (1 if policy == 'sum' else count), np.nan)
+        data = data[keep]
+        data['value'] = result[group[keep]]
+        report.loc[keep[rows], 'value'] = result[group[rows[keep[rows]]]]
+    
+    report['kept'] = keep[rows]
+    return data, report
+
+def _reportFile(fileCache):
+    """
+    File of the duplicated rows next to the cache file
+    """
+    return fileCache[:-len('.cache.parquet')] + '.duplicates.cache.parquet'
+
+def _reportToTable(report):
+    """
+    Report of the duplicated rows with the timestamps in three columns that parquet can store:
+    the years (annual), the datetimes (typical-day and hourly) and the text (other time resolutions)
+    """
+    timestamp = report['timestamp'].to_numpy(dtype=object)
+    annual = (report['time_resolution'] == 'annual').to_numpy()
+    hourly = report['time_resolution'].isin(['typical-day', 'hourly']).to_numpy()
+    table = report.drop(columns=['timestamp']).astype({c: object for c in CATEGORY_COLUMNS})
+    table['uploaded_at'] = table['uploaded_at'].map(lambda u: None if pd.isna(u) else str(u))
+    table['timestamp_year'] = pd.array(np.where(annual, timestamp, None), dtype='Int64')
+    table['timestamp_datetime'] = pd.to_datetime(pd.Series(np.where(hourly, timestamp, None), index=report.index))
+    table['timestamp_text'] = np.where(annual | hourly, None, timestamp.astype(str))
+    return table
+
+def _reportFromTable(table):
+    """
+    Report of the duplicated rows written by _reportToTable
+    """
+    annual = (table['time_resolution'] == 'annual').to_numpy()
+    hourly = table['time_resolution'].isin(['typical-day', 'hourly']).to_numpy()
+    timestamp = table.pop('timestamp_text').to_numpy(dtype=object)
+    timestamp[annual] = table['timestamp_year'][annual].astype('int64').tolist()
+    timestamp[hourly] = list(table['timestamp_datetime'][hourly])
+    table = table.drop(columns=['timestamp_year', 'timestamp_datetime'])
+    table.insert(DUPLICATE_KEYS.index('timestamp'), 'timestamp', timestamp)
+    return table.astype({c: 'category' for c in CATEGORY_COLUMNS})
+
+def _uploadTimes(uploaded):
+    """
+    Time of upload of every row as int64 for sorting, the earliest possible time if it is missing.
+    Only the distinct texts are parsed
+    """
+    codes, uniques = pd.factorize(uploaded.astype(object))
+    times = pd.to_datetime(pd.Index(uniques, dtype=object), format='ISO8601', utc=True, errors='coerce')
+    # NaT is the smallest int64, the code -1 of the missing values reads the last element
+    return np.append(times.asi8, np.iinfo(np.int64).min)[codes]
+
+def _store(data, mask, index, timestamp):
+    """
+    Store of the rows of data selected by mask, indexed by index (the last level is timestamp, 
+    array with the timestamp of every selected row). The index is built from the codes of the categories, 
+    without hashing the labels again, and the columns are selected as arrays, without copying the index of data
+    """
+    levels, codes = [], []
+    for column in index[:-1]:
+        values = data[column].astype('category')
+        code = values.cat.codes.to_numpy()[mask]
+        categories = values.cat.categories
+        used = np.bincount(code[code >= 0], minlength=len(categories)) > 0
+        categories = categories[used]
+        order = categories.argsort()
+        categories = categories[order]
+        # code of every category in the sorted categories that are used (-1 if not used)
+        position = np.full(len(used), -1, dtype=code.dtype)
+        position[np.flatnonzero(used)[order]] = np.arange(len(order))
+        levels.append(pd.CategoricalIndex(categories, categories=categories))
+        codes.append(_recode(code, position))
+    code, level = pd.factorize(np.asarray(timestamp), sort=True)
+    levels.append(level)
+    codes.append(code)
+    
+    order = np.lexsort(codes[::-1])
+    values = data['value'].to_numpy()[mask][order]
+    return pd.DataFrame(
+        {'value': np.where(np.isnan(values), 0, values)},
+        index=pd.MultiIndex(levels=levels, codes=[c[order] for c in codes], names=index),
+    )
+
+def _replaceRows(store, keys, new):
+    """
+    Store with the rows of the keys (frame with the columns UPDATE_KEYS) replaced by the rows of new.
+    The keys are the first levels of the index, so the rows of a key are one range of the sorted store:
+    the ranges are found by binary search and the rows of new take their place. The store is copied once,
+    without sorting it or comparing its labels again; only the labels of new are looked up in the levels,
+    and every level keeps only its labels that are used, sorted
+    """
+    if not len(store):
+        return new
+    index = store.index
+    
+    # Levels with the labels of new: the codes of the store only change if new has labels that it doesn't have
+    levels, codes, newCodes = [], [], []
+    for n, name in enumerate(index.names):
+        labels, newLabels = _labels(index.levels[n]), _labels(new.index.levels[n])
+        code = index.codes[n]
+        if len(newLabels.difference(labels)):
+            merged = labels.union(newLabels).sort_values()
+            code = _recode(code, merged.get_indexer(labels))
+            labels = merged
+        levels.append(labels)
+        codes.append(code)
+        newCodes.append(_recode(new.index.codes[n], labels.get_indexer(newLabels)))
+    
+    # Ranges of the rows of the keys: the codes of the key levels (+1, 0 for a missing label) in one integer,
+    # which is sorted as the store
+    keyLevels = [index.names.index(name) for name in UPDATE_KEYS]
+    def prefix(codes):
+        key = np.zeros(len(codes[0]), dtype=np.int64)
+        for c, n in zip(codes, keyLevels):
+            key = key * (len(levels[n]) + 1) + c + 1
+        return key
+    
+    rowKey = prefix([codes[n] for n in keyLevels])
+    keyKey = prefix([levels[n].get_indexer(pd.Index(keys[name])) for n, name in zip(keyLevels, UPDATE_KEYS)])
+    bounds = np.zeros(len(store) + 1, dtype=np.int64)
+    np.add.at(bounds, np.searchsorted(rowKey, keyKey, 'left'), 1)
+    np.add.at(bounds, np.searchsorted(rowKey, keyKey, 'right'), -1)
+    kept = np.cumsum(bounds[:-1]) == 0
+    
+    # The rows of new, sorted, are inserted where the rows of their key were
+    order = np.lexsort(newCodes[::-1])
+    newCodes = [c[order] for c in newCodes]
+    position = np.searchsorted(rowKey[kept], prefix([newCodes[n] for n in keyLevels]), 'left')
+    codes = [np.insert(c[kept], position, nc) for c, nc in zip(codes, newCodes)]
+    values = np.insert(store['value'].to_numpy()[kept], position, new['value'].to_numpy()[order])
+    
+    for n in range(len(levels)):
+        used = np.bincount(codes[n][codes[n] >= 0], minlength=len(levels[n])) > 0
+        if not used.all():
+            codes[n] = _recode(codes[n], np.cumsum(used) - 1)
+            levels[n] = levels[n][used]
+        if isinstance(index.levels[n], pd.CategoricalIndex):
+            levels[n] = pd.CategoricalIndex(levels[n], categories=levels[n].rename(None))
+    return pd.DataFrame(
+        {'value': values},
+        index=pd.MultiIndex(levels=levels, codes=codes, names=index.names),
+    )
+
+def _reportedByModel(store, model):
+    """
+    Set of the (scenario_name, scenario_variant) and set of the timestamps of the rows of the model,
+    read from the codes of the index
+    """
+    index = store.index
+    level = {name: n for n, name in enumerate(index.names)}
+    code = index.levels[level['model']].get_indexer([model])[0]
+    rows = index.codes[level['model']] == code if code >= 0 else np.zeros(len(index), dtype=bool)
+    sce, variant, timestamp = (index.codes[level[name]][rows] for name in ['scenario_name', 'scenario_variant', 'timestamp'])
+    known = (sce >= 0) & (variant >= 0)
+    pairs = np.unique(np.stack([sce[known], variant[known]], axis=1), axis=0)
+    combos = set(zip(index.levels[level['scenario_name']][pairs[:, 0]], index.levels[level['scenario_variant']][pairs[:, 1]]))
+    return combos, set(index.levels[level['timestamp']][np.unique(timestamp[timestamp >= 0])])
+
+def _recode(codes, mapping):
+    # codes mapped to other codes, -1 (missing label) stays -1
+    return np.where(codes >= 0, mapping[codes], -1) if len(mapping) else np.full(len(codes), -1)
+
+def _labels(level):
+    # labels of an index level, the categories as plain labels
+    return pd.Index(level.astype(object)) if isinstance(level, pd.CategoricalIndex) else level
@@ -0,0 +1,377 @@
+"""Code to build a deck of plots for the CROSS model comparison from a manifest (YAML or JSON)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+#  A manifest describes the data, the models, the scenarios and the list of figures:
+#
+#  data:
+#    fileResults: results/results_20251110     # csv file without extension, relative to the manifest
+#    scenarios: [abroad-res-full, ...]
+#    sceColors: ['#9FBA3D', ...]
+#    cache: true
+#    select: {time_resolution: [annual, typical-day]}   # optional, rows of the csv file to keep (see Plots)
+#    duplicates: latest                        # optional, rows with the same keys: latest, sum, mean or error (see Plots)
+#    derived:                                  # optional, rules of more derived variables (see derived.py)
+#      - {variable: electricity_supply, use_technology_fuel: renewables, time_resolution: [annual],
+#         sum: [[electricity_supply, spv], [electricity_supply, wind]]}
+#  folder_plots: presentation_latex/figures    # relative to the manifest
+#  export:                                     # optional, see FigureExporter
+#    formats: [pdf, png]
+#    dpi: 300
+#    background: false
+#  models:                                     # same dictionaries as model_list in cross_comparison.py
+#    - {name: SecMod, id: secmod, summer: Typical day, summerDay: 01.07.2050, winter: Typical day, winterDay: 01.02.2050, color: '#9565BD'}
+#  defaults:                                   # arguments used by all the figures that accept them
+#    year: 2050
+#    scale: 1
+#  scenarioSets:                               # listSce that can be used by name, [scenario, variant, label]
+#    reference:
+#      - [abroad-res-full, reference, abroad-res-full]
+#  components:                                 # varList / signedVarList that can be used by name
+#    supply_net:
+#      - {name: Hydro, data: [hydro_dam, hydro_ror], color: '#0377CA'}
+#  figures:                                    # one entry per figure: name of the plot method and its arguments
+#    - plot: plotBarVertical
+#      fileName: elecSupply_tech_net
+#      varName: electricity_supply
+#      varList: supply_net
+#      listSce: reference
+#      ...
+#
+#  listModelsid is all the models if it is not given. In the figures, map_sce_xaxis is a list of
+#  [scenario, variant, line_id, x_value], extra_values a list of [scenario, variant, model, value]
+#  (or [scenario, variant, model, varName, use_technology_fuel, value] for one of several variables)
+#  and scenario a list [scenario, variant] (or a list of them for one figure per scenario).
+#  groups (plotBarVerticalBatch) maps the name of every group to a listSce or to the name of a scenarioSet.
+#
+#  The build keeps an index (FILE_INDEX) in folder_plots with a fingerprint of every figure: a hash of
+#  its arguments, of the model list, of the data section of the manifest (scenarios, colors, selection,
+#  rules), of the scenario variants reported, of the code of all the modules of cross_tools and of the
+#  rows of the data that the figure reads (its models, scenarios, variables, technologies and year).
+#  The figures whose fingerprint did not change since the last build and whose files exist are not
+#  rendered again.
+
+
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import plots
+from .derived import DERIVED_VARIABLES
+
+
+# Index with the fingerprints of the figures, in folder_plots
+FILE_INDEX = '.deck_index.json'
+
+
+def loadManifest(fileManifest):
+    """
+    Reads a manifest, YAML if the extension is .yaml or .yml (needs PyYAML), JSON otherwise
+    """
+    with open(fileManifest) as f:
+        if os.path.splitext(fileManifest)[1].lower() in ['.yaml', '.yml']:
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is needed to read YAML manifests, install it or use a JSON manifest")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _listSce(value):
+    """
+    listSce from the manifest: [scenario, variant, label] -> dict, [scenario, variant] -> list of tuples
+    """
+    if value is None or isinstance(value, dict):
+        return value
+    if all(len(s) == 3 for s in value):
+        return {(s[0], s[1]): s[2] for s in value}
+    return [tuple(s) for s in value]
+
+
+def _byName(value, section, manifest):
+    """
+    Entry of a named section of the manifest if value is a string, value otherwise
+    """
+    if isinstance(value, str):
+        entries = manifest.get(section) or {}
+        if value not in entries:
+            raise ValueError(f"'{value}' is not defined in the section '{section}' of the manifest")
+        return entries[value]
+    return value
+
+
+# Conversion of the arguments of the manifest to the arguments of the plot methods
+_CONVERSIONS = {
+    'listSce':         lambda v, m: _listSce(_byName(v, 'scenarioSets', m)),
+    'groups':          lambda v, m: {name: _listSce(_byName(s, 'scenarioSets', m)) for name, s in v.items()},
+    'varList':         lambda v, m: _byName(v, 'components', m),
+    'signedVarList':   lambda v, m: _byName(v, 'components', m),
+    'signedVarByFuel': lambda v, m: {fuel: _byName(c, 'components', m) for fuel, c in v.items()},
+    'scenario':        lambda v, m: tuple(v) if isinstance(v[0], str) else [tuple(s) for s in v],
+    'map_sce_xaxis':   lambda v, m: v if isinstance(v, dict) else {(s, var): (line, x) for s, var, line, x in v},
+    'extra_values':    lambda v, m: v if isinstance(v, dict) else {tuple(e[:-1]): e[-1] for e in v},
+}
+
+
+def planFigures(manifest):
+    """
+    List of jobs for Plots.renderJobs, one per figure of the manifest.
+    The arguments are checked against the plot methods before any data is read
+    """
+    modelsid = [f['id'] for f in manifest.get('models', [])]
+    defaults = manifest.get('defaults') or {}
+
+    jobs = []
+    for i, figure in enumerate(manifest.get('figures') or []):
+        name = figure.get('plot')
+        method = getattr(plots.Plots, name or '', None)
+        if name is None or name.startswith('_') or not callable(method):
+            raise ValueError(f"Figure {i}: unknown plot method '{name}'")
+
+        parameters = inspect.signature(method).parameters
+        job = {k: v for k, v in defaults.items() if k in parameters}
+        if 'listModelsid' in parameters:
+            job['listModelsid'] = modelsid
+        job.update({k: v for k, v in figure.items() if k != 'plot'})
+
+        unknown = [k for k in job if k not in parameters]
+        if unknown:
+            raise ValueError(f"Figure {i} ({name}): unknown arguments {unknown}")
+
+        for k, convert in _CONVERSIONS.items():
+            if k in job:
+                job[k] = convert(job[k], manifest)
+
+        jobs.append({'plot': name, **job})
+
+    return jobs
+
+
+def _arguments(job):
+    """
+    All the arguments of the plot method of a job, with the default values of the arguments that are not given
+    """
+    parameters = inspect.signature(getattr(plots.Plots, job['plot'])).parameters
+    args = {k: p.default for k, p in parameters.items() if k != 'self' and p.default is not inspect.Parameter.empty}
+    args.update({k: v for k, v in job.items() if k != 'plot'})
+    return args
+
+
+def _dataKeys(args):
+    """
+    What a figure reads from the data: (models, scenarios, [(variable, technologies)], time_resolution, timestamps).
+    scenarios is None for all the scenarios, technologies None for all the technologies of the variable
+    and timestamps a list of years (annual) or of days (typical days)
+    """
+    # scenarios as (scenario_name, scenario_variant)
+    if 'scenario' in args:
+        scenario = args['scenario']
+        scenarios = [tuple(scenario)] if isinstance(scenario[0], str) else [tuple(s) for s in scenario]
+    elif args.get('map_sce_xaxis') is not None:
+        scenarios = list(args['map_sce_xaxis'])
+    elif args.get('listSce') is not None:
+        scenarios = [tuple(s) for s in args['listSce']]
+    elif args.get('groups') is not None:
+        scenarios = list(dict.fromkeys(tuple(s) for listSce in args['groups'].values() for s in listSce))
+    else:
+        scenarios = None
+
+    # variables and technologies
+    varTechs = []
+    components = list(args.get('signedVarList') or [])
+    for comps in (args.get('signedVarByFuel') or {}).values():
+        components.extend(comps)
+    varTechs.extend((c['varName'], list(c['techs'])) for c in components)
+    if isinstance(args.get('varName'), (list, tuple)):
+        # several (varName, use_technology_fuel) pairs
+        varTechs.extend((v, [t]) for v, t in args['varName'])
+    elif 'varName' in args:
+        if args.get('use_technology_fuel') is not None:
+            varTechs.append((args['varName'], [args['use_technology_fuel']]))
+        elif args.get('varList') is not None:
+            varTechs.append((args['varName'], [t for c in args['varList'] for t in c['data']]))
+        else:
+            varTechs.append((args['varName'], None))
+
+    if 'day_by_model' in args:
+        resolution = args.get('time_resolution', 'typical-day')
+        timestamps = [pd.to_datetime(d, dayfirst=True).normalize() for d in args['day_by_model'].values()]
+    else:
+        resolution = 'annual'
+        timestamps = None
+        if 'year' in args:
+            timestamps = list(args['year']) if isinstance(args['year'], (list, tuple)) else [args['year']]
+
+    return list(args.get('listModelsid') or []), scenarios, varTechs, resolution, timestamps
+
+
+def _dataSlice(cross_plots, args):
+    """
+    Rows of the data (cross_plots.annualData or cross_plots.hourlyData) that a figure reads
+    """
+    models, scenarios, varTechs, resolution, timestamps = _dataKeys(args)
+    data = cross_plots.annualData if resolution == 'annual' else cross_plots.hourlyData
+    index = data.index
+
+    def inLevel(name, values):
+        # selection on the (few) labels of the level, then on the rows through the codes
+        i = index.names.index(name)
+        return index.levels[i].isin(values)[index.codes[i]]
+
+    mask = inLevel('model', models) & inLevel('variable', [v for v, _ in varTechs])
+    if resolution != 'annual':
+        mask &= inLevel('time_resolution', [resolution])
+    if scenarios is not None:
+        mask &= inLevel('scenario_name', [s for s, _ in scenarios])
+    rows = data[mask]
+
+    keep = np.zeros(len(rows), dtype=bool)
+    variables = rows.index.get_level_values('variable')
+    techs = rows.index.get_level_values('use_technology_fuel')
+    for v, t in varTechs:
+        keep |= (variables == v) & (True if t is None else techs.isin(t))
+    if scenarios is not None:
+        keep &= pd.MultiIndex.from_arrays([rows.index.get_level_values('scenario_name'),
+                                           rows.index.get_level_values('scenario_variant')]).isin(scenarios)
+    if timestamps is not None:
+        stamps = rows.index.get_level_values('timestamp')
+        if resolution == 'annual':
+            keep &= stamps.isin(timestamps)
+        else:
+            keep &= stamps.normalize().isin(timestamps)
+    return rows[keep]
+
+
+def _canonical(value):
+    """
+    Value with the dictionaries as sorted lists of pairs and the tuples as lists, for a stable JSON
+    """
+    if isinstance(value, dict):
+        return sorted(([_canonical(k), _canonical(v)] for k, v in value.items()), key=repr)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def fingerprint(cross_plots, job, context=None):
+    """
+    Fingerprint of a figure: hash of its arguments, of the context (e.g. the models of the manifest)
+    and of the rows of the data that it reads
+    """
+    args = _arguments(job)
+    spec = json.dumps(_canonical([job['plot'], args, context]), default=str)
+    rows = _dataSlice(cross_plots, {'plot': job['plot'], **args})
+
+    h = hashlib.sha256(spec.encode())
+    h.update(pd.util.hash_pandas_object(rows.reset_index(), index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _codeHash():
+    """
+    Hash of the code of all the modules of cross_tools
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.py'):
+            with open(os.path.join(folder, name), 'rb') as f:
+                h.update(name.encode() + b'\0' + f.read())
+    return h.hexdigest()
+
+
+def _readIndex(folder_plots):
+    try:
+        with open(os.path.join(folder_plots, FILE_INDEX)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _writeIndex(folder_plots, index):
+    fileIndex = os.path.join(folder_plots, FILE_INDEX)
+    with open(fileIndex + '.tmp', 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(fileIndex + '.tmp', fileIndex)
+
+
+def _fileNames(args):
+    """
+    Names of the files of a figure: fileName, or one file per variable for plotLineByScenario with separateFiles,
+    or one file per scenario for a list of scenarios, or one file per group of plotBarVerticalBatch
+    """
+    if args.get('groups') is not None:
+        return [f"{args['fileName']}_{name}" for name in args['groups']]
+    if args.get('separateFiles') and isinstance(args.get('varName'), (list, tuple)):
+        return [f"{args['fileName']}_{v}_{t}" for v, t in args['varName']]
+    scenario = args.get('scenario')
+    if scenario is not None and not isinstance(scenario[0], str) and len(scenario) > 1:
+        return [f"{args['fileName']}_{s}_{v}" for s, v in scenario]
+    return [args['fileName']]
+
+
+def _filesExist(exporter, fileNames):
+    return all(os.path.exists(path) for fileName in fileNames for path, _ in exporter.files(fileName))
+
+
+def build(fileManifest, workers=None, dryRun=False, force=False, profile=None):
+    """
+    Builds the figures of a manifest: reads and pre-processes the data once, plans all the figures
+    and renders with Plots.renderJobs the ones that changed since the last build (see FILE_INDEX).
+    With force=True all the figures are rendered.
+    profile: None, or a Profiler (see profiling.py) that receives the stages of the reading and of the figures
+    Returns the list of figures (fileName) that were rendered, or planned with dryRun=True
+    """
+    manifest = loadManifest(fileManifest)
+    folder = os.path.dirname(os.path.abspath(fileManifest))
+    jobs = planFigures(manifest)
+    if dryRun:
+        return [job.get('fileName') for job in jobs]
+
+    data = manifest['data']
+    export = manifest.get('export') or {}
+    folder_plots = os.path.join(folder, manifest['folder_plots'])
+    cross_plots = plots.Plots(
+        os.path.join(folder, data['fileResults']),
+        manifest['models'],
+        data.get('scenarios', []),
+        data.get('sceColors', []),
+        folder_plots,
+        cache=data.get('cache', True),
+        select=data.get('select'),
+        derivedVariables=DERIVED_VARIABLES + (data.get('derived') or []),
+        duplicates=data.get('duplicates', 'latest'),
+        formats=export.get('formats', ('pdf', 'png')),
+        dpi=export.get('dpi', 300),
+        background=export.get('background', False),
+        profile=profile is not None,
+    )
+
+    # The code and the settings that every figure depends on are part of the fingerprint, 
+    # so that a change of one of them renders everything again
+    context = [_codeHash(), manifest['models'], {k: v for k, v in data.items() if k != 'cache'},
+               cross_plots.sceVariants, cross_plots.exporter.dpi]
+
+    index = _readIndex(folder_plots)
+    todo = {}
+    for job in jobs:
+        args = _arguments(job)
+        fileName = args['fileName']
+        fp = fingerprint(cross_plots, job, context)
+        if force or index.get(fileName) != fp or not _filesExist(cross_plots.exporter, _fileNames(args)):
+            todo[fileName] = (job, fp)
+
+    rendered = cross_plots.renderJobs([job for job, _ in todo.values()], workers)
+    cross_plots.exporter.wait()
+
+    index.update({fileName: fp for fileName, (_, fp) in todo.items()})
+    _writeIndex(folder_plots, index)
+    if profile is not None:
+        profile.records.extend(cross_plots.profiler.records)
+    return rendered
@@ -0,0 +1,256 @@
+"""Variables calculated from the results reported in CROSSHub (net imports, categories, totals)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+#  A derived variable is described by a rule, a dictionary with:
+#
+#      variable: variable of the rows that are calculated
+#      use_technology_fuel: technology of the rows that are calculated
+#      time_resolution: list with the time resolutions where the rule is applied
+#      sum: list of [variable, use_technology_fuel] whose values are added
+#      minus: (optional) list of [variable, use_technology_fuel] whose values are subtracted
+#      clip: (optional) [lower, upper] bounds of the value, None for no bound
+#      ifMissing: (optional) True to calculate the value only where the model didn't report it
+#      minCount: (optional) the value is NaN if fewer inputs have a value (as pandas sum(min_count)), default 0
+#
+#  A row is calculated for every scenario, variant, model and timestamp where at least one of the inputs
+#  was reported, the inputs that are missing count as 0. In the typical-day and hourly resolutions the
+#  names of the variables get the suffix '_typical_day', as in CROSSHub.
+#
+#  The rules are applied in order and a rule can use the rows calculated by the rules before it
+#  (e.g. the total supply uses the net imports). All the rules of a time resolution are calculated
+#  together: the rows of all their inputs are selected and summed once, then every rule is a sum of columns.
+#
+#  Other quantities can be added by giving more rules to Plots, e.g.
+#
+#      Plots(..., derivedVariables=DERIVED_VARIABLES + [
+#          {'variable': 'electricity_supply', 'use_technology_fuel': 'renewables', 'time_resolution': ['annual'],
+#           'sum': [['electricity_supply', t] for t in ['hydro_dam', 'hydro_ror', 'spv', 'wind']]},
+#      ])
+
+
+import numpy as np
+import pandas as pd
+
+
+# Net imports, exports and storage: net = sum(supply) - sum(consumption), the positive part is
+# the net supply (on the supply variable) and the negative part the net consumption (on the consumption variable)
+NETS = [
+    {'varSupply': 'electricity_supply','tech':['imports'],
+     'varDemand': 'electricity_consumption','use':['exports'],
+     'netPositive':'net_imports',
+     'netNegative':'net_exports',
+     'time_resolution':['annual','typical-day']},
+    {'varSupply': 'electricity_supply','tech':['battery_out','phs_out'],
+     'varDemand': 'electricity_consumption','use':['battery_in','phs_in'],
+     'netPositive':'net_storage_out',
+     'netNegative':'net_storage_in',
+     'time_resolution':['annual','typical-day']},
+]
+
+# If the category 'cat' wasn't reported, it is calculated from its subcategories.
+# This guarantees that we can compare even if models report different levels of aggregation
+SUBCATEGORIES = [
+    {'varName':'electricity_supply',
+     'time_resolution':['annual','typical-day'],
+     'data':[
+         {'cat':'spv','subcats':['spv_rooftop','spv_facade','spv_mountain','spv_agriculture']},
+         {'cat':'wind','subcats':['wind_on','wind_off']},
+         {'cat':'methane_pp','subcats':["methane_chp_ccs","methane_chp_woccs","methane_oc_woccs","methane_oc_ccs","methane_cc_woccs","methane_cc_ccs"]},
+         {'cat':'liquids_pp','subcats':['liquids_chp_woccs','liquids_chp_ccs','liquids_oc_woccs','liquids_oc_ccs','liquids_cc_woccs','liquids_cc_ccs']},
+         {'cat':'waste_pp','subcats':['waste_chp_woccs','waste_chp_ccs','waste_cc_woccs','waste_cc_ccs']},
+         {'cat':'wood_pp','subcats':['wood_chp_woccs','wood_chp_ccs','wood_cc_woccs','wood_cc_ccs']},
+         {'cat':'hydrogen_pp','subcats':['hydrogen_chp','hydrogen_cc']},
+         ]},
+    {'varName':'space_heat_useful_energy_supply',
+     'time_resolution':['annual'],
+     'data':[
+         {'cat':'heat_pump','subcats':['air_source','ground_source','water_source']},
+         {'cat':'boiler_wood','subcats':['boiler_wood_chips','boiler_wood_pellets']},
+         ]},
+    {'varName':'district_heat_useful_energy_supply',
+     'time_resolution':['annual'],
+     'data':[
+         {'cat':'heat_pump','subcats':['air_source','ground_source','water_source']},
+         {'cat':'boiler_wood','subcats':['boiler_wood_chips','boiler_wood_pellets']},
+         ]},
+    {'varName':'process_heat_useful_energy_production',
+     'time_resolution':['annual'],
+     'data':[
+         {'cat':'heat_pump','subcats':['air_source','ground_source','water_source']},
+         {'cat':'boiler_wood','subcats':['boiler_wood_chips','boiler_wood_pellets']},
+         ]},
+]
+
+# Technologies of the net electricity supply, summed to the annual total supply (NaN if none has a value)
+SUPPLY_NET = ['hydro_dam','hydro_ror','nuclear','spv','wind','geothermal_pp',"methane_pp",'fuel_cell_methane',
+              'hydrogen_pp','fuel_cell_h2','liquids_pp','waste_pp','wood_pp','net_storage_out','net_imports']
+
+
+def netRules(nets):
+    """
+    Rules of the net supply and consumption (list as NETS)
+    """
+    rules = []
+    for v in nets:
+        supply = [[v['varSupply'], t] for t in v['tech']]
+        demand = [[v['varDemand'], t] for t in v['use']]
+        rules.append({'variable': v['varSupply'], 'use_technology_fuel': v['netPositive'],
+                      'time_resolution': v['time_resolution'], 'sum': supply, 'minus': demand, 'clip': [0, None]})
+        rules.append({'variable': v['varDemand'], 'use_technology_fuel': v['netNegative'],
+                      'time_resolution': v['time_resolution'], 'sum': demand, 'minus': supply, 'clip': [0, None]})
+    return rules
+
+
+def subcategoryRules(subcats):
+    """
+    Rules of the categories calculated from their subcategories when they are missing (list as SUBCATEGORIES)
+    """
+    return [{'variable': v['varName'], 'use_technology_fuel': item['cat'], 'time_resolution': v['time_resolution'],
+             'sum': [[v['varName'], s] for s in item['subcats']], 'ifMissing': True}
+            for v in subcats for item in v['data']]
+
+
+# Default rules: nets first, then the categories, then the total supply that uses both
+DERIVED_VARIABLES = (
+    netRules(NETS)
+    + subcategoryRules(SUBCATEGORIES)
+    + [{'variable': 'electricity_supply', 'use_technology_fuel': 'total', 'time_resolution': ['annual'],
+        'sum': [['electricity_supply', t] for t in SUPPLY_NET], 'minCount': 1}]
+)
+
+# Keys of the rows calculated by a rule (besides the variable, technology and time resolution)
+KEYS = ['scenario_name', 'scenario_variant', 'model', 'timestamp']
+COLUMNS = ['scenario_name', 'scenario_variant', 'model', 'variable', 'use_technology_fuel', 'time_resolution', 'timestamp', 'value']
+
+
+def _variable(varName, resolution):
+    return varName + ('_typical_day' if resolution in ['typical-day', 'hourly'] else '')
+
+
+def deriveVariables(data, rules):
+    """
+    Calculates the rows of the derived variables.
+
+    Parameters:
+        data: frame with the columns scenario_name, scenario_variant, model, variable,
+              use_technology_fuel, time_resolution, timestamp and value
+        rules: list of rules (see the top of this file)
+
+    Returns a frame with the calculated rows and the same columns
+    """
+    resolutions = list(dict.fromkeys(r for rule in rules for r in rule['time_resolution']))
+    frames = [_deriveResolution(data, [rule for rule in rules if resolution in rule['time_resolution']], resolution)
+              for resolution in resolutions]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _codes(column):
+    """
+    Code of every row (-1 if missing) and the labels of the codes
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    return pd.factorize(column)
+
+
+def _deriveResolution(data, rules, resolution):
+    """
+    Applies the rules in one time resolution. The inputs of all the rules are summed in one pass
+    into a table keys x (variable, technology), then every rule adds and subtracts columns of the table
+    and its result is added to the table as a new column
+    """
+    rules = [{**rule,
+              'variable': _variable(rule['variable'], resolution),
+              'sum': [(_variable(v, resolution), t) for v, t in rule['sum']],
+              'minus': [(_variable(v, resolution), t) for v, t in rule.get('minus', [])]}
+             for rule in rules]
+    pairs = {pair for rule in rules for pair in rule['sum'] + rule['minus'] + [(rule['variable'], rule['use_technology_fuel'])]}
+
+    # Rows of all the inputs, selected by the codes of their (variable, technology) pair 
+    # so that the names are not converted row by row
+    variable, variables = _codes(data['variable'])
+    technology, technologies = _codes(data['use_technology_fuel'])
+    variables = {v: i for i, v in enumerate(variables.astype(str))}
+    technologies = {t: i for i, t in enumerate(technologies.astype(str))}
+    codeOfPair = {(v, t): variables[v] * len(technologies) + technologies[t]
+                  for v, t in pairs if v in variables and t in technologies}
+    pairCode = variable.astype(np.int64) * len(technologies) + technology
+    selected = ((data['time_resolution'] == resolution).to_numpy() & (variable >= 0) & (technology >= 0)
+                & np.isin(pairCode, list(codeOfPair.values())))
+    d = data.loc[selected, KEYS + ['value']]
+    pairCode = pairCode[selected]
+
+    # Rows with a missing key (e.g. no variant, or a timestamp that couldn't be parsed) have no group
+    # and are left out, as in a groupby
+    row = d.groupby(KEYS, observed=True, sort=False).ngroup()
+    known = row.notna().to_numpy()
+    d, pairCode, row = d[known], pairCode[known], row[known].to_numpy(dtype=int)
+    if d.empty:
+        return d
+
+    # Table keys x (variable, technology): sum of the values, number of values and whether there is a row
+    _, first = np.unique(row, return_index=True)
+    keys = d.iloc[first][KEYS].reset_index(drop=True)
+    column, columns = pd.factorize(pairCode)
+    pairOfCode = {code: pair for pair, code in codeOfPair.items()}
+    columns = {pairOfCode[code]: i for i, code in enumerate(columns)}
+
+    shape = (len(keys), len(columns))
+    values = d['value'].to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    total, count, present = np.zeros(shape), np.zeros(shape, dtype=int), np.zeros(shape, dtype=bool)
+    np.add.at(total, (row[valid], column[valid]), values[valid])
+    np.add.at(count, (row, column), valid)
+    present[row, column] = True
+
+    def inputs(pairs):
+        return [columns[p] for p in pairs if p in columns]
+
+    out = []
+    for rule in rules:
+        plus, minus = inputs(rule['sum']), inputs(rule['minus'])
+        if not plus + minus:
+            continue
+        value = total[:, plus].sum(axis=1) - total[:, minus].sum(axis=1)
+        found = present[:, plus + minus].any(axis=1)
+        if rule.get('minCount', 0):
+            value[count[:, plus + minus].sum(axis=1) < rule['minCount']] = np.nan
+        lower, upper = rule.get('clip', [None, None])
+        if lower is not None:
+            value = np.maximum(value, lower)
+        if upper is not None:
+            value = np.minimum(value, upper)
+
+        target = (rule['variable'], rule['use_technology_fuel'])
+        if rule.get('ifMissing') and target in columns:
+            found &= ~present[:, columns[target]]
+        if not found.any():
+            continue
+
+        rows = keys[found].copy()
+        rows['variable'] = target[0]
+        rows['use_technology_fuel'] = target[1]
+        rows['time_resolution'] = resolution
+        rows['value'] = value[found]
+        out.append(rows)
+
+        # The calculated rows are inputs of the next rules
+        if target not in columns:
+            columns[target] = len(columns)
+            total = np.column_stack([total, np.zeros(len(keys))])
+            count = np.column_stack([count, np.zeros(len(keys), dtype=int)])
+            present = np.column_stack([present, np.zeros(len(keys), dtype=bool)])
+        i = columns[target]
+        valid = found & ~np.isnan(value)
+        total[valid, i] += value[valid]
+        count[:, i] += valid
+        present[:, i] |= found
+
+    if not out:
+        return d.iloc[:0]
+    return pd.concat(out, ignore_index=True)[COLUMNS]
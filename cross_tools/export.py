@@ -0,0 +1,127 @@
+"""Code to write the figures of the CROSS model comparison to files"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .lazy import LazyModule
+
+# Imported at the first figure that is written
+matplotlib = LazyModule('matplotlib')
+plt = LazyModule('matplotlib.pyplot')
+
+
+class FigureExporter:
+
+    def __init__(self, folder, formats=('pdf', 'png'), dpi=300, background=False):
+        """
+        Writes a figure in several formats with one layout pass: the tight bounding box is computed
+        once and given to every savefig, instead of letting each savefig(bbox_inches='tight')
+        draw the whole figure again to find it.
+
+        Attributes:
+            folder: folder where the files are written
+            formats: list with the formats (extensions) to write, e.g. ['pdf'] for LaTeX or ['png'] for the web
+            dpi: resolution of the raster formats (png), the vector formats (pdf) use the default of savefig
+            background: True to write the files in a background thread, so that the next figure
+                        can be drawn in the meantime. The figures are then closed instead of shown,
+                        use wait() to make sure that all the files are written
+        """
+        self.folder = folder
+        self.formats = [f.lstrip('.').lower() for f in ([formats] if isinstance(formats, str) else formats)]
+        self.dpi = dpi
+        self.background = background
+
+        # Profiler of the object that uses the exporter (see profiling.py), the writing is a stage 'save'
+        self.profiler = None
+
+        self._pool = None
+        self._pid = None
+        self._pending = []
+
+    def save(self, fileName, fig=None):
+        """
+        Writes the figure (default: the current figure) to folder/fileName.<format> for every format.
+        An extension in fileName is replaced, e.g. 'elecDist_tech.pdf' is written as elecDist_tech.pdf
+        and elecDist_tech.png. Without background the figure is shown afterwards, as plt.show() after plt.savefig
+        """
+        fig = plt.gcf() if fig is None else fig
+        with self.profiler.stage('save') if self.profiler else contextlib.nullcontext():
+            self._save(fileName, fig)
+
+    def _save(self, fileName, fig):
+        # Tight bounding box of everything in the figure (in inches), measured once at the resolution
+        # of the raster files so that the text is measured as when they are drawn
+        dpi = fig.dpi
+        if any(f not in VECTOR_FORMATS for f in self.formats):
+            fig.dpi = self.dpi
+        try:
+            bbox = fig.get_tightbbox().padded(matplotlib.rcParams['savefig.pad_inches'])
+        finally:
+            fig.dpi = dpi
+        files = self.files(fileName)
+
+        if not self.background:
+            _write(fig, files, bbox, self.dpi)
+            plt.show()
+            return
+
+        # The figure leaves pyplot, it is only written by the background thread
+        plt.close(fig)
+        self._pending.append(self._executor().submit(_write, fig, files, bbox, self.dpi))
+
+    def files(self, fileName):
+        """
+        List of (path, format) of the files written for fileName
+        """
+        base, extension = os.path.splitext(fileName)
+        if extension.lstrip('.').lower() in FORMATS:
+            fileName = base
+        return [(os.path.join(self.folder, fileName + '.' + f), f) for f in self.formats]
+
+    def wait(self):
+        """
+        Waits until all the files are written, raises the first error of the background writes.
+        The background thread is then stopped, so that the process can be forked (Plots.renderJobs)
+        """
+        pending, self._pending = self._pending, []
+        try:
+            for future in pending:
+                future.result()
+        finally:
+            if self.running():
+                self._pool.shutdown()
+                self._pool = None
+
+    def running(self):
+        """
+        True if the background thread that writes the files was started in this process
+        """
+        return self._pool is not None and self._pid == os.getpid()
+
+    def __getstate__(self):
+        # A copy of the exporter (e.g. in a spawned process of Plots.renderJobs) starts without thread
+        return {**self.__dict__, '_pool': None, '_pid': None, '_pending': []}
+
+    def _executor(self):
+        # A forked process (Plots.renderJobs) does not inherit the thread of its parent, it needs its own
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=1)
+            self._pid = os.getpid()
+            self._pending = []
+        return self._pool
+
+
+# Vector formats, written with the default resolution of savefig for their embedded images
+VECTOR_FORMATS = ['pdf', 'svg', 'eps', 'ps']
+
+# Extensions that are removed from the file names, as they are replaced by the formats of the exporter
+FORMATS = VECTOR_FORMATS + ['svgz', 'pgf', 'png', 'jpg', 'jpeg', 'tif', 'tiff', 'webp', 'raw', 'rgba']
+
+def _write(fig, files, bbox, dpi):
+    for fileName, fmt in files:
+        fig.savefig(fileName, format=fmt, bbox_inches=bbox, dpi=None if fmt in VECTOR_FORMATS else dpi)
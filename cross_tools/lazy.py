@@ -0,0 +1,31 @@
+"""Modules that are imported when they are used for the first time"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import importlib
+
+
+class LazyModule:
+
+    def __init__(self, name):
+        """
+        Stands for the module with the given name (e.g. 'matplotlib.pyplot') and imports it at the first
+        access to one of its attributes, so that the modules that only read the data don't pay
+        the start-up time of the plotting libraries.
+
+        Attributes:
+            name: full name of the module
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = 'imported' if self._module is not None else 'not imported yet'
+        return f"<lazy module '{self._name}' ({state})>"
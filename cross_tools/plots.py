@@ -7,21 +7,37 @@
 # Import all the libraries 
 import pandas as pd
 import numpy as np
-import matplotlib
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-import seaborn as sb
-from matplotlib.patches import Patch
-import inspect
 import os
+import sys
+import warnings
 
+from .data import Results
+from .derived import DERIVED_VARIABLES
+from .export import FigureExporter
+from .lazy import LazyModule
+from .profiling import profiled
 
-class Plots:
+# The plotting libraries are imported at the first plot: reading the data doesn't need them
+matplotlib = LazyModule('matplotlib')
+plt = LazyModule('matplotlib.pyplot')
+ticker = LazyModule('matplotlib.ticker')
+mpatches = LazyModule('matplotlib.patches')
+sb = LazyModule('seaborn')
 
-    def __init__(self, fileResults,model_list,scenarios,sceColors,folder_plots):
+# The worker processes of renderJobs are started only by renderJobs
+multiprocessing = LazyModule('multiprocessing')
+futures = LazyModule('concurrent.futures')
+
+
+class Plots(Results):
+
+    def __init__(self, fileResults,model_list,scenarios,sceColors,folder_plots,cache=True,
+                 formats=('pdf','png'),dpi=300,background=False,select=None,
+                 derivedVariables=DERIVED_VARIABLES,duplicates='latest',queryCache=256,verbose=False,profile=False):
 
         """ 
-        Generic class to upload the data and produce the plots for the model comparison
+        Generic class to upload the data and produce the plots for the model comparison.
+        The data is read and pre-processed by Results, see its attributes
 
         Attributes:
             fileResults: Name of the file with the results
@@ -29,449 +45,25 @@ class Plots:
             scenarios: list with the scenario names
             sceColors: list with the color for the scenarios
             folder_plots: path to folder_plots
+            cache, select, derivedVariables, duplicates, queryCache: see Results
+            formats: list with the formats of the plots, e.g. ['pdf'] for LaTeX or ['png'] for the web
+            dpi: resolution of the png files
+            background: True to write the files of the plots in a background thread while the next plot
+                        is drawn (the plots are then not shown), see FigureExporter
+            verbose: True to print the attributes and the methods of the object
+            profile: True to record the time and memory of the reading and of every plot (data, drawing
+                     and files), see Results
         """
-        
-
-        # Get the models names
-        self.models = {f['id']: f['name'] for f in model_list}
-        self.modelsid = [ f['id'] for f in model_list ]
-        self.model_colors = [ f['color'] for f in model_list ]
-        self.typicalDays = {}
-        self.typicalDays['summer'] = {
-                                    'name':  {f['id']: f['summer'] for f in model_list},
-                                    'value': {f['id']: f['summerDay'] for f in model_list}
-                                }
-                                
-        self.typicalDays['winter'] =  {
-                                    'name':  {f['id']: f['winter'] for f in model_list},
-                                    'value': {f['id']: f['winterDay'] for f in model_list}
-                                }
-        
         os.makedirs(folder_plots, exist_ok=True)
         self.folder_plots = folder_plots
-        
-        # Read the file with the data
-        self.allData = self.__readData(fileResults) 
-        
-        self.yearsModel = self.__getReportedYearsByModel()
-        self.sce = scenarios
+        self.exporter = FigureExporter(folder_plots, formats, dpi, background)
         self.sceColors = sceColors
-        self.sceModel = self.__getReportedScenariosByModel()
-        self.sceVariants= self.__getReportedSceVariants()
-        
-        
-        #Calculate net imports and exports
-        self.__calculateNets()
-        
-        # For the following variables we do a pre-processing:
-        # We make sure that if the var 'cat' wasn't reported, we calculate it from the subcategories
-        # The variable '(varName,cat)' will be created and can be used later in the code
-        # This guarantees that we can compare even if models report different levels of aggregation 
-
-        subcats = [
-            {'varName':'electricity_supply',
-             'time_resolution':['annual','typical-day'],
-             'data':[
-                 {'cat':'spv','subcats':['spv_rooftop','spv_facade','spv_mountain','spv_agriculture']},
-                 {'cat':'wind','subcats':['wind_on','wind_off']},
-                 {'cat':'methane_pp','subcats':["methane_chp_ccs","methane_chp_woccs","methane_oc_woccs","methane_oc_ccs","methane_cc_woccs","methane_cc_ccs"]},
-                 {'cat':'liquids_pp','subcats':['liquids_chp_woccs','liquids_chp_ccs','liquids_oc_woccs','liquids_oc_ccs','liquids_cc_woccs','liquids_cc_ccs']},
-                 {'cat':'waste_pp','subcats':['waste_chp_woccs','waste_chp_ccs','waste_cc_woccs','waste_cc_ccs']},
-                 {'cat':'wood_pp','subcats':['wood_chp_woccs','wood_chp_ccs','wood_cc_woccs','wood_cc_ccs']},
-                 {'cat':'hydrogen_pp','subcats':['hydrogen_chp','hydrogen_cc']},
-                 ]},
-            {'varName':'space_heat_useful_energy_supply',
-             'time_resolution':['annual'],
-             'data':[
-                 {'cat':'heat_pump','subcats':['air_source','ground_source','water_source']}, 
-                 {'cat':'boiler_wood','subcats':['boiler_wood_chips','boiler_wood_pellets']},
-                 ]},
-            {'varName':'district_heat_useful_energy_supply',
-             'time_resolution':['annual'],
-             'data':[
-                 {'cat':'heat_pump','subcats':['air_source','ground_source','water_source']}, 
-                 {'cat':'boiler_wood','subcats':['boiler_wood_chips','boiler_wood_pellets']},
-                 ]},
-            {'varName':'process_heat_useful_energy_production',
-             'time_resolution':['annual'],
-             'data':[
-                 {'cat':'heat_pump','subcats':['air_source','ground_source','water_source']}, 
-                 {'cat':'boiler_wood','subcats':['boiler_wood_chips','boiler_wood_pellets']},
-                 ]},
-            ]
-
-
-        self.__checkSubcategories(subcats)
-        
-        variables = ['total_system_costs','carbon_price']
-        self.__checkVariablesNoSub(variables)
-        
-        varList_supply_net = ['hydro_dam','hydro_ror','nuclear','spv','wind','geothermal_pp',"methane_pp",'fuel_cell_methane',
-                           'hydrogen_pp','fuel_cell_h2','liquids_pp','waste_pp','wood_pp','net_storage_out','net_imports']
-        
-        self.__calculateTotalSupply(varList_supply_net)
-        
-        
-        self.allData = (
-            self.allData
-              .set_index(['scenario_name','scenario_variant','model','variable',
-                          'use_technology_fuel','time_resolution','timestamp'])
-              .sort_index()
-        )
-    
-        self.allData = self.allData.fillna(0)
-        
-        self.annualData = self.allData.loc[(slice(None),slice(None),slice(None),slice(None),slice(None),'annual',slice(None)),'value'].to_frame()
-        
-        
-        
-        # ---- Print info for the user ----
-        print("=== Plots object initialized ===\n")
-        
-        print("Attributes:")
-        for name, value in self.__dict__.items():
-            print(f"  {name}: {type(value).__name__}")
-        
-        print("\nMethods:")
-        for name, func in inspect.getmembers(self, predicate=inspect.ismethod):
-            if not name.startswith("_"):   # skip internal methods
-                print(f"  {name}()")
-        print("\n================================\n")
-        
-        
-        
-        
-        # # Hourly data
-        # self.seasons = ["summer","winter"]  
-        # self.hourlyData = {}
-        # for season in self.seasons:
-        #     seasondata =[]
-        #     for m in self.modelsid:
-        #         season_m = self.allData.loc[(slice(None),slice(None),slice(None),slice(None),'typical-day',self.typicalDays[season]['value'][m]),'value']
-        #         seasondata.append(season_m)
-            
-        #     self.hourlyData[season]= pd.concat(seasondata, axis=0, ignore_index=False,sort=True)
-                
-        # self.posNegData = {}
-       
-    #  Reads the annual data from the csv file from CROSSHub
-    #  returns a dataFrame with all the data
-    def __readData(self,fileResults):
         
-        data = pd.read_csv(fileResults+'.csv', index_col=[],header=[0])
+        super().__init__(fileResults, model_list, scenarios, cache=cache, select=select,
+                         derivedVariables=derivedVariables, duplicates=duplicates, queryCache=queryCache,
+                         verbose=verbose, profile=profile)
+        self.exporter.profiler = self.profiler
         
-        #  remove columns that are not used 
-        data.drop(columns=['scenario_group','uploaded_by','uploaded_at','country'],inplace=True)
-                        
-        # Get the annual values and make them numeric instead of text
-        data['value']=pd.to_numeric(data['value'])
-        
-        # Correct the unit
-        data['value']=data.apply(lambda x: x.value * self.__correctUnit(x.time_resolution,x.unit),axis=1)
-        data = data.drop(['unit'], axis=1)
-
-        # Make timestamp either an int for annual or a datetime for hourly data 
-        # annual → int year
-        mask_annual = data['time_resolution'] == 'annual'
-        data.loc[mask_annual, 'timestamp'] = (
-            data.loc[mask_annual, 'timestamp']
-            .astype(int)
-        )
-        
-        # Hourly-based → datetime (minute precision)
-        mask_hourly = data['time_resolution'].isin(['typical-day', 'hourly'])
-        data.loc[mask_hourly, 'timestamp'] = (
-            pd.to_datetime(
-                data.loc[mask_hourly, 'timestamp'],
-                dayfirst=True,
-                errors='coerce'
-            )
-            .dt.floor('min')
-        )
-       
-        return data
-    
-    def __correctUnit(self,timeResolution,unit):
-        annual_factors = {'twh':1,'gwh':1/1000, 'mwh':1/1e6,'gj':1/3.6,'mtco2':1,'gtco2':1000,'gw':1,'mw':1/1000,'bchf':1,'mchf':1/1000,'chf/tco2':1}
-        hourly_factors = {'gw':1,'gwh/h':1, 'mw':1/1000,'mwh/h':1/1000}
-        if timeResolution == 'annual':
-            if unit.lower() in annual_factors.keys():
-                return annual_factors[unit.lower()]
-            else:
-                return 0
-        elif timeResolution == 'typical-day':
-            if unit.lower() in hourly_factors.keys():
-                return hourly_factors[unit.lower()]
-            else: 
-                return 0
-            
-    def __getReportedYearsByModel(self):
-        years =  {}
-        for m in self.modelsid:
-            data_annual_m = self.allData.loc[
-                (self.allData["model"] == m) &
-                (self.allData["time_resolution"] == "annual"),
-                "timestamp"
-            ]
-            years_m = (
-                pd.to_numeric(data_annual_m, errors='coerce')
-                  .dropna()
-                  .astype(int)
-                  .unique()
-                  .tolist()
-                  )
-            years[m]=years_m
-            
-        return years
-    
-    
-    def __getReportedScenariosByModel(self):
-        sceModel = {}
-
-        for m in self.modelsid:
-            df = self.allData.loc[
-                (self.allData["model"] == m) &
-                (self.allData["time_resolution"] == "annual"),
-                ["scenario_name", "scenario_variant"]
-            ]
-    
-            combos = list(map(tuple, df.drop_duplicates().to_numpy()))
-            sceModel[m] = combos
-    
-        return sceModel
-    
-    def __getReportedSceVariants(self):
-        seen = set()
-        union_list = []
-        
-        for pairs in self.sceModel.values():
-            for combo in pairs:
-                if combo not in seen:
-                    seen.add(combo)
-                    union_list.append(combo)
-        return union_list
-   
-
-
-    def __checkSubcategories(self, subcats):
-        """
-        Create category rows by aggregating subcategories:
-            value(varName, cat) = sum(value(varName, subcats))
-    
-        Works for:
-          - annual: timestamp is a year (e.g., 2050)
-          - typical-day: timestamp is hourly datetimes within a representative day
-        """
-        
-        df = self.allData.copy()
-        new_rows = []
-
-        base_keys = ["scenario_name","scenario_variant","model","variable","time_resolution","timestamp"]
-
-        for v in subcats:
-            varName = v["varName"]
-            
-            for resolution in v["time_resolution"]:
-                suffix = "_typical_day" if resolution in ["typical-day", "hourly"] else ""
-                var = varName + suffix
-                
-                for item in v["data"]:
-                    cat = item["cat"]
-                    sub_list = item["subcats"]
-                    
-                    # restrict to relevant slice
-                    d = df.loc[
-                        (df["time_resolution"] == resolution) &
-                        (df["variable"] == var) &
-                        (df["use_technology_fuel"].isin(sub_list + [cat])),
-                        :
-                    ]
-                    if d.empty:
-                        continue
-                    
-                    # sum subcategories
-                    sub_sum = (
-                        d.loc[d["use_technology_fuel"].isin(sub_list)]
-                         .groupby(base_keys, as_index=False)["value"]
-                         .sum()
-                    )
-                    if sub_sum.empty:
-                        continue
-                    
-                    # remove keys where category already exists
-                    existing_cat = (
-                        d.loc[d["use_technology_fuel"] == cat, base_keys]
-                         .drop_duplicates()
-                    )
-                    
-                    if resolution == "annual":
-                        sub_sum["timestamp"] = pd.to_numeric(sub_sum["timestamp"], errors="coerce").astype("Int64")
-                        if not existing_cat.empty:
-                            existing_cat["timestamp"] = pd.to_numeric(existing_cat["timestamp"], errors="coerce").astype("Int64")
-                    else:
-                        sub_sum["timestamp"] = pd.to_datetime(sub_sum["timestamp"], dayfirst=True, errors="coerce").dt.floor("min")
-                        if not existing_cat.empty:
-                            existing_cat["timestamp"] = pd.to_datetime(existing_cat["timestamp"], dayfirst=True, errors="coerce").dt.floor("min")
-
-                    if not existing_cat.empty:
-                        sub_sum = sub_sum.merge(existing_cat, on=base_keys, how="left", indicator=True)
-                        sub_sum = sub_sum.loc[sub_sum["_merge"] == "left_only"].drop(columns="_merge")
-
-                    
-                    if sub_sum.empty:
-                        continue
-
-                    # build new category rows
-                    sub_sum["use_technology_fuel"] = cat
-                    new_rows.append(sub_sum)
-        if not new_rows:
-            return
-
-        add = pd.concat(new_rows, ignore_index=True)
-        self.allData = pd.concat([self.allData, add], ignore_index=True)
-        
-
-                                
-    def __checkVariablesNoSub(self,variables):
-        """ 
-        Remove any text that was reported in use_technology_fuel for variables without subcategories 
-        """ 
-        # Create mask on the 'variable' index level
-        mask = self.allData['variable'].isin(variables)
-        
-        # Set use_technology_fuel to '' where condition holds
-        self.allData.loc[mask, 'use_technology_fuel'] = ''
-        
-        
-                                
-    def __calculateNets(self):
-        """ 
-        Calculate net imports, exports and storage for all the models, scenarios and timesteps
-        """ 
-        
-        variables = [
-            {'varSupply': 'electricity_supply','tech':['imports'],
-             'varDemand': 'electricity_consumption','use':['exports'], 
-             'netPositive':'net_imports',
-             'netNegative':'net_exports',
-             'time_resolution':['annual','typical-day']}, 
-            {'varSupply': 'electricity_supply','tech':['battery_out','phs_out'],
-             'varDemand': 'electricity_consumption','use':['battery_in','phs_in'],
-             'netPositive':'net_storage_out',
-             'netNegative':'net_storage_in',
-            'time_resolution':['annual','typical-day']}, 
-            
-        ]
-        
-        out_rows = []
-        keys = ["scenario_name", "scenario_variant", "model", "time_resolution", "timestamp"]
-        
-        base = self.allData.copy()
-        
-        for v in variables:
-            for resolution in v['time_resolution']:
-                suffix = "_typical_day" if resolution in ["typical-day", "hourly"] else ""
-                var_supply = v["varSupply"] + suffix
-                var_demand = v["varDemand"] + suffix
-                
-                # filter to the two variables + resolution of interest
-                df = base.loc[
-                       (base["time_resolution"] == resolution) &
-                       (base["variable"].isin([var_supply, var_demand])),
-                       :
-                       ]
-            
-                if df.empty:
-                    continue
-
-                # Supply side: sum over tech list
-                supply = (
-                    df.loc[
-                        (df["variable"] == var_supply) &
-                        (df["use_technology_fuel"].isin(v["tech"])),
-                        keys + ["value"]
-                    ]
-                    .groupby(keys, as_index=False)["value"]
-                    .sum()
-                    .rename(columns={"value": "supply_sum"})
-                )
-                
-                # Demand side: sum over use list
-                demand = (
-                    df.loc[
-                        (df["variable"] == var_demand) &
-                        (df["use_technology_fuel"].isin(v["use"])),
-                        keys + ["value"]
-                    ]
-                    .groupby(keys, as_index=False)["value"]
-                    .sum()
-                    .rename(columns={"value": "demand_sum"})
-                )
-                
-                
-                # Combine (outer so missing tech/use becomes 0)
-                netdf = supply.merge(demand, on=keys, how="outer")
-                netdf["supply_sum"] = netdf["supply_sum"].fillna(0.0)
-                netdf["demand_sum"] = netdf["demand_sum"].fillna(0.0)
-                netdf["net"] = netdf["supply_sum"] - netdf["demand_sum"]
-                
-                if netdf.empty:
-                    continue
-
-                # Build two outputs:
-                #  - on supply variable: netPositive = max(net,0)
-                #  - on demand variable: netNegative = max(-net,0)
-                pos = netdf[keys].copy()
-                pos["variable"] = var_supply
-                pos["use_technology_fuel"] = v["netPositive"]
-                pos["value"] = netdf["net"].clip(lower=0.0)
-    
-                neg = netdf[keys].copy()
-                neg["variable"] = var_demand
-                neg["use_technology_fuel"] = v["netNegative"]
-                neg["value"] = (-netdf["net"]).clip(lower=0.0)
-    
-                out_rows.append(pos)
-                out_rows.append(neg)
-        
-        if not out_rows:
-            return
-
-        new_rows = pd.concat(out_rows, ignore_index=True)
-    
-        self.allData = pd.concat([self.allData, new_rows], ignore_index=True)
-        
-        
-                   
-    def __calculateTotalSupply(self,varList_supply):
-        """ 
-        Calculate Net supply = sum(varList_supply)
-        """ 
-        df = self.allData.copy()
-        # --- restrict to annual electricity supply & selected fuels ---
-        d = df.loc[
-            (df["time_resolution"] == "annual") &
-            (df["variable"] == "electricity_supply") &
-            (df["use_technology_fuel"].isin(varList_supply)),
-            :
-        ]
-        if d.empty:
-            return
-        
-        # --- sum across supply technologies ---
-        keys = ["scenario_name", "scenario_variant", "model", "time_resolution", "timestamp"]
-        total = (
-            d.groupby(keys, as_index=False)["value"]
-             .sum(min_count=1)  # keeps NaN if all components are NaN
-        )
-        # --- build output rows ---
-        total["variable"] = "electricity_supply"
-        total["use_technology_fuel"] = "total"
-        
-        self.allData = pd.concat([self.allData, total], ignore_index=True)
-           
-    
-    
     def __extractPositiveNegative(self,positive_variables,negative_variables):
         
         positive_labels = [d['name'] for d in positive_variables]
@@ -508,6 +100,7 @@ class Plots:
             self.posNegData[season] = posNegData.set_index(["scenario",'index','timestep','model'])
             
      
+    @profiled
     def plotLineByScenario(
         self,
         listModelsid,
@@ -523,9 +116,13 @@ class Plots:
         height,
         ylim=None,
         extra_values=None, 
+        separateFiles=False,
+        ncols=2,
     ):
         """
         Line plot of a variable by scenario/variant, with custom x-positions.
+        Several variables can be plotted at once: all their points are read with one join, 
+        then they are drawn as small multiples in one figure or in one file per variable.
     
         Parameters
         ----------
@@ -548,8 +145,9 @@ class Plots:
                     ('abroad-res-low','reference'):       ('res',    5000),
                 }
     
-        varName : str
-            Variable name in the data template.
+        varName : str or list[(str, str)]
+            Variable name in the data template, or list of (varName, use_technology_fuel) pairs
+            to plot several variables (use_technology_fuel is then not used).
     
         use_technology_fuel : str
             Name of the use / technology / fuel.
@@ -561,18 +159,31 @@ class Plots:
             Factor dividing the raw value (e.g. PJ → TWh).
     
         xlabel, ylabel : str
-            Axis labels.
+            Axis labels, ylabel can be a list with one label per variable.
     
         fileName : str
-            Base name for saved figure files.
+            Base name for saved figure files. With separateFiles, the files are
+            fileName_varName_use_technology_fuel.
     
         width, height : float
-            Figure size in centimeters.
+            Figure size in centimeters (of every plot for several variables).
             
         ylim : (float, float) or None, optional
             If not None, fixed y-axis limits (ymin, ymax).
         
+        extra_values : dict or None, optional
+            Values used where the model did not report the variable:
+            (scenario_id, variant, model) -> value for all the variables, or
+            (scenario_id, variant, model, varName, use_technology_fuel) -> value for one variable.
+        
+        separateFiles : bool, optional
+            For several variables, True to save one file per variable instead of one figure with a plot per variable.
+        
+        ncols : int, optional
+            Number of plots per row of the figure with several variables.
         """
+        pairs = [(varName, use_technology_fuel)] if isinstance(varName, str) else [tuple(p) for p in varName]
+        ylabels = [ylabel] * len(pairs) if isinstance(ylabel, str) or ylabel is None else list(ylabel)
         
         # ---- Styling ----
         sb.reset_defaults()
@@ -581,41 +192,77 @@ class Plots:
     
         # Collect all line_ids (e.g. 'resnuc', 'res', ...)
         line_ids = sorted({v[0] for v in map_sce_xaxis.values()})
-    
-        # Container: values[model_id][line_id] = list of (x,y)
-        values = {
-            m: {line_id: [] for line_id in line_ids}
-            for m in listModelsid
-        }
-    
-                        
-         # ---- Read data ----
-        for (sce_id, variant), (line_id, x_val) in map_sce_xaxis.items():
-            for m in listModelsid:
-                # 1) try to read from self.annualData
-                try:
-                    val = self.annualData.loc[
-                        (sce_id, variant, m, varName, use_technology_fuel, "annual", year),
-                        "value",
-                    ]
-                except KeyError:
-                    val = np.nan
-    
-                # 2) if missing, try extra_values
-                if (np.isnan(val) or val is None) and extra_values is not None:
-                    key = (sce_id, variant, m)
-                    if key in extra_values:
-                        val = extra_values[key]
-    
-                # 3) if still NaN, skip
-                if not np.isnan(val):
-                    y_val = val / scale
-                    values[m][line_id].append((x_val, y_val))
-    
+        
+        # ---- Read data ----
+        points = self._extract_points(pairs, listModelsid, map_sce_xaxis, year, extra_values)
+        points["y"] = points["value"] / scale
+        byPair = dict(list(points.groupby(["variable", "use_technology_fuel"], sort=False)))
+        
         # ---- Figure ----
         cm = 1 / 2.54
-        fig, ax = plt.subplots(1, figsize=(width * cm, height * cm))
-    
+        if isinstance(varName, str):
+            fig, ax = plt.subplots(1, figsize=(width * cm, height * cm))
+            self.__drawLinesByScenario(ax, byPair.get(pairs[0], points.iloc[:0]), listModelsid, line_ids, xlabel, ylabel, ylim)
+            plt.tight_layout()
+            self.exporter.save(fileName)
+        elif separateFiles:
+            for (var, tech), label in zip(pairs, ylabels):
+                fig, ax = plt.subplots(1, figsize=(width * cm, height * cm))
+                self.__drawLinesByScenario(ax, byPair.get((var, tech), points.iloc[:0]), listModelsid, line_ids, xlabel, label, ylim)
+                ax.set_title(f"{var} {tech}")
+                plt.tight_layout()
+                self.exporter.save(f"{fileName}_{var}_{tech}")
+        else:
+            ncols = max(1, min(ncols, len(pairs)))
+            nrows = -(-len(pairs) // ncols)
+            fig, axes = plt.subplots(nrows, ncols, figsize=(width * cm * ncols, height * cm * nrows), squeeze=False)
+            for i, ax in enumerate(axes.flat):
+                if i >= len(pairs):
+                    ax.set_visible(False)
+                    continue
+                var, tech = pairs[i]
+                self.__drawLinesByScenario(ax, byPair.get((var, tech), points.iloc[:0]), listModelsid, line_ids, 
+                                           xlabel, ylabels[i], ylim, legend=(i == 0))
+                ax.set_title(f"{var} {tech}")
+            plt.tight_layout()
+            self.exporter.save(fileName)
+
+    @profiled
+    def _extract_points(self, pairs, listModelsid, map_sce_xaxis, year, extra_values):
+        """
+        Points of plotLineByScenario: frame with one row per (variable, technology) pair, scenario of 
+        map_sce_xaxis and model (in this order) with the columns variable, use_technology_fuel, model, 
+        line_id, x and value, only the rows with a value.
+        The keys of all the points are built at once and read from annualData with one indexed join,
+        then the missing values are taken from extra_values
+        """
+        mapping = pd.DataFrame(
+            [(s, v, line_id, x) for (s, v), (line_id, x) in map_sce_xaxis.items()],
+            columns=["scenario_name", "scenario_variant", "line_id", "x"],
+        )
+        points = (
+            pd.DataFrame(pairs, columns=["variable", "use_technology_fuel"])
+              .merge(mapping, how="cross")
+              .merge(pd.DataFrame({"model": list(listModelsid)}), how="cross")
+        )
+        keys = [points[c] for c in ["scenario_name", "scenario_variant", "model", "variable", "use_technology_fuel"]]
+        index = pd.MultiIndex.from_arrays(keys + [np.full(len(points), year)], names=self.annualData.index.names)
+        points["value"] = self.annualData["value"].reindex(index).to_numpy()
+        
+        if extra_values:
+            for size in (5, 3):
+                extra = {k: v for k, v in extra_values.items() if len(k) == size}
+                missing = points["value"].isna().to_numpy()
+                if extra and missing.any():
+                    index = pd.MultiIndex.from_arrays([k[missing] for k in keys[:size]])
+                    points.loc[missing, "value"] = pd.Series(extra).reindex(index).to_numpy()
+        
+        return points.loc[points["value"].notna(), ["variable", "use_technology_fuel", "model", "line_id", "x", "value"]]
+
+    def __drawLinesByScenario(self, ax, points, listModelsid, line_ids, xlabel, ylabel, ylim, legend=True):
+        """
+        Draws the lines of plotLineByScenario on ax, points as returned by _extract_points with the column y
+        """
         # Simple color mapping for models
         # If you already have self.modelColors, you can replace this.
         color_cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
@@ -633,18 +280,19 @@ class Plots:
         # For legend management
         model_handles = {}
         line_handles  = {}
+        
+        lines = dict(list(points.groupby(["model", "line_id"], sort=False)))
     
         # ---- Plot each model & line ----
         for im, m in enumerate(listModelsid):
             for il, line_id in enumerate(line_ids):
-                pts = values[m][line_id]
-                if not pts:
+                if (m, line_id) not in lines:
                     continue
     
                 # sort by x
-                pts = sorted(pts, key=lambda t: t[0])
-                xs = [p[0] for p in pts]
-                ys = [p[1] for p in pts]
+                pts = lines[(m, line_id)].sort_values("x", kind="stable")
+                xs = pts["x"].tolist()
+                ys = pts["y"].tolist()
     
                 color = model_colors[m]
                 marker = marker_cycle[il % len(marker_cycle)]
@@ -688,7 +336,7 @@ class Plots:
         ax.grid(True, linestyle="--", alpha=0.5)
     
         # Optional: small padding around x
-        all_x = [x for m_dict in values.values() for line_pts in m_dict.values() for (x, _) in line_pts]
+        all_x = points["x"].tolist()
         if all_x:
             xmin, xmax = min(all_x), max(all_x)
             span = xmax - xmin if xmax > xmin else 1.0
@@ -697,6 +345,9 @@ class Plots:
         # <<< Optional fixed y-limits
         if ylim is not None:
             ax.set_ylim(ylim)
+        
+        if not legend:
+            return
     
         # ---- Legends ----
         from matplotlib.lines import Line2D
@@ -745,23 +396,11 @@ class Plots:
             frameon=True,
         )
 
-
-
-    
-        plt.tight_layout()
-        plt.savefig(self.folder_plots + "/" + fileName+ ".pdf", bbox_inches="tight")
-        plt.savefig(
-            self.folder_plots + "/" + fileName + ".png",
-            bbox_inches="tight",
-            dpi=300,
-        )
-        plt.show()
-
-
-
-    def plotTechDist(self,listModelsid,varName,varList,year,order,ylabel,ymax,fileName,legend):
+    @profiled
+    def plotTechDist(self,listModelsid,varName,varList,year,order,ylabel,ymax,fileName,legend,listSce=None):
         """ 
-        Plots the distribution by technology
+        Plots the distribution by technology: one point per model and scenario for every technology 
+        (or group of technologies) and the box plot of the points
         Parameters:
         ----------
         listModelsid: list of models id to plot
@@ -770,56 +409,22 @@ class Plots:
             name: name of the technology or group of technologies,
             data: list with the technologies that correspond to this category
             color: color to use for this category
-        year: year for the plot
+        year: year for the plot, or list of years for one plot per year (side by side, from the same data)
         order: list with the technology order 
         ylabel: str, label for y-axis
         ymax: int, maximum level y-axis
         fileName: str, file name for the plot
         legend: True if legend has to be displayed
+        listSce: list of (scenario, variant) (or dictionary as in the other plots) whose points are plotted,
+            None for all the variants of the scenarios of the object
         """
-    
-        variables =[v['name'] for v in varList]
-        dataNew =pd.DataFrame (index=pd.MultiIndex.from_product([self.sce,variables] ,names=('scenario','index')), columns=listModelsid)
-
-        for v in varList:
-            var =  v['name']
-            for s in self.sce:
-                for m in listModelsid:
-                    dataNew.loc[(s,var),m] = np.nan
-                    for subv in v['data']:
-                        datasubv = np.nan
-                        try:
-                            datasubv = self.annualData.loc[(s,m,varName,subv,'annual',year),'value']
-                        except:
-                            datasubv = np.nan
-                        if not np.isnan(datasubv):
-                            if not np.isnan(dataNew.loc[(s,var),m]):    
-                                dataNew.loc[(s,var),m] = dataNew.loc[(s,var),m] + datasubv
-                            else:
-                                dataNew.loc[(s,var),m] = datasubv
-
-        dataNew=dataNew.dropna(how='all')
-        # Remove scenarios not existent
-        dataNew.reset_index(inplace=True)
-
-        dataNew=dataNew.melt(id_vars=["scenario", "index"], 
-                var_name="Model", 
-                value_name="value")
-
-        # Rename the models using the name instead of the modelid
-        dataNew=dataNew.replace({'Model': self.models})
-        
-        # Remove  non-existent scenarios
-        dataNew_unmelted = dataNew.pivot(index=['scenario','Model'], columns='index')
-        dataNew_unmelted=dataNew_unmelted.loc[(dataNew_unmelted!=0).any(axis=1)]
-        dataNew_unmelted.columns= dataNew_unmelted.columns.droplevel()
-
-        dataNew_unmelted.reset_index(inplace=True)
-        
+        years = [int(y) for y in year] if isinstance(year, (list, tuple)) else [int(year)]
+        if listSce is None:
+            sce_names = [sce for sce in self.sceVariants if sce[0] in self.sce]
+        else:
+            sce_names, _ = self._resolve_scenarios(listSce)
         
-        dataPlot=dataNew_unmelted.melt(id_vars=["scenario", "Model"], 
-                    var_name="index", 
-                    value_name="value")
+        dataPlot = self._extract_tech_dist(varList, listModelsid, varName, sce_names, years)
 
         sb.set_style("whitegrid")
 
@@ -835,26 +440,74 @@ class Plots:
         #Get the names from the ids
         listModels = [self.models[x] for x in listModelsid]
 
+        # One plot per year
+        facets = {} if len(years) == 1 else {'col': 'year', 'col_order': years}
         g1 = sb.catplot(x="index", y="value",hue='Model',hue_order=listModels,palette=sb.color_palette(colors), alpha=.8, data=dataPlot, 
-                             order=order);
+                             order=order, **facets);
         if legend==False:
             g1._legend.remove()
         
         g1.set(xlabel='', ylabel=ylabel )
         g1.set(ylim=(0, ymax))
         
-        g2 = sb.boxplot(x="index", y="value", data=dataPlot, order=order,
-                        showfliers=False,
-                        linewidth=0.75,
-                        **PROPS);
-        g2.set(xlabel='', ylabel=ylabel )
-        g2.set(ylim=(0, ymax))
+        for ax, y in zip(g1.axes.flat, years):
+            g2 = sb.boxplot(x="index", y="value", data=dataPlot[dataPlot['year'] == y], order=order,
+                            showfliers=False,
+                            linewidth=0.75,
+                            ax=ax,
+                            **PROPS);
+            g2.set(xlabel='', ylabel=ylabel if ax is g1.axes.flat[0] else '')
+            g2.set(ylim=(0, ymax))
+            # the legend of the models is the one of the catplot (newer seaborn adds one to the axes)
+            if ax.get_legend() is not None:
+                ax.get_legend().remove()
         
-        plt.savefig(self.folder_plots+'/'+fileName,bbox_inches='tight')
-        plt.savefig(self.folder_plots+'/'+fileName+'.png',bbox_inches='tight', dpi=300)
-        plt.show()
+        self.exporter.save(fileName)
     
+    @profiled
+    def _extract_tech_dist(self, varList, listModelsid, varName, sce_names, years):
+        """
+        Points of plotTechDist: one row per scenario, model, year and group of technologies (column index) 
+        with the sum of the values of its technologies, only the groups that the model reported.
+        The rows of the variable are selected once on the levels of the index, mapped to their group with 
+        one join and summed with a single groupby. The models that reported only zeros in a scenario and 
+        year did not run it and are removed
+        """
+        mapping = pd.DataFrame([(v['name'], t) for v in varList for t in v['data']], columns=['index', 'use_technology_fuel'])
+        
+        index = self.annualData.index
+        def inLevel(name, values):
+            # selection on the (few) labels of the level, then on the rows through the codes
+            i = index.names.index(name)
+            return index.levels[i].isin(values)[index.codes[i]]
+        
+        mask = (inLevel('variable', [varName]) & inLevel('timestamp', years) & inLevel('model', listModelsid)
+                & inLevel('scenario_name', [sce[0] for sce in sce_names]))
+        rows = self.annualData[mask].reset_index()
+        rows = rows[pd.MultiIndex.from_arrays([rows['scenario_name'].astype(object), 
+                                               rows['scenario_variant'].astype(object)]).isin(list(sce_names))]
+        
+        keys = ['scenario_name', 'scenario_variant', 'model', 'timestamp']
+        sums = (
+            rows.astype({'use_technology_fuel': object})
+                .merge(mapping, on='use_technology_fuel')
+                .groupby(keys + ['index'], observed=True, sort=False)['value'].sum()
+                .reset_index()
+        )
+        
+        # Remove non-existent scenarios: the points with only zeros
+        nonzero = sums.assign(nonzero=sums['value'] != 0).groupby(keys, observed=True, sort=False)['nonzero'].transform('any')
+        sums = sums[nonzero.to_numpy()]
         
+        return pd.DataFrame({
+            'scenario': sums['scenario_name'].astype(object).to_numpy(),
+            'variant': sums['scenario_variant'].astype(object).to_numpy(),
+            # Rename the models using the name instead of the modelid
+            'Model': sums['model'].astype(object).map(self.models).to_numpy(),
+            'year': sums['timestamp'].to_numpy(),
+            'index': sums['index'].to_numpy(),
+            'value': sums['value'].to_numpy(),
+        })
 
     def _resolve_scenarios(self, listSce):
         if listSce is None:
@@ -938,51 +591,99 @@ class Plots:
             pos_bar.append(pos)
         return np.array(pos_bar), pos_grid, pos_cols, pos_grid[0]
     
+    def _component_mapping(self, components, signed, varName=None):
+        """
+        Table with one row per (component, variable, technology): 
+        icomp (position of the component in the list), variable, use_technology_fuel.
+        Returns the table and the sign of every component
+        """
+        rows, signs = [], []
+        for icomp, comp in enumerate(components):
+            if signed:
+                vname = comp["varName"]
+                techs = comp["techs"]
+                signs.append(float(comp.get("sign", 1.0)))
+            else:
+                vname = varName
+                techs = comp["data"]
+                signs.append(1.0)
+            rows.extend((icomp, vname, tech) for tech in techs)
+    
+        mapping = pd.DataFrame(rows, columns=["icomp", "variable", "use_technology_fuel"])
+        return mapping, np.array(signs)
+    
+    @profiled
+    def _extract_components(self, mapping, listModelsid, sce_names, year):
+        """
+        Annual totals by component, model and scenario for the given year: 
+        array (components x models x scenarios), 0 where nothing was reported.
+        The values of all the technologies are one block of the query cache (see Results.query), 
+        shared with the other plots that read the same technologies, models, scenarios and year,
+        and they are added to their component in the order of the technologies
+        """
+        ncomp = int(mapping["icomp"].max()) + 1 if not mapping.empty else 0
+        totals = np.zeros((ncomp, len(listModelsid), len(sce_names)))
+        if mapping.empty or not len(listModelsid) or not len(sce_names):
+            return totals
+    
+        pairs = list(zip(mapping["variable"], mapping["use_technology_fuel"]))
+        values = self.query(pairs, listModelsid, sce_names, [year])[..., 0]
+        np.add.at(totals, mapping["icomp"].to_numpy(), np.nan_to_num(values))
+        return totals
+    
+    @profiled
+    def _extract_hourly_components(self, mapping, listModelsid, sce, days, time_resolution):
+        """
+        Hourly totals by component and model for one scenario and one day per model:
+        array (components x models x 24 hours), 0 where nothing was reported.
+        The rows of the day of every model are selected at once, the technologies are mapped 
+        to their component with one join and the hours come from a single groupby
+        """
+        ncomp = int(mapping["icomp"].max()) + 1 if not mapping.empty else 0
+        totals = np.zeros((ncomp, len(listModelsid), 24))
+    
+        index = self.hourlyData.index
+        mask = (
+            (index.get_level_values("time_resolution") == time_resolution) &
+            (index.get_level_values("scenario_name") == sce[0]) &
+            (index.get_level_values("scenario_variant") == sce[1])
+        )
+        data = self.hourlyData.loc[mask, "value"].reset_index()
+        if data.empty or mapping.empty:
+            return totals
+    
+        models = pd.DataFrame({"model": listModelsid, "im": np.arange(len(listModelsid)), "day": days})
+        selected = (
+            mapping
+              .merge(data, on=["variable", "use_technology_fuel"])
+              .merge(models, on="model")
+        )
+    
+        # hour of the day of every row, only the 24 full hours of the selected day are kept
+        offset = selected["timestamp"] - selected["day"]
+        keep = (offset >= pd.Timedelta(0)) & (offset < pd.Timedelta(hours=24)) & (offset % pd.Timedelta(hours=1) == pd.Timedelta(0))
+        selected = selected.loc[keep].assign(hour=(offset[keep] // pd.Timedelta(hours=1)).astype(int))
+    
+        sums = selected.groupby(["icomp", "im", "hour"])["value"].sum()
+        icomp, im, h = (sums.index.get_level_values(i).to_numpy() for i in range(3))
+        totals[icomp, im, h] = sums.to_numpy()
+        return totals
+    
     def _compute_matrices_mi(self, listModelsid, sce_names, year, scale, varName, components, signed):
         """
         Uses annual data only (time_resolution='annual', timestamp=year).
+        Returns the component names, colors and a (models x scenarios) matrix per component, 
+        all the matrices are computed at once by _extract_components.
         """
-        nmodels = len(listModelsid)
-        nscen   = len(sce_names)
+        mapping, signs = self._component_mapping(components, signed, varName)
+        totals = self._extract_components(mapping, listModelsid, sce_names, year)
     
         names, colors, mats = [], {}, {}
-    
-        for comp in components:
+        for icomp, comp in enumerate(components):
             name = comp["name"]
             names.append(name)
             colors[name] = comp["color"]
-            mat = np.zeros((nmodels, nscen))
-    
-            if signed:
-                vname = comp["varName"]
-                techs = comp["techs"]
-                sgn   = float(comp.get("sign", 1.0))
-            else:
-                vname = varName
-                techs = comp["data"]
-                sgn   = 1.0
-    
-            for im, m in enumerate(listModelsid):
-                for isce, sce in enumerate(sce_names):
-                    total = 0.0
-                    for tech in techs:
-                        try:
-                            val = self.allData.loc[
-                                (sce[0], sce[1], m, vname, tech, "annual", year),
-                                "value"
-                            ]
-                        except KeyError:
-                            val = 0.0
-    
-                        # val might be scalar or Series if duplicates exist
-                        if hasattr(val, "sum"):
-                            val = float(val.sum())
-                        if not np.isnan(val):
-                            total += val
-    
-                    mat[im, isce] = sgn * (total / scale)
-    
-            mats[name] = mat
+            mats[name] = signs[icomp] * (totals[icomp] / scale)
     
         return names, colors, mats
     
@@ -1042,21 +743,19 @@ class Plots:
             varName=None,         # unsigned
             varList=None,         # unsigned
             signedVarList=None,   # signed
+            matrices=None,        # (names, colors, mats) already extracted for listSce, see plotBarVerticalBatch
             ):
-        # Require sorted MultiIndex for fastest/most reliable .loc
-        # (safe even if already sorted)
-        if not self.allData.index.is_monotonic_increasing:
-            self.allData = self.allData.sort_index()
-    
         sce_names, sce_labels = self._resolve_scenarios(listSce)
         nGroups, nWithin, group_labels, within_labels, flatten, slice_group = self._group_layout(
             listModelsid, sce_names, sce_labels, group_by
         )
     
-        components = signedVarList if signed else varList
-        names, colors, mats = self._compute_matrices_mi(
-            listModelsid, sce_names, year, scale, varName, components, signed
-        )
+        if matrices is None:
+            components = signedVarList if signed else varList
+            matrices = self._compute_matrices_mi(
+                listModelsid, sce_names, year, scale, varName, components, signed
+            )
+        names, colors, mats = matrices
     
         cm = 1 / 2.54
     
@@ -1159,15 +858,13 @@ class Plots:
                 ax.spines["top"].set_visible(False)
     
             if legend:
-                proxies = [Patch(facecolor=colors[nm], edgecolor="none") for nm in names]
+                proxies = [mpatches.Patch(facecolor=colors[nm], edgecolor="none") for nm in names]
                 if isinstance(pos_legend, dict):
                     ax.legend(proxies, names, **pos_legend)
                 else:
                     ax.legend(proxies, names, loc=pos_legend, ncol=1)
     
-            plt.savefig(self.folder_plots + "/" + fileName + ".pdf", bbox_inches="tight")
-            plt.savefig(self.folder_plots + "/" + fileName + ".png", bbox_inches="tight", dpi=300)
-            plt.show()
+            self.exporter.save(fileName)
             return
     
         # ---------------- multi: one subplot per group ----------------
@@ -1240,7 +937,7 @@ class Plots:
                 ax.spines["top"].set_visible(False)
     
         if legend:
-            proxies = [Patch(facecolor=colors[nm], edgecolor="none") for nm in names]
+            proxies = [mpatches.Patch(facecolor=colors[nm], edgecolor="none") for nm in names]
         
             if isinstance(pos_legend, dict):
                 fig.legend(proxies, names, **pos_legend)
@@ -1249,10 +946,9 @@ class Plots:
 
     
         fig.tight_layout()
-        plt.savefig(self.folder_plots + "/" + fileName + ".pdf", bbox_inches="tight")
-        plt.savefig(self.folder_plots + "/" + fileName + ".png", bbox_inches="tight", dpi=300)
-        plt.show()
+        self.exporter.save(fileName)
 
+    @profiled
     def plotBarVertical(self, listModelsid, listSce, varName, varList, year, scale, label, figmax,
                         fileName, invert, legend, pos_legend, width, height,
                         group_by="model", multi=False):
@@ -1277,6 +973,44 @@ class Plots:
             varList=varList,
         )
     
+    @profiled
+    def plotBarVerticalBatch(self, listModelsid, groups, varName, varList, year, scale, label, figmax,
+                             fileName, invert, legend, pos_legend, width, height,
+                             group_by="model", multi=False, workers=1):
+        """
+        plotBarVertical for several groups of scenarios, one figure per group (fileName_group). 
+        The values of all the scenarios of the groups are extracted once and the matrices of every
+        group are sliced from them, so a scenario that is in several groups is read only once.
+        
+        Parameters:
+        ----------
+        groups: dictionary group name -> listSce (as in plotBarVertical), e.g. 
+            {'nores': {('abroad-nores-high','wacc_5'): 'High cost', ...}, 'res': {...}}
+        workers: number of processes to draw the figures in parallel (see renderJobs), 1 to draw them here
+        the other parameters: see plotBarVertical
+        
+        Returns the list of the file names of the figures
+        """
+        resolved = {name: self._resolve_scenarios(listSce) for name, listSce in groups.items()}
+        
+        # Union of the scenarios of all the groups, in the order in which they appear
+        union = list(dict.fromkeys(sce for sce_names, _ in resolved.values() for sce in sce_names))
+        position = {sce: i for i, sce in enumerate(union)}
+        names, colors, mats = self._compute_matrices_mi(listModelsid, union, year, scale, varName, varList, False)
+        
+        jobs = []
+        for name, (sce_names, sce_labels) in resolved.items():
+            columns = [position[sce] for sce in sce_names]
+            jobs.append(dict(
+                plot='_plot_stacked_engine_mi', orientation='vertical', listModelsid=listModelsid,
+                listSce=dict(zip(sce_names, sce_labels)), year=year, scale=scale, label=label, figmax=figmax,
+                fileName=f"{fileName}_{name}", invert=invert, legend=legend, pos_legend=pos_legend,
+                width=width, height=height, group_by=group_by, multi=multi, signed=False,
+                matrices=(names, colors, {nm: m[:, columns] for nm, m in mats.items()}),
+            ))
+        return self.renderJobs(jobs, workers)
+    
+    @profiled
     def plotBarHorizontal(self, listModelsid, listSce, varName, varList, year, scale, label, figmax,
                           fileName, invert, legend, pos_legend, width, height,
                           group_by="model", multi=False):
@@ -1301,6 +1035,7 @@ class Plots:
             varList=varList,
         )
     
+    @profiled
     def plotBarVerticalSigned(self, listModelsid, listSce, signedVarList, year, scale, label, figmax,
                               fileName, invert=False, legend=True, pos_legend="upper right",
                               width=12, height=5, group_by="model", multi=False):
@@ -1324,6 +1059,7 @@ class Plots:
             signedVarList=signedVarList,
         )
     
+    @profiled
     def plotBarHorizontalSigned(self, listModelsid, listSce, signedVarList, year, scale, label, figmax,
                                 fileName, invert=False, legend=True, pos_legend="upper right",
                                 width=12, height=5, group_by="model", multi=False):
@@ -1348,6 +1084,7 @@ class Plots:
         )
 
 
+    @profiled
     def plotScatter(
         self,
         listModelsid,
@@ -1364,10 +1101,6 @@ class Plots:
         orientation="horizontal",   # 'horizontal' or 'vertical'
         group_by="model",           # 'model' or 'scenario'
     ):
-        # ensure MI sorted for reliable lookup speed
-        if not self.allData.index.is_monotonic_increasing:
-            self.allData = self.allData.sort_index()
-    
         is_horizontal = (orientation == "horizontal")
     
         # 1) scenarios + grouping (reused)
@@ -1380,11 +1113,22 @@ class Plots:
         orient = "horizontal" if is_horizontal else "vertical"
         pos_bar, pos_grid, pos_cols, max_grid = self._positions_single_axis(nGroups, nWithin, orient)
     
-        # 3) figure/axis
+        # 3) values (models x scenarios) in one lookup
+        vals = self.cube.lookup(
+            "annual",
+            scenario_name=np.array([sce[0] for sce in sce_names], dtype=object)[None, :],
+            scenario_variant=np.array([sce[1] for sce in sce_names], dtype=object)[None, :],
+            model=np.array(listModelsid, dtype=object)[:, None],
+            variable=varName,
+            use_technology_fuel=use_technology_fuel,
+            timestamp=year,
+        )
+    
+        # 4) figure/axis
         cm = 1 / 2.54
         fig, ax = plt.subplots(1, figsize=(width * cm, height * cm))
     
-        # 4) plotting (loop through bars in the same order as bar plots)
+        # 5) plotting (loop through bars in the same order as bar plots)
         k = 0
         tick_pos = []
         tick_lab = []
@@ -1397,22 +1141,10 @@ class Plots:
                 else:
                     im, isce = w, g
     
-                m = listModelsid[im]
-                sce = sce_names[isce]
                 cat_pos = pos_bar[k]
                 k += 1
     
-                # MultiIndex lookup
-                try:
-                    val = self.allData.loc[
-                        (sce[0], sce[1], m, varName, use_technology_fuel, "annual", year),
-                        "value",
-                    ]
-                except KeyError:
-                    val = np.nan
-    
-                if hasattr(val, "sum"):
-                    val = float(val.sum())
+                val = vals[im, isce]
                 if not np.isnan(val):
                     val = val / scale
                     if is_horizontal:
@@ -1423,7 +1155,7 @@ class Plots:
                 tick_pos.append(cat_pos)
                 tick_lab.append(within_labels[w])
     
-        # 5) axes, ticks, grids
+        # 6) axes, ticks, grids
         if is_horizontal:
             ax.set_xlim(0, figmax)
             ax.set_ylim(0, max_grid)
@@ -1462,12 +1194,11 @@ class Plots:
         ax.spines["top"].set_visible(False)
         ax.spines["right"].set_visible(False)
     
-        plt.savefig(self.folder_plots + "/" + fileName + ".pdf", bbox_inches="tight")
-        plt.savefig(self.folder_plots + "/" + fileName + ".png", bbox_inches="tight", dpi=300)
-        plt.show()
+        self.exporter.save(fileName)
 
 
 
+    @profiled
     def plotHourlySignedProfile(
         self,
         *,
@@ -1508,6 +1239,18 @@ class Plots:
             raise ValueError("Hourly profile plot expects exactly ONE scenario/variant (pass one tuple in listSce).")
         sce = sce_names[0]  # (scenario_name, scenario_variant)
     
+        # --- typical day of every model ---
+        days = []
+        for m in listModelsid:
+            day_val = day_by_model.get(m, None)
+            if day_val is None:
+                raise ValueError(f"Missing day_by_model entry for model '{m}'")
+            days.append(pd.to_datetime(day_val, dayfirst=True).normalize())
+    
+        # --- (components x models x hours) values for all the models at once ---
+        mapping, signs = self._component_mapping(signedVarList, signed=True)
+        hourly = self._extract_hourly_components(mapping, listModelsid, sce, days, time_resolution)
+    
         # --- prepare figure ---
         cm = 1 / 2.54
         n = len(listModelsid)
@@ -1518,39 +1261,12 @@ class Plots:
         # proxy legend (always correct)
         names = [v["name"] for v in signedVarList]
         colors = {v["name"]: v["color"] for v in signedVarList}
-        proxies = [Patch(facecolor=colors[nm], edgecolor="none") for nm in names]
-    
-        for ax, m in zip(axes, listModelsid):
-            day_val = day_by_model.get(m, None)
-            if day_val is None:
-                raise ValueError(f"Missing day_by_model entry for model '{m}'")
-    
-            day = pd.to_datetime(day_val, dayfirst=True)
-            ts = pd.date_range(day.normalize(), periods=24, freq="H")
+        proxies = [mpatches.Patch(facecolor=colors[nm], edgecolor="none") for nm in names]
     
-            # collect series per component
+        for im, (ax, m) in enumerate(zip(axes, listModelsid)):
             comp_vals = {}
-            for comp in signedVarList:
-                vname = comp["varName"]
-                techs = comp["techs"]
-                sgn = float(comp.get("sign", 1.0))
-    
-                arr = np.zeros(24, dtype=float)
-                for i, t in enumerate(ts):
-                    s = 0.0
-                    for tech in techs:
-                        try:
-                            val = self.allData.loc[(sce[0], sce[1], m, vname, tech, time_resolution, t), "value"]
-                        except KeyError:
-                            val = 0.0
-    
-                        if hasattr(val, "sum"):
-                            val = float(val.sum())
-                        s += 0.0 if np.isnan(val) else float(val)
-    
-                    arr[i] = sgn * (s / scale)
-    
-                comp_vals[comp["name"]] = arr
+            for icomp, comp in enumerate(signedVarList):
+                comp_vals[comp["name"]] = signs[icomp] * (hourly[icomp, im] / scale)
     
             # --- signed stacked bars ---
             x = np.arange(24)
@@ -1608,16 +1324,15 @@ class Plots:
                 fig.legend(proxies, names, loc=pos_legend, ncol=1)
     
         fig.tight_layout()
-        plt.savefig(self.folder_plots + "/" + fileName + ".pdf", bbox_inches="tight")
-        plt.savefig(self.folder_plots + "/" + fileName + ".png", bbox_inches="tight", dpi=300)
-        plt.show()
+        self.exporter.save(fileName)
         
 
 
+    @profiled
     def plotBarVerticalSignedFuels(
         self,
         *,
-        scenario,            # tuple: (scenario_name, scenario_variant)
+        scenario,            # tuple: (scenario_name, scenario_variant), or list of tuples
         listModelsid,
         signedVarByFuel,     # dict: fuel -> list[component dicts]
         year,
@@ -1639,45 +1354,60 @@ class Plots:
         group_by:
           - "fuel": groups are fuels, within are models
           - "model": groups are models, within are fuels
+        With a list of scenarios, one figure per scenario (fileName_scenario_variant),
+        all read with one extraction.
         """
-    
-        # Ensure sorted index for stable .loc performance
-        if not self.allData.index.is_monotonic_increasing:
-            self.allData = self.allData.sort_index()
-    
-        sce_name, sce_var = scenario
+        scenarios = [tuple(scenario)] if isinstance(scenario[0], str) else [tuple(sce) for sce in scenario]
         fuels = list(signedVarByFuel.keys())
-        nfuels = len(fuels)
-        nmodels = len(listModelsid)
-        model_labels = [self.models.get(m, m) for m in listModelsid]
     
         # Component names + colors (use first fuel as reference)
         ref = signedVarByFuel[fuels[0]]
         comp_names = [c["name"] for c in ref]
         colors = {c["name"]: c["color"] for c in ref}
     
-        # Build matrices: comp_name -> (nmodels, nfuels)
-        mats = {nm: np.zeros((nmodels, nfuels)) for nm in comp_names}
-    
-        for jf, fuel in enumerate(fuels):
-            comps = {c["name"]: c for c in signedVarByFuel[fuel]}
-            for im, m in enumerate(listModelsid):
-                for nm in comp_names:
-                    c = comps[nm]
-                    total = 0.0
-                    for tech in c["techs"]:
-                        try:
-                            val = self.allData.loc[
-                                (sce_name, sce_var, m, c["varName"], tech, "annual", year),
-                                "value"
-                            ]
-                        except KeyError:
-                            val = 0.0
-                        if hasattr(val, "sum"):
-                            val = float(val.sum())
-                        if not np.isnan(val):
-                            total += val
-                    mats[nm][im, jf] = float(c.get("sign", 1.0)) * (total / scale)
+        # (components x fuels x models x scenarios), signed and scaled
+        values = self._extract_fuel_components(signedVarByFuel, comp_names, listModelsid, scenarios, year) / scale
+    
+        for isce, sce in enumerate(scenarios):
+            # Matrices: comp_name -> (nmodels, nfuels)
+            mats = {nm: values[icomp, :, :, isce].T for icomp, nm in enumerate(comp_names)}
+            self.__drawSignedFuels(
+                mats, comp_names, colors, fuels, listModelsid, label, ylim, figmax, 
+                fileName if len(scenarios) == 1 else f"{fileName}_{sce[0]}_{sce[1]}",
+                group_by, multi, legend, pos_legend, width, height,
+            )
+    
+    def _extract_fuel_components(self, signedVarByFuel, comp_names, listModelsid, sce_names, year):
+        """
+        Annual totals of the components of every fuel, by model and scenario: array 
+        (components x fuels x models x scenarios) with the sign of the components, 0 where nothing was reported.
+        Every (component, fuel) is one component of the mapping table of _extract_components, 
+        so all the values come from one query
+        """
+        fuels = list(signedVarByFuel.keys())
+        components, signs = [], np.zeros((len(comp_names), len(fuels)))
+        for icomp, nm in enumerate(comp_names):
+            for jf, fuel in enumerate(fuels):
+                c = {c["name"]: c for c in signedVarByFuel[fuel]}[nm]
+                components.append(c)
+                signs[icomp, jf] = float(c.get("sign", 1.0))
+    
+        mapping, _ = self._component_mapping(components, signed=True)
+        # the components at the end without technologies are not in the table
+        totals = np.zeros((len(components), len(listModelsid), len(sce_names)))
+        extracted = self._extract_components(mapping, listModelsid, sce_names, year)
+        totals[:len(extracted)] = extracted
+        totals = totals.reshape(len(comp_names), len(fuels), len(listModelsid), len(sce_names))
+        return signs[:, :, None, None] * totals
+
+    def __drawSignedFuels(self, mats, comp_names, colors, fuels, listModelsid, label, ylim, figmax, fileName,
+                          group_by, multi, legend, pos_legend, width, height):
+        """
+        Draws and saves one figure of plotBarVerticalSignedFuels, mats: comp_name -> (nmodels, nfuels)
+        """
+        nfuels = len(fuels)
+        nmodels = len(listModelsid)
+        model_labels = [self.models.get(m, m) for m in listModelsid]
     
         # Grouping layout (fuels/models)
         if group_by == "fuel":
@@ -1704,38 +1434,12 @@ class Plots:
         else:
             raise ValueError("group_by must be 'fuel' or 'model'")
     
-        # Positions (same as your vertical bar)
-        def _positions_single_axis(nGroups, nWithin):
-            pos_grid, pos_cols, pos_bar = [], [], []
-            for g in range(nGroups):
-                ini = nGroups * nWithin / 2 - g * nWithin * 0.5 + 0.5 * (nGroups - g)
-                pos_grid.append(ini)
-                pos_cols.append(ini - nWithin / 4 - 0.25)
-                for w in range(nWithin):
-                    pos = ini - (nWithin - 1 - w) * 0.5 - 0.5
-                    pos_bar.append(pos)
-            pos_bar = np.array(pos_bar)
-    
-            # flip so first group is left
-            max_grid = pos_grid[0]
-            pos_grid = [max_grid - x for x in pos_grid]
-            pos_cols = [max_grid - x for x in pos_cols]
-            pos_bar  = max_grid - pos_bar
-            return pos_bar, pos_grid, pos_cols, max_grid
-    
-        def _positions_within_only(nWithin):
-            ini = 1 * nWithin / 2 + 0.5
-            pos_bar = []
-            for w in range(nWithin):
-                pos_bar.append(ini - (nWithin - 1 - w) * 0.5 - 0.5)
-            return np.array(pos_bar), ini
-    
         cm = 1 / 2.54
     
         # ---------- SINGLE AXIS ----------
         if not multi:
             fig, ax = plt.subplots(1, figsize=(width * cm, height * cm))
-            pos_bar, pos_grid, pos_cols, max_grid = _positions_single_axis(nGroups, nWithin)
+            pos_bar, pos_grid, pos_cols, max_grid = self._positions_single_axis(nGroups, nWithin, "vertical")
     
             # signed stacking
             off_pos = np.zeros(len(pos_bar))
@@ -1779,15 +1483,13 @@ class Plots:
     
             # legend (proxy patches; correct for signed)
             if legend:
-                proxies = [Patch(facecolor=colors[nm], edgecolor="none") for nm in comp_names]
+                proxies = [mpatches.Patch(facecolor=colors[nm], edgecolor="none") for nm in comp_names]
                 if isinstance(pos_legend, dict):
                     ax.legend(proxies, comp_names, **pos_legend)
                 else:
                     ax.legend(proxies, comp_names, loc=pos_legend, ncol=1)
     
-            plt.savefig(self.folder_plots + "/" + fileName + ".pdf", bbox_inches="tight")
-            plt.savefig(self.folder_plots + "/" + fileName + ".png", bbox_inches="tight", dpi=300)
-            plt.show()
+            self.exporter.save(fileName)
             return
     
         # ---------- MULTI: one subplot per group ----------
@@ -1795,7 +1497,7 @@ class Plots:
         if nGroups == 1:
             axes = [axes]
     
-        local_pos_bar, local_max = _positions_within_only(nWithin)
+        local_pos_bar, _, _, local_max = self._positions_within_only(nWithin, "vertical")
     
         for g in range(nGroups):
             ax = axes[g]
@@ -1831,14 +1533,98 @@ class Plots:
                 ax.tick_params(axis="y", labelleft=False)
     
         if legend:
-            proxies = [Patch(facecolor=colors[nm], edgecolor="none") for nm in comp_names]
+            proxies = [mpatches.Patch(facecolor=colors[nm], edgecolor="none") for nm in comp_names]
             if isinstance(pos_legend, dict):
                 fig.legend(proxies, comp_names, **pos_legend)
             else:
                 fig.legend(proxies, comp_names, loc=pos_legend, ncol=1)
     
         fig.tight_layout()
-        plt.savefig(self.folder_plots + "/" + fileName + ".pdf", bbox_inches="tight")
-        plt.savefig(self.folder_plots + "/" + fileName + ".png", bbox_inches="tight", dpi=300)
-        plt.show()
+        self.exporter.save(fileName)
+
+    def renderJobs(self, jobs, workers=None):
+        """ 
+        Renders a list of plots in parallel, one process per core, drawn with the non-interactive Agg backend.
+        On Linux the worker processes are forked, so they share the pre-processed data of this object
+        instead of receiving a copy with every job. Fork is not safe with threads (macOS, or a background
+        thread of the exporter that is still running): the workers are then spawned and every worker 
+        receives a copy of this object once. With workers=1 the plots are rendered one after the other.
+        
+        Parameters:
+        ----------
+        jobs: list of dictionaries with 
+            plot: name of the plot method, e.g. 'plotBarVertical'
+            and the arguments of the method, e.g. {'plot':'plotScatter', 'listModelsid':[...], 'fileName':'elecSupply', ...}
+        workers: int, number of processes (default: number of cores)
+        
+        Returns the list of fileName of the jobs, in the same order
+        """
+        jobs = list(jobs)
+        for job in jobs:
+            if not callable(getattr(self, job.get('plot', ''), None)):
+                raise ValueError(f"Unknown plot method in job: {job.get('plot')}")
+        
+        if workers == 1:
+            fileNames = [_renderJob(job, self) for job in jobs]
+            self.exporter.wait()
+            return fileNames
+        
+        # The figures drawn before are written first, without a thread the workers can be forked
+        self.exporter.wait()
+        global _JOBS_PLOTS
+        method = self.__startMethod()
+        if method == 'fork':
+            _JOBS_PLOTS = self
+            pool = futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+        else:
+            pool = futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_initWorker, initargs=(self,))
+        try:
+            with pool:
+                done = list(pool.map(_renderJob, jobs))
+        finally:
+            _JOBS_PLOTS = None
+        
+        # the stages recorded by the workers are added to the profiler of this process
+        for _, records in done:
+            self.profiler.records.extend(records)
+        return [fileName for fileName, _ in done]
+    
+    def __startMethod(self):
+        """ 
+        Start method of the worker processes of renderJobs: fork on Linux if the exporter has no 
+        thread running in this process, spawn otherwise
+        """
+        if sys.platform.startswith('linux') and not self.exporter.running():
+            return 'fork'
+        return 'spawn'
+
+
+# Plots object used by the worker processes of Plots.renderJobs (inherited with fork, 
+# or received once by every worker with spawn, see _initWorker)
+_JOBS_PLOTS = None
+
+def _initWorker(plots):
+    global _JOBS_PLOTS
+    _JOBS_PLOTS = plots
 
+def _renderJob(job, plots=None):
+    """ 
+    Renders one job of Plots.renderJobs, in a worker process if plots is None.
+    A worker returns the fileName and the stages recorded by its profiler during the job
+    """
+    worker = plots is None
+    if worker:
+        plots = _JOBS_PLOTS
+        plt.switch_backend('Agg')
+        warnings.filterwarnings('ignore', message='.*non-interactive.*')
+        plots.profiler.reset()
+    
+    args = {k: v for k, v in job.items() if k != 'plot'}
+    getattr(plots, job['plot'])(**args)
+    plt.close('all')
+    if worker:
+        # the job of a worker is done when its files are written
+        plots.exporter.wait()
+        return args.get('fileName'), plots.profiler.records
+    return args.get('fileName')
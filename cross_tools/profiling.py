@@ -0,0 +1,192 @@
+"""Time and memory used by the stages of the reading of the data and of the plots"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+
+class Profiler:
+
+    def __init__(self, enabled=True, memory=False):
+        """
+        Records the wall time, the CPU time and the memory of stages of the code, which can be nested:
+
+            with profiler.stage('read_csv'):
+                ...
+            report = profiler.report()
+
+        Attributes:
+            enabled: False to record nothing (the stages then cost nothing)
+            memory: True to also trace the memory allocated by python (tracemalloc): the peak of every
+                    stage is then exact, but the code runs slower. Without it, only the peak RSS of the
+                    process (the largest memory used since it started) is recorded at the end of every stage
+        """
+        self.enabled = enabled
+        self.memory = memory
+        self.records = []
+        self._stack = []
+        self._tracing = False
+        self._origin = time.perf_counter()
+
+    def stage(self, name, **args):
+        """
+        Context manager that records one stage with the given name (and optional arguments shown in the report)
+        """
+        if not self.enabled or threading.current_thread() is not threading.main_thread():
+            return contextlib.nullcontext()
+        return self._record(name, args)
+
+    @contextlib.contextmanager
+    def _record(self, name, args):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        parent = self._stack[-1] if self._stack else None
+        if self.memory:
+            # the peak of the parent until now is kept, the peak of this stage starts from the current memory
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent['traced_peak'] = max(parent['traced_peak'], peak)
+            tracemalloc.reset_peak()
+
+        record = {
+            'name': name,
+            'path': '/'.join([s['record']['name'] for s in self._stack] + [name]),
+            'depth': len(self._stack),
+            'pid': os.getpid(),
+            'start': time.perf_counter() - self._origin,
+            'wall': None,
+            'cpu': None,
+            'rss_peak_mb': None,
+            'traced_peak_mb': None,
+            'args': args,
+        }
+        frame = {'record': record, 'cpu': time.process_time(), 'traced_peak': 0}
+        self._stack.append(frame)
+        self.records.append(record)
+        try:
+            yield record
+        finally:
+            self._stack.pop()
+            record['wall'] = time.perf_counter() - self._origin - record['start']
+            record['cpu'] = time.process_time() - frame['cpu']
+            if resource is not None:
+                # ru_maxrss is in kB on Linux, in bytes on macOS
+                rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                record['rss_peak_mb'] = rss / (1e6 if sys.platform == 'darwin' else 1e3)
+            if self.memory:
+                peak = max(frame['traced_peak'], tracemalloc.get_traced_memory()[1])
+                record['traced_peak_mb'] = peak / 1e6
+                if parent is not None:
+                    parent['traced_peak'] = max(parent['traced_peak'], peak)
+                if not self._stack and self._tracing:
+                    tracemalloc.stop()
+                    self._tracing = False
+
+    def report(self):
+        """
+        Report with all the stages recorded until now
+        """
+        return ProfileReport([dict(r) for r in self.records if r['wall'] is not None])
+
+    def reset(self):
+        """
+        Forgets the stages recorded until now
+        """
+        self.records = [r for r in self.records if r['wall'] is None]
+
+
+class ProfileReport:
+
+    def __init__(self, stages):
+        """
+        Stages recorded by a Profiler, in the order in which they started.
+
+        Attributes:
+            stages: list of dictionaries with
+                name: name of the stage, path: names of the stages that contain it and of the stage ('a/b/c'),
+                depth: number of stages that contain it, pid: process,
+                start: start in seconds since the profiler was created, wall: wall time (s), cpu: CPU time (s),
+                rss_peak_mb: peak RSS of the process at the end of the stage (MB),
+                traced_peak_mb: peak of the memory allocated by python during the stage (MB, with memory=True),
+                args: arguments of the stage
+        """
+        self.stages = stages
+
+    def toFrame(self):
+        """
+        The stages as a DataFrame, one row per stage, with the time spent in the stage itself
+        (self_wall: wall time without the stages that it contains)
+        """
+        import pandas as pd
+        frame = pd.DataFrame(self.stages, columns=['name', 'path', 'depth', 'pid', 'start', 'wall', 'cpu',
+                                                   'rss_peak_mb', 'traced_peak_mb', 'args'])
+        frame['self_wall'] = frame['wall'] - [self._childrenWall(i) for i in range(len(self.stages))]
+        return frame
+
+    def _childrenWall(self, i):
+        stage = self.stages[i]
+        return sum(s['wall'] for s in self.stages
+                   if s['pid'] == stage['pid'] and s['depth'] == stage['depth'] + 1
+                   and s['path'].startswith(stage['path'] + '/')
+                   and stage['start'] <= s['start'] <= stage['start'] + stage['wall'])
+
+    def summary(self):
+        """
+        Text with the total wall time, CPU time and number of calls by stage path, and the largest peaks
+        """
+        frame = self.toFrame()
+        if frame.empty:
+            return 'No stages recorded'
+        table = frame.groupby('path', sort=False).agg(
+            calls=('wall', 'size'), wall=('wall', 'sum'), self_wall=('self_wall', 'sum'), cpu=('cpu', 'sum'),
+            rss_peak_mb=('rss_peak_mb', 'max'), traced_peak_mb=('traced_peak_mb', 'max'))
+        return table.dropna(axis=1, how='all').round(3).to_string()
+
+    def toDict(self):
+        return {'stages': self.stages}
+
+    def toJSON(self, fileName):
+        """
+        Writes the report as JSON: {"stages": [...]}
+        """
+        with open(fileName, 'w') as f:
+            json.dump(self.toDict(), f, indent=1, default=str)
+
+    def toChromeTrace(self, fileName):
+        """
+        Writes the report in the Chrome trace format, to open in chrome://tracing or https://ui.perfetto.dev
+        """
+        events = []
+        for s in self.stages:
+            args = {k: s[k] for k in ['cpu', 'rss_peak_mb', 'traced_peak_mb'] if s[k] is not None}
+            args.update({k: str(v) for k, v in s['args'].items()})
+            events.append({'name': s['name'], 'cat': s['path'].split('/')[0], 'ph': 'X', 'pid': s['pid'], 'tid': s['pid'],
+                           'ts': s['start'] * 1e6, 'dur': s['wall'] * 1e6, 'args': args})
+        with open(fileName, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def profiled(method):
+    """
+    Decorator of the methods of Results and Plots: every call is a stage of self.profiler, named as the method
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.profiler.stage(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,79 @@
+"""Cache of the blocks of values read by the plots, so that the figures that read the same slice of the data share it"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+from collections import OrderedDict
+
+
+class QueryCache:
+
+    def __init__(self, maxBytes=256 * 2**20):
+        """
+        Least recently used cache of ndarray blocks, bounded by the memory of the blocks: when a new block
+        doesn't fit, the blocks used the longest time ago are removed. The blocks are stored read-only.
+
+        Attributes:
+            maxBytes: largest memory of all the blocks (bytes), 0 to store nothing
+            hits, misses: number of the lookups that found / didn't find their block
+            evictions: number of blocks removed to make room for new ones
+            invalidations: number of times that all the blocks were removed because the data changed
+        """
+        self.maxBytes = maxBytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._blocks = OrderedDict()
+
+    def get(self, key):
+        """
+        Block of the key, None if it is not in the cache
+        """
+        block = self._blocks.get(key)
+        if block is None:
+            self.misses += 1
+            return None
+        self._blocks.move_to_end(key)
+        self.hits += 1
+        return block
+
+    def put(self, key, block):
+        """
+        Stores the block of the key (if it is not larger than the whole cache), returns the block
+        """
+        if block.nbytes > self.maxBytes:
+            return block
+        if key in self._blocks:
+            self.nbytes -= self._blocks.pop(key).nbytes
+        while self._blocks and self.nbytes + block.nbytes > self.maxBytes:
+            _, old = self._blocks.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+        block.setflags(write=False)
+        self._blocks[key] = block
+        self.nbytes += block.nbytes
+        return block
+
+    def clear(self):
+        """
+        Removes all the blocks, e.g. when the data changes. The counters are kept
+        """
+        if self._blocks:
+            self.invalidations += 1
+        self._blocks.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def stats(self):
+        """
+        Dictionary with the counters, the number of blocks and their memory
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else None,
+                'blocks': len(self._blocks), 'nbytes': self.nbytes, 'maxBytes': self.maxBytes,
+                'evictions': self.evictions, 'invalidations': self.invalidations}
@@ -0,0 +1,61 @@
+"""Tests of the dense array of the results (cross_tools/cube.py)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import numpy as np
+import pandas as pd
+
+from cross_tools.cube import ResultCube
+
+
+LEVELS = ['scenario_name', 'scenario_variant', 'model', 'variable', 'use_technology_fuel', 'timestamp']
+
+
+def _annual(keys, values):
+    index = pd.MultiIndex.from_tuples(keys, names=LEVELS)
+    return pd.Series(values, index=index, name='value')
+
+
+def _hourly():
+    return pd.Series([], dtype=float, name='value',
+                     index=pd.MultiIndex.from_tuples([], names=LEVELS[:-1] + ['time_resolution', 'timestamp']))
+
+
+def test_rows_with_a_missing_label_are_left_out():
+    annual = _annual([('a', 'ref', 'm', 'v', 't', 2050), ('a', np.nan, 'm', 'v', 't', 2050), ('b', 'ref', 'm', 'v', 't', 2050)],
+                     [1.0, 7.0, 2.0])
+    cube = ResultCube(annual, _hourly())
+
+    values = cube.lookup('annual', scenario_name=['a', 'b'], scenario_variant='ref', model='m', variable='v',
+                         use_technology_fuel='t', timestamp=2050)
+    np.testing.assert_array_equal(values, [1.0, 2.0])
+    # A variant that is not in the data reads NaN, not the value of the row without variant
+    missing = cube.lookup('annual', scenario_name='a', scenario_variant='other', model='m', variable='v',
+                          use_technology_fuel='t', timestamp=2050)
+    assert np.isnan(missing)
+
+
+def test_duplicated_keys_are_added():
+    annual = _annual([('a', 'ref', 'm', 'v', 't', 2050), ('a', 'ref', 'm', 'v', 't', 2050)], [1.0, 2.0])
+    cube = ResultCube(annual, _hourly())
+
+    assert cube.lookup('annual', scenario_name='a', scenario_variant='ref', model='m', variable='v',
+                       use_technology_fuel='t', timestamp=2050) == 3.0
+
+
+def test_blocks_are_built_per_variable_at_the_first_lookup():
+    annual = _annual([('a', 'ref', 'm', 'v', 't', 2050), ('a', 'ref', 'm', 'w', 'u', 2040), ('b', 'ref', 'n', 'w', 'u', 2040)],
+                     [1.0, 2.0, 3.0])
+    cube = ResultCube(annual, _hourly())
+    assert cube.blocks == {}
+
+    values = cube.lookup('annual', scenario_name='a', scenario_variant='ref', model='m', variable=['v', 'w', 'x'],
+                         use_technology_fuel=['t', 'u', 't'], timestamp=[2050, 2040, 2050])
+    np.testing.assert_array_equal(values, [1.0, 2.0, np.nan])
+    # Every block has only the labels of its variable
+    labels, block = cube.blocks[('annual', 'v')]
+    assert block.shape == (2, 2, 2, 2, 2)
+    assert list(labels['timestamp']) == [2050]
+    assert cube.blocks[('annual', 'x')] is None
@@ -0,0 +1,359 @@
+"""Tests of the reading and the pre-processing of the results (cross_tools/data.py)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import os
+import sys
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cross_tools.data
+from cross_tools.data import Results
+from cross_tools.derived import DERIVED_VARIABLES
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from synthetic import TEMPLATE, _typicalDays, generate
+
+
+def _template():
+    return pd.read_csv(TEMPLATE + '.csv', dtype=str)
+
+
+def _results(data, folder, **kwargs):
+    """
+    Results of the rows of data, written as a csv file in folder
+    """
+    fileResults = os.path.join(folder, 'results')
+    data.to_csv(fileResults + '.csv', index=False)
+    models = sorted(data['model'].dropna().unique())
+    model_list = [dict(_typicalDays(data, m), id=m, name=m, color='k') for m in models]
+    kwargs.setdefault('cache', False)
+    return Results(fileResults, model_list, sorted(data['scenario_name'].unique()), **kwargs)
+
+
+def test_rows_with_a_missing_key_are_read(tmp_path):
+    data = _template()
+    # A typical-day timestamp that can't be parsed and annual rows without variant
+    badTimestamp = data[data['time_resolution'] == 'typical-day'].head(4).assign(timestamp='not a date')
+    noVariant = data[(data['time_resolution'] == 'annual') & (data['variable'] == 'electricity_supply')].head(4)
+    noVariant = noVariant.assign(scenario_variant='')
+
+    results = _results(pd.concat([data, badTimestamp, noVariant]), tmp_path)
+    reference = _results(data, tmp_path)
+
+    # The rows of the other keys, and the values derived from them, are the ones read without these rows
+    pd.testing.assert_series_equal(results.annualData['value'].reindex(reference.annualData.index),
+                                   reference.annualData['value'])
+
+
+def _memoryOfReading(fileResults, monkeypatch):
+    """
+    Memory of the parsed frame, memory held when the csv file is parsed and peak of the reading (bytes, 
+    tracemalloc). The file is read once before, so that what pandas allocates only once per process 
+    (at the first call of some functions) is not counted
+    """
+    data = pd.read_csv(fileResults + '.csv', dtype=str)
+    models = sorted(data['model'].unique())
+    model_list = [dict(_typicalDays(data, m), id=m, name=m, color='k') for m in models]
+    scenarios = sorted(data['scenario_name'].unique())
+    del data
+
+    readData = Results._Results__readData
+    measured = {}
+
+    def read(self, fileResults):
+        data = readData(self, fileResults)
+        if tracemalloc.is_tracing():
+            measured['parsed'] = data.memory_usage(deep=True).sum()
+            measured['held'] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        return data
+
+    monkeypatch.setattr(Results, '_Results__readData', read)
+    Results(fileResults, model_list, scenarios, cache=False)
+    tracemalloc.start()
+    try:
+        Results(fileResults, model_list, scenarios, cache=False)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return measured['parsed'], measured['held'], peak
+
+
+@pytest.mark.parametrize('fileResults', ['nuclear', 'synthetic'])
+def test_peak_memory_of_the_reading(fileResults, tmp_path, monkeypatch):
+    # Budget of Results.__processData
+    if fileResults == 'nuclear':
+        fileResults = os.path.join(os.path.dirname(TEMPLATE), 'nuclear_results_20251217')
+    else:
+        fileResults = str(tmp_path / 'synthetic')
+        generate(fileResults, scale=4)
+    parsed, held, peak = _memoryOfReading(fileResults, monkeypatch)
+
+    # After the csv file is parsed, at most as much memory again as the parsed data
+    assert peak - held <= parsed
+    # The whole reading, with what the reading keeps besides the frame
+    assert peak <= 3.5 * parsed
+
+
+def test_allData_is_kept_until_the_stores_change(tmp_path):
+    results = _results(_template(), tmp_path)
+    allData = results.allData
+    assert results.allData is allData
+
+    results.annualData = results.annualData
+    assert results.allData is not allData
+    pd.testing.assert_frame_equal(results.allData, allData)
+
+
+def test_setting_allData_replaces_the_stores(tmp_path):
+    results = _results(_template(), tmp_path)
+    allData = results.allData.copy()
+    key = allData.index[allData.index.get_level_values('time_resolution') == 'annual'][0]
+    allData.loc[key, 'value'] = 123.0
+
+    results.allData = allData
+    annualKey = tuple(k for k, name in zip(key, allData.index.names) if name != 'time_resolution')
+    assert results.annualData.loc[annualKey, 'value'] == 123.0
+    assert results.cube.lookup('annual', **dict(zip(results.annualData.index.names, annualKey))) == 123.0
+    pd.testing.assert_frame_equal(results.allData, allData)
+
+
+def test_update_gives_the_data_of_the_updated_file(tmp_path):
+    data = _template()
+    first = data.iloc[0]
+    ofKey = ((data['model'] == first['model']) & (data['scenario_name'] == first['scenario_name'])
+             & (data['scenario_variant'] == first['scenario_variant']))
+    # New values, a technology that is not in the data yet and an annual row of a new scenario
+    upload = data[ofKey].assign(value=lambda d: (d['value'].astype(float) * 2).astype(str))
+    upload.loc[upload.index[0], 'use_technology_fuel'] = 'new_technology'
+    other = upload[upload['time_resolution'] == 'annual'].head(3).assign(scenario_name='new-scenario')
+    upload = pd.concat([upload, other])
+
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    results = _results(data, tmp_path / 'a')
+    # Blocks of the cube that are patched by update
+    variables = list(results.annualData.index.get_level_values('variable').unique())
+    for v in variables:
+        results.cube.block('annual', v)
+    results.update(upload)
+    reference = _results(pd.concat([data[~ofKey], upload]), tmp_path / 'b')
+
+    pd.testing.assert_frame_equal(results.annualData, reference.annualData)
+    pd.testing.assert_frame_equal(results.hourlyData, reference.hourlyData)
+    keys = reference.annualData.index.to_frame(index=False)
+    np.testing.assert_array_equal(results.cube.lookup('annual', **{c: keys[c].to_numpy() for c in keys.columns}),
+                                  reference.annualData['value'].to_numpy())
+    assert {m: set(c) for m, c in results.sceModel.items()} == {m: set(c) for m, c in reference.sceModel.items()}
+    assert {m: set(y) for m, y in results.yearsModel.items()} == {m: set(y) for m, y in reference.yearsModel.items()}
+
+
+def _duplicated():
+    """
+    Template with an annual value uploaded three times: the original, again later in GWh (2 TWh)
+    and once before (4 TWh). Returns the data and the row of the original
+    """
+    data = _template()
+    original = data[(data['time_resolution'] == 'annual') & (data['variable'] == 'electricity_supply')].iloc[0]
+    again = original.copy()
+    again[['unit', 'value', 'uploaded_at']] = ['GWh', '2000', '2025-12-01 00:00:00+00:00']
+    before = original.copy()
+    before[['value', 'uploaded_at']] = ['4', '2025-01-01 00:00:00+00:00']
+    return pd.concat([data, pd.DataFrame([again, before])], ignore_index=True), original
+
+
+def _valueOf(results, row):
+    return results.annualData.loc[(row['scenario_name'], row['scenario_variant'], row['model'], row['variable'],
+                                   row['use_technology_fuel'], int(row['timestamp'])), 'value']
+
+
+@pytest.mark.parametrize('policy', ['latest', 'sum', 'mean'])
+def test_duplicated_rows_are_resolved_by_the_policy(policy, tmp_path):
+    data, original = _duplicated()
+    results = _results(data, tmp_path, duplicates=policy)
+    value = float(original['value'])
+    expected = {'latest': 2, 'sum': value + 6, 'mean': (value + 6) / 3}[policy]
+    assert _valueOf(results, original) == pytest.approx(expected)
+
+    # The report has the three rows of the key, in TWh, and the one that was kept
+    report = results.duplicateReport
+    assert len(report) == 3
+    assert (report['rows'] == 3).all()
+    assert report[['model', 'variable', 'use_technology_fuel']].astype(object).drop_duplicates().values.tolist() == \
+        [[original['model'], original['variable'], original['use_technology_fuel']]]
+    assert report['timestamp'].tolist() == [int(original['timestamp'])] * 3
+    assert report['kept'].sum() == 1
+    if policy == 'latest':
+        assert report['value'].tolist() == pytest.approx([value, 2, 4])
+        assert report.loc[report['kept'], 'uploaded_at'].tolist() == ['2025-12-01 00:00:00+00:00']
+    else:
+        # The row kept is the first one of the key, with the sum or the mean as value
+        assert report['kept'].tolist() == [True, False, False]
+        assert report['value'].tolist() == pytest.approx([expected, 2, 4])
+
+
+def test_duplicated_rows_raise_with_the_error_policy(tmp_path):
+    data, original = _duplicated()
+    with pytest.raises(ValueError, match='3 rows have the same keys'):
+        _results(data, tmp_path, duplicates='error')
+
+
+def test_data_without_duplicates_has_an_empty_report(tmp_path):
+    results = _results(_template(), tmp_path, duplicates='error')
+    assert results.duplicateReport.empty
+
+
+def test_duplicate_report_is_read_from_the_cache(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    data, original = _duplicated()
+    written = _results(data, tmp_path, cache=True)
+    monkeypatch.setattr(Results, '_Results__processData', lambda self, fileResults: pytest.fail('the csv file was read'))
+    read = _results(data, tmp_path, cache=True)
+
+    assert os.path.exists(os.path.join(tmp_path, 'results.duplicates.cache.parquet'))
+    pd.testing.assert_frame_equal(read.duplicateReport, written.duplicateReport, check_categorical=False)
+    assert _valueOf(read, original) == _valueOf(written, original)
+
+
+def _csvReads(monkeypatch):
+    """
+    List that gets an item every time the csv file is read and pre-processed instead of the cache
+    """
+    reads = []
+    processData = Results._Results__processData
+
+    def process(self, fileResults):
+        reads.append(fileResults)
+        processData(self, fileResults)
+
+    monkeypatch.setattr(Results, '_Results__processData', process)
+    return reads
+
+
+@pytest.mark.parametrize('change', [None, 'content', 'select', 'derivedVariables', 'duplicates', 'CACHE_VERSION'])
+def test_cache_is_used_only_with_the_same_inputs(change, tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    data = _template()
+    reads = _csvReads(monkeypatch)
+    _results(data, tmp_path, cache=True)
+    assert len(reads) == 1
+
+    kwargs = {'cache': True}
+    if change == 'content':
+        data.loc[0, 'value'] = '1'
+    elif change == 'select':
+        kwargs['select'] = {'model': [data.loc[0, 'model']]}
+    elif change == 'derivedVariables':
+        kwargs['derivedVariables'] = DERIVED_VARIABLES[:1]
+    elif change == 'duplicates':
+        kwargs['duplicates'] = 'sum'
+    elif change == 'CACHE_VERSION':
+        monkeypatch.setattr(cross_tools.data, 'CACHE_VERSION', cross_tools.data.CACHE_VERSION + 1)
+    results = _results(data, tmp_path, **kwargs)
+
+    assert len(reads) == (1 if change is None else 2)
+    kwargs['cache'] = False
+    pd.testing.assert_frame_equal(results.annualData, _results(data, tmp_path, **kwargs).annualData)
+
+
+@pytest.mark.parametrize('fileName', ['results.cache.parquet', 'results.duplicates.cache.parquet'])
+def test_a_corrupt_cache_file_is_replaced_by_the_csv_file(fileName, tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    data = _template()
+    reference = _results(data, tmp_path, cache=True)
+    with open(os.path.join(tmp_path, fileName), 'r+b') as f:
+        f.truncate(os.path.getsize(f.name) // 2)
+
+    reads = _csvReads(monkeypatch)
+    results = _results(data, tmp_path, cache=True)
+    assert len(reads) == 1
+    pd.testing.assert_frame_equal(results.annualData, reference.annualData)
+    # The cache is written again and used by the next run
+    _results(data, tmp_path, cache=True)
+    assert len(reads) == 1
+
+
+def _oldUnitFactor(timeResolution, unit):
+    # Factors of Plots.__correctUnit before the table UNIT_FACTORS
+    annual_factors = {'twh':1,'gwh':1/1000, 'mwh':1/1e6,'gj':1/3.6,'mtco2':1,'gtco2':1000,'gw':1,'mw':1/1000,'bchf':1,'mchf':1/1000,'chf/tco2':1}
+    hourly_factors = {'gw':1,'gwh/h':1, 'mw':1/1000,'mwh/h':1/1000}
+    if timeResolution == 'annual':
+        return annual_factors.get(unit.lower(), 0)
+    elif timeResolution == 'typical-day':
+        return hourly_factors.get(unit.lower(), 0)
+
+
+def test_values_are_converted_as_before(tmp_path):
+    data = _template()
+    # Every unit of the old tables, in both cases, in the two time resolutions
+    units = ['TWh', 'GWh', 'MWh', 'GJ', 'MtCO2', 'GtCO2', 'GW', 'MW', 'BCHF', 'MCHF', 'CHF/tCO2', 'GWh/h', 'MWh/h']
+    units = units + [u.lower() for u in units]
+    data['unit'] = [units[i % len(units)] for i in range(len(data))]
+    data['value'] = (np.arange(len(data)) % 97 + 0.5).astype(str)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = _results(data, tmp_path, derivedVariables=[])
+
+    expected = data.assign(value=[float(v) * _oldUnitFactor(r, u)
+                                  for v, r, u in zip(data['value'], data['time_resolution'], data['unit'])])
+    annual = expected[expected['time_resolution'] == 'annual']
+    annual = annual.set_index(['scenario_name', 'scenario_variant', 'model', 'variable', 'use_technology_fuel',
+                               annual['timestamp'].astype(int).rename('timestamp')])['value']
+    values = results.annualData['value'].reindex(annual.index).to_numpy()
+    assert len(annual) > 1000
+    np.testing.assert_array_equal(values, annual.to_numpy())
+
+    hourly = expected[expected['time_resolution'] == 'typical-day']
+    timestamp = pd.to_datetime(hourly['timestamp'], format='%d.%m.%Y %H:%M').rename('timestamp')
+    hourly = hourly.set_index(['scenario_name', 'scenario_variant', 'model', 'variable', 'use_technology_fuel',
+                               'time_resolution', timestamp])['value']
+    values = results.hourlyData['value'].reindex(hourly.index).to_numpy()
+    assert len(hourly) > 1000
+    np.testing.assert_array_equal(values, hourly.to_numpy())
+
+
+def test_unknown_units_are_reported_in_one_warning(tmp_path):
+    data = _template()
+    data.loc[data.index[:10], 'unit'] = 'PJ'
+    data.loc[data.index[data['time_resolution'] == 'typical-day'][:5], 'unit'] = 'kWh/h'
+    with pytest.warns(UserWarning) as record:
+        results = _results(data, tmp_path)
+
+    unitWarnings = [str(w.message) for w in record if 'Unknown units' in str(w.message)]
+    assert len(unitWarnings) == 1
+    assert 'pj (annual, 10 rows)' in unitWarnings[0]
+    assert 'kwh/h (typical-day, 5 rows)' in unitWarnings[0]
+    # The values in unknown units are set to 0, as before
+    row = data.iloc[0]
+    assert results.annualData.loc[(row['scenario_name'], row['scenario_variant'], row['model'], row['variable'],
+                                   row['use_technology_fuel'], int(row['timestamp'])), 'value'] == 0
+
+
+def test_select_reads_the_rows_of_a_filter_after_the_reading(tmp_path, monkeypatch):
+    data = _template()
+    models = sorted(data['model'].unique())[:1]
+    scenarios = sorted(data['scenario_name'].unique())[:3]
+    select = {'model': models, 'scenario_name': scenarios, 'time_resolution': ['annual', 'typical-day']}
+    # Several chunks, with the selected rows in some of them only
+    monkeypatch.setattr(cross_tools.data, 'READ_CHUNKSIZE', 2000)
+
+    (tmp_path / 'select').mkdir()
+    (tmp_path / 'filter').mkdir()
+    results = _results(data, tmp_path / 'select', select=select)
+    keep = np.ones(len(data), dtype=bool)
+    for column, values in select.items():
+        keep &= data[column].isin(values).to_numpy()
+    reference = _results(data[keep], tmp_path / 'filter')
+
+    assert len(results.annualData) > 0 and len(results.hourlyData) > 0
+    pd.testing.assert_frame_equal(results.annualData, reference.annualData)
+    pd.testing.assert_frame_equal(results.hourlyData, reference.hourlyData)
+    assert {m: results.sceModel[m] for m in models} == {m: reference.sceModel[m] for m in models}
+    assert {m: results.yearsModel[m] for m in models} == {m: reference.yearsModel[m] for m in models}
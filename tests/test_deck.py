@@ -0,0 +1,75 @@
+"""Tests of the build of a deck of plots from a manifest (cross_tools/deck.py)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import json
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+
+from cross_tools import deck
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from synthetic import TEMPLATE, _typicalDays
+
+
+def _manifest(folder):
+    """
+    Manifest of one figure of the template, written in folder with the csv file.
+    Returns the name of the manifest file and the manifest
+    """
+    data = pd.read_csv(TEMPLATE + '.csv', dtype=str)
+    data.to_csv(os.path.join(folder, 'results.csv'), index=False)
+    scenarios = sorted(data['scenario_name'].unique())
+    manifest = {
+        'data': {'fileResults': 'results', 'scenarios': scenarios, 'sceColors': ['#9FBA3D'] * len(scenarios),
+                 'cache': False},
+        'folder_plots': 'figures',
+        'export': {'formats': ['png'], 'dpi': 20},
+        'models': [dict(_typicalDays(data, m), id=m, name=m, color='k') for m in sorted(data['model'].unique())],
+        'defaults': {'year': 2050, 'scale': 1},
+        'figures': [{'plot': 'plotBarVertical', 'fileName': 'elecSupply', 'varName': 'electricity_supply',
+                     'listSce': [[s, 'reference', s] for s in scenarios[:2]],
+                     'varList': [{'name': 'Hydro', 'data': ['hydro_dam', 'hydro_ror'], 'color': '#0377CA'},
+                                 {'name': 'Nuclear', 'data': ['nuclear'], 'color': '#FF007F'}],
+                     'label': 'Electricity (TWh)', 'figmax': 100, 'invert': False, 'legend': False,
+                     'pos_legend': 'upper right', 'width': 4, 'height': 3}],
+    }
+    return _write(folder, manifest), manifest
+
+
+def _write(folder, manifest):
+    fileManifest = os.path.join(folder, 'deck.json')
+    with open(fileManifest, 'w') as f:
+        json.dump(manifest, f)
+    return fileManifest
+
+
+def test_unchanged_figures_are_not_rendered_again(tmp_path):
+    fileManifest, _ = _manifest(tmp_path)
+    assert deck.build(fileManifest, workers=1) == ['elecSupply']
+    assert os.path.exists(os.path.join(tmp_path, 'figures', 'elecSupply.png'))
+    assert deck.build(fileManifest, workers=1) == []
+
+
+def test_changing_the_scenarios_renders_again(tmp_path):
+    fileManifest, manifest = _manifest(tmp_path)
+    deck.build(fileManifest, workers=1)
+
+    # Same figure, but the colors of the scenarios are assigned in another order
+    manifest['data']['scenarios'] = manifest['data']['scenarios'][::-1]
+    _write(tmp_path, manifest)
+    assert deck.build(fileManifest, workers=1) == ['elecSupply']
+
+
+def test_changing_the_code_renders_again(tmp_path, monkeypatch):
+    fileManifest, _ = _manifest(tmp_path)
+    deck.build(fileManifest, workers=1)
+
+    monkeypatch.setattr(deck, '_codeHash', lambda: 'changed')
+    assert deck.build(fileManifest, workers=1) == ['elecSupply']
@@ -0,0 +1,119 @@
+"""Tests of the derived variables (cross_tools/derived.py)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cross_tools.data import Results
+from cross_tools.derived import COLUMNS, DERIVED_VARIABLES, NETS, SUBCATEGORIES, SUPPLY_NET, _variable, deriveVariables
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from synthetic import TEMPLATE, _typicalDays
+
+
+def _imports_exports(keys):
+    """
+    Rows of 5 TWh of imports and 2 TWh of exports for every (scenario, variant, timestamp) of keys
+    """
+    rows = []
+    for sce, variant, timestamp in keys:
+        rows.append(dict(scenario_name=sce, scenario_variant=variant, model='m', variable='electricity_supply',
+                         use_technology_fuel='imports', time_resolution='annual', timestamp=timestamp, value=5.0))
+        rows.append(dict(scenario_name=sce, scenario_variant=variant, model='m', variable='electricity_consumption',
+                         use_technology_fuel='exports', time_resolution='annual', timestamp=timestamp, value=2.0))
+    data = pd.DataFrame(rows)
+    for c in ['scenario_name', 'scenario_variant', 'model', 'variable', 'use_technology_fuel', 'time_resolution']:
+        data[c] = data[c].astype('category')
+    return data
+
+
+def test_rows_with_missing_keys_are_left_out():
+    # A variant that is empty and a timestamp that couldn't be parsed: the rows have no group
+    data = _imports_exports([('a', 'ref', 2050), ('a', np.nan, 2050), ('b', 'ref', 2050), ('c', 'ref', pd.NaT)])
+    derived = deriveVariables(data, DERIVED_VARIABLES)
+
+    net = derived[derived['use_technology_fuel'] == 'net_imports'].set_index('scenario_name')['value']
+    assert net.to_dict() == {'a': 3.0, 'b': 3.0}
+    assert derived['scenario_variant'].notna().all()
+    assert derived['timestamp'].notna().all()
+
+
+def test_keys_follow_the_groups():
+    # The rows with missing keys come first, the other keys must still get their own values
+    data = _imports_exports([('a', np.nan, 2050), ('b', 'ref', 2050), ('c', 'ref', 2050)])
+    data.loc[data['scenario_name'] == 'c', 'value'] *= 2
+    derived = deriveVariables(data, DERIVED_VARIABLES)
+
+    net = derived[derived['use_technology_fuel'] == 'net_imports'].set_index('scenario_name')['value']
+    assert net.to_dict() == {'b': 3.0, 'c': 6.0}
+
+
+def _oldDerived(data):
+    """
+    Rows of the nets, the categories and the total supply as they were calculated before the rules,
+    one groupby and merge per variable (__calculateNets, __checkSubcategories and __calculateTotalSupply
+    of plots.py, in the same order)
+    """
+    # The old columns were text, not categories
+    data = data.astype({c: object for c in COLUMNS if c not in ['timestamp', 'value']})
+    keys = ['scenario_name', 'scenario_variant', 'model', 'time_resolution', 'timestamp']
+    nets = []
+    for v in NETS:
+        for resolution in v['time_resolution']:
+            varSupply, varDemand = _variable(v['varSupply'], resolution), _variable(v['varDemand'], resolution)
+            d = data[data['time_resolution'] == resolution]
+            supply = (d[(d['variable'] == varSupply) & d['use_technology_fuel'].isin(v['tech'])]
+                      .groupby(keys, as_index=False)['value'].sum().rename(columns={'value': 'supply_sum'}))
+            demand = (d[(d['variable'] == varDemand) & d['use_technology_fuel'].isin(v['use'])]
+                      .groupby(keys, as_index=False)['value'].sum().rename(columns={'value': 'demand_sum'}))
+            net = supply.merge(demand, on=keys, how='outer').fillna({'supply_sum': 0.0, 'demand_sum': 0.0})
+            net['net'] = net['supply_sum'] - net['demand_sum']
+            nets.append(net[keys].assign(variable=varSupply, use_technology_fuel=v['netPositive'],
+                                         value=net['net'].clip(lower=0.0)))
+            nets.append(net[keys].assign(variable=varDemand, use_technology_fuel=v['netNegative'],
+                                         value=(-net['net']).clip(lower=0.0)))
+    data = pd.concat([data] + nets, ignore_index=True)
+
+    categories = []
+    baseKeys = keys[:3] + ['variable'] + keys[3:]
+    for v in SUBCATEGORIES:
+        for resolution in v['time_resolution']:
+            var = _variable(v['varName'], resolution)
+            for item in v['data']:
+                d = data[(data['time_resolution'] == resolution) & (data['variable'] == var)]
+                subSum = d[d['use_technology_fuel'].isin(item['subcats'])].groupby(baseKeys, as_index=False)['value'].sum()
+                existing = d.loc[d['use_technology_fuel'] == item['cat'], baseKeys].drop_duplicates()
+                subSum = subSum.merge(existing, on=baseKeys, how='left', indicator=True)
+                subSum = subSum[subSum['_merge'] == 'left_only'].drop(columns='_merge')
+                categories.append(subSum.assign(use_technology_fuel=item['cat']))
+    data = pd.concat([data] + categories, ignore_index=True)
+
+    d = data[(data['time_resolution'] == 'annual') & (data['variable'] == 'electricity_supply')
+             & data['use_technology_fuel'].isin(SUPPLY_NET)]
+    total = d.groupby(keys, as_index=False)['value'].sum(min_count=1)
+    total = total.assign(variable='electricity_supply', use_technology_fuel='total')
+    return pd.concat(nets + categories + [total], ignore_index=True)[COLUMNS]
+
+
+def _byKey(rows):
+    rows = rows.astype({c: object for c in COLUMNS if c != 'value'}).assign(timestamp=lambda d: d['timestamp'].astype(str))
+    return rows.set_index(COLUMNS[:-1])['value'].sort_index()
+
+
+def test_rules_give_the_values_of_the_old_calculation():
+    data = pd.read_csv(TEMPLATE + '.csv', dtype=str)
+    model_list = [dict(_typicalDays(data, m), id=m, name=m, color='k') for m in sorted(data['model'].unique())]
+    reported = Results(TEMPLATE, model_list, sorted(data['scenario_name'].unique()), cache=False, derivedVariables=[])
+    reported = reported.allData.reset_index()[COLUMNS]
+
+    new, old = _byKey(deriveVariables(reported, DERIVED_VARIABLES)), _byKey(_oldDerived(reported))
+    assert len(new) > 1000
+    assert new.index.equals(old.index)
+    # The sums are added in another order
+    np.testing.assert_allclose(new.to_numpy(), old.to_numpy(), rtol=1e-12, atol=1e-12)
@@ -0,0 +1,55 @@
+"""Tests of the writing of the figures (cross_tools/export.py)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from cross_tools.deck import _filesExist
+from cross_tools.export import FigureExporter
+
+
+def _figure():
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1])
+    return fig
+
+
+def test_every_format_is_written(tmp_path):
+    exporter = FigureExporter(str(tmp_path), formats=['pdf', 'png'])
+    exporter.save('elecUse', _figure())
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['elecUse.pdf', 'elecUse.png']
+    assert _filesExist(exporter, ['elecUse'])
+
+
+def test_extension_of_the_file_name_is_replaced(tmp_path):
+    # As in cross_comparison.py, where plotTechDist gets e.g. 'elecDist_tech.pdf', included by the LaTeX slides
+    exporter = FigureExporter(str(tmp_path), formats=['pdf', 'png'])
+    exporter.save('elecDist_tech.pdf', _figure())
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['elecDist_tech.pdf', 'elecDist_tech.png']
+    assert _filesExist(exporter, ['elecDist_tech.pdf'])
+
+
+def test_other_dots_are_kept(tmp_path):
+    exporter = FigureExporter(str(tmp_path), formats=['png'])
+    exporter.save('share_0.5', _figure())
+
+    assert [p.name for p in tmp_path.iterdir()] == ['share_0.5.png']
+
+
+def test_background_writes_the_same_files(tmp_path):
+    (tmp_path / 'sync').mkdir()
+    (tmp_path / 'background').mkdir()
+    FigureExporter(str(tmp_path / 'sync'), formats=['png'], dpi=50).save('line', _figure())
+    exporter = FigureExporter(str(tmp_path / 'background'), formats=['png'], dpi=50, background=True)
+    exporter.save('line', _figure())
+    assert exporter.running()
+    exporter.wait()
+
+    assert not exporter.running()
+    assert (tmp_path / 'background' / 'line.png').read_bytes() == (tmp_path / 'sync' / 'line.png').read_bytes()
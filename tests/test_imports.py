@@ -0,0 +1,42 @@
+"""Tests of what the modules of cross_tools import (cross_tools/lazy.py)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Libraries that are imported only when they are used: plots, parquet cache, YAML manifests
+LAZY = ['matplotlib', 'seaborn', 'pyarrow', 'yaml']
+
+
+def _python(code):
+    # Imports in a new process, with the compiled files written so that the import time doesn't include the compilation
+    env = {k: v for k, v in os.environ.items() if k != 'PYTHONDONTWRITEBYTECODE'}
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+@pytest.mark.parametrize('module', ['cross_tools.data', 'cross_tools.plots', 'cross_tools.deck'])
+def test_plotting_libraries_are_not_imported(module):
+    # pandas imports pyarrow itself when it is installed, only the modules imported by cross_tools count
+    code = f"import sys, pandas; before = set(sys.modules); import {module}; print(*sorted(set(sys.modules) - before))"
+    imported = _python(code).stdout.split()
+    assert module in imported
+    assert [m for m in imported if m.split('.')[0] in LAZY] == []
+
+
+def test_import_time_of_the_plots():
+    code = "import pandas; import cross_tools.plots"
+    _python(code)
+    # Lines of -X importtime: import time: self [us] | cumulative | module
+    times = {line.split('|')[2].strip(): int(line.split('|')[1]) for line in _python(code).stderr.splitlines()
+             if line.startswith('import time:') and '|' in line and 'cumulative' not in line}
+    # about 8 ms on top of pandas
+    assert times['cross_tools.plots'] < 50000
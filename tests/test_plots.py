@@ -0,0 +1,181 @@
+"""Tests of the rendering of the plots (cross_tools/plots.py)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from cross_tools import plots
+from cross_tools.plots import Plots
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from synthetic import TEMPLATE, _typicalDays
+
+
+def _plots(folder, **kwargs):
+    data = pd.read_csv(TEMPLATE + '.csv', dtype=str)
+    model_list = [dict(_typicalDays(data, m), id=m, name=m, color='k') for m in sorted(data['model'].unique())]
+    scenarios = sorted(data['scenario_name'].unique())
+    return Plots(TEMPLATE, model_list, scenarios, ['#9FBA3D'] * len(scenarios), str(folder),
+                 cache=False, formats=['png'], dpi=20, **kwargs)
+
+
+def _jobs(cross_plots):
+    listSce = {sv: sv[0] for sv in cross_plots.sceVariants[:2]}
+    return [dict(plot='plotBarVertical', listModelsid=cross_plots.modelsid, listSce=listSce, year=2050, scale=1,
+                 varName='electricity_supply', label='Electricity (TWh)', figmax=100,
+                 varList=[{'name': 'Hydro', 'data': ['hydro_dam', 'hydro_ror'], 'color': '#0377CA'},
+                          {'name': 'Nuclear', 'data': [t], 'color': '#FF007F'}],
+                 fileName=f'elecSupply_{i}', invert=False, legend=False, pos_legend='upper right', width=4, height=3)
+            for i, t in enumerate(['nuclear', 'spv'])]
+
+
+def _files(folder, fileNames):
+    files = {}
+    for fileName in fileNames:
+        with open(os.path.join(folder, fileName + '.png'), 'rb') as f:
+            files[fileName] = f.read()
+    return files
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_workers_render_the_same_files(method, tmp_path, monkeypatch):
+    (tmp_path / 'one').mkdir()
+    (tmp_path / 'pool').mkdir()
+    cross_plots = _plots(tmp_path / 'one')
+    jobs = _jobs(cross_plots)
+    reference = _files(tmp_path / 'one', cross_plots.renderJobs(jobs, workers=1))
+
+    cross_plots = _plots(tmp_path / 'pool')
+    monkeypatch.setattr(Plots, '_Plots__startMethod', lambda self: method)
+    fileNames = cross_plots.renderJobs(jobs, workers=2)
+    assert fileNames == [job['fileName'] for job in jobs]
+    assert _files(tmp_path / 'pool', fileNames) == reference
+
+
+def test_workers_are_forked_only_on_linux_without_threads(tmp_path, monkeypatch):
+    cross_plots = _plots(tmp_path, background=True)
+    startMethod = cross_plots._Plots__startMethod
+
+    monkeypatch.setattr(plots.sys, 'platform', 'linux')
+    assert startMethod() == 'fork'
+    monkeypatch.setattr(plots.sys, 'platform', 'darwin')
+    assert startMethod() == 'spawn'
+
+    # While a figure is written in the background, and not once the exporter waited for it
+    monkeypatch.setattr(plots.sys, 'platform', 'linux')
+    cross_plots.exporter.save('figure', plt.figure())
+    assert cross_plots.exporter.running()
+    assert startMethod() == 'spawn'
+    cross_plots.exporter.wait()
+    assert startMethod() == 'fork'
+
+
+@pytest.fixture(scope='module')
+def cross_plots(tmp_path_factory):
+    return _plots(tmp_path_factory.mktemp('figures'))
+
+
+def _annual(cross_plots, *key):
+    # One value of annualData, NaN if it wasn't reported (the lookups of the old code paths)
+    try:
+        return cross_plots.annualData.loc[key, 'value']
+    except KeyError:
+        return np.nan
+
+
+def test_points_of_plotLineByScenario_are_the_values_of_one_lookup_per_point(cross_plots):
+    models = cross_plots.modelsid
+    map_sce_xaxis = {sce: (f'line{i % 2}', float(i)) for i, sce in enumerate(cross_plots.sceVariants)}
+    map_sce_xaxis[('missing-scenario', 'reference')] = ('line0', 99.0)
+    pairs = [('electricity_supply', 'spv'), ('electricity_supply', 'nuclear'), ('electricity_consumption', 'exports')]
+    extra_values = {('missing-scenario', 'reference', models[0]): 7.0}
+
+    points = cross_plots._extract_points(pairs, models, map_sce_xaxis, 2050, extra_values)
+
+    expected = []
+    for var, tech in pairs:
+        for (s, v), (line_id, x) in map_sce_xaxis.items():
+            for m in models:
+                value = _annual(cross_plots, s, v, m, var, tech, 2050)
+                if np.isnan(value):
+                    value = extra_values.get((s, v, m), np.nan)
+                if not np.isnan(value):
+                    expected.append((var, tech, m, line_id, x, value))
+    assert len(expected) > len(pairs)
+    assert list(points.itertuples(index=False, name=None)) == expected
+
+
+def test_points_of_plotTechDist_are_the_sums_of_one_lookup_per_technology(cross_plots):
+    models = cross_plots.modelsid
+    varList = [{'name': 'Hydro', 'data': ['hydro_dam', 'hydro_ror']}, {'name': 'Solar', 'data': ['spv']},
+               {'name': 'Gas', 'data': ['methane_pp', 'fuel_cell_methane']}]
+    sce_names = cross_plots.sceVariants
+
+    points = cross_plots._extract_tech_dist(varList, models, 'electricity_supply', sce_names, [2050])
+
+    # The old loop: the sum of the technologies of every group that the model reported,
+    # without the scenarios where the model reported only zeros
+    expected = {}
+    for s, v in sce_names:
+        for m in models:
+            sums = {}
+            for group in varList:
+                values = [_annual(cross_plots, s, v, m, 'electricity_supply', t, 2050) for t in group['data']]
+                if not np.isnan(values).all():
+                    sums[group['name']] = np.nansum(values)
+            if any(value != 0 for value in sums.values()):
+                expected.update({(s, v, cross_plots.models[m], 2050, name): value for name, value in sums.items()})
+    assert len(expected) > len(varList)
+    assert dict(zip(points.iloc[:, :5].itertuples(index=False, name=None), points['value'])) == pytest.approx(expected)
+
+
+def test_fuels_of_plotBarVerticalSignedFuels_are_the_sums_of_one_lookup_per_technology(cross_plots):
+    models = cross_plots.modelsid
+    scenarios = cross_plots.sceVariants[:3]
+    signedVarByFuel = {
+        'Electricity': [{'name': 'Imports', 'varName': 'electricity_supply', 'techs': ['imports'], 'sign': 1, 'color': 'k'},
+                        {'name': 'Exports', 'varName': 'electricity_consumption', 'techs': ['exports'], 'sign': -1, 'color': 'r'}],
+        'Hydrogen': [{'name': 'Imports', 'varName': 'h2_supply', 'techs': ['imports', 'electrolyser'], 'sign': 1, 'color': 'k'},
+                     {'name': 'Exports', 'varName': 'h2_fec', 'techs': ['exports', 'truck'], 'sign': -1, 'color': 'r'}],
+    }
+    names = ['Imports', 'Exports']
+
+    values = cross_plots._extract_fuel_components(signedVarByFuel, names, models, scenarios, 2050)
+
+    expected = np.zeros((len(names), len(signedVarByFuel), len(models), len(scenarios)))
+    for jf, components in enumerate(signedVarByFuel.values()):
+        for icomp, c in enumerate(components):
+            for im, m in enumerate(models):
+                for isce, (s, v) in enumerate(scenarios):
+                    lookups = [_annual(cross_plots, s, v, m, c['varName'], t, 2050) for t in c['techs']]
+                    expected[icomp, jf, im, isce] = c['sign'] * np.nansum(lookups)
+    assert np.count_nonzero(expected) > 0
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_batch_draws_the_figures_of_plotBarVertical(tmp_path):
+    (tmp_path / 'batch').mkdir()
+    (tmp_path / 'single').mkdir()
+    batch, single = _plots(tmp_path / 'batch'), _plots(tmp_path / 'single')
+    job = _jobs(batch)[0]
+    sces = batch.sceVariants
+    # Groups that share scenarios
+    groups = {'first': {sce: sce[0] for sce in sces[:2]}, 'last': {sce: sce[0] for sce in sces[1:4]}}
+
+    args = {k: v for k, v in job.items() if k not in ['plot', 'listSce', 'fileName']}
+    fileNames = batch.plotBarVerticalBatch(groups=groups, fileName='elecSupply', **args)
+    for name, listSce in groups.items():
+        single.plotBarVertical(listSce=listSce, fileName=f'elecSupply_{name}', **args)
+
+    assert fileNames == ['elecSupply_first', 'elecSupply_last']
+    assert _files(tmp_path / 'batch', fileNames) == _files(tmp_path / 'single', fileNames)
@@ -0,0 +1,82 @@
+"""Tests of the queries of the plots and their cache (cross_tools/query.py, Results.query)"""
+
+# Copyright (c) 2025, ETH Zurich, Energy Science Center, Adriana Marcucci
+# Distributed under the terms of the Apache License, Version 2.0.
+
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cross_tools.data import Results
+from cross_tools.query import QueryCache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from synthetic import TEMPLATE, _typicalDays
+
+
+@pytest.fixture(scope='module')
+def results(tmp_path_factory):
+    data = pd.read_csv(TEMPLATE + '.csv', dtype=str)
+    fileResults = str(tmp_path_factory.mktemp('query') / 'results')
+    data.to_csv(fileResults + '.csv', index=False)
+    models = sorted(data['model'].unique())
+    model_list = [dict(_typicalDays(data, m), id=m, name=m, color='k') for m in models]
+    return Results(fileResults, model_list, sorted(data['scenario_name'].unique()), cache=False)
+
+
+def _slice(results):
+    keys = results.annualData.index.to_frame(index=False)
+    keys = keys[keys['variable'] == 'electricity_supply']
+    pairs = list(dict.fromkeys(zip(keys['variable'], keys['use_technology_fuel'])))[:3]
+    scenarios = list(dict.fromkeys(zip(keys['scenario_name'], keys['scenario_variant'])))[:2]
+    return pairs, list(keys['model'].unique()), scenarios
+
+
+def test_values_are_the_ones_of_the_data(results):
+    pairs, models, scenarios = _slice(results)
+    values = results.query(pairs, models, scenarios, [2050])
+
+    expected = results.annualData['value'].reindex(pd.MultiIndex.from_tuples(
+        [(s, v, m, var, t, 2050) for var, t in pairs for m in models for s, v in scenarios],
+        names=results.annualData.index.names))
+    np.testing.assert_array_equal(values[..., 0], expected.to_numpy().reshape(len(pairs), len(models), len(scenarios)))
+
+
+def test_the_order_of_the_labels_does_not_matter(results):
+    pairs, models, scenarios = _slice(results)
+    values = results.query(pairs, models, scenarios, [2050])
+    reversed_ = results.query(pairs[::-1], models[::-1], scenarios[::-1], [2050])
+
+    np.testing.assert_array_equal(reversed_, values[::-1, ::-1, ::-1])
+
+
+def test_spellings_of_a_year_share_a_block(results):
+    pairs, models, scenarios = _slice(results)
+    results.queries.clear()
+    blocks, misses = len(results.queries), results.queries.misses
+
+    values = [results.query(pairs, models, scenarios, [year]) for year in [2050, np.int64(2050), '2050']]
+    values.append(results.query(pairs, [np.str_(m) for m in models], scenarios, [2050]))
+
+    assert len(results.queries) == blocks + 1
+    assert results.queries.misses == misses + 1
+    for v in values[1:]:
+        np.testing.assert_array_equal(v, values[0])
+
+
+def test_least_recently_used_blocks_are_evicted():
+    block = np.zeros(10)
+    cache = QueryCache(maxBytes=2 * block.nbytes)
+    cache.put('a', block.copy())
+    cache.put('b', block.copy())
+    cache.get('a')
+    cache.put('c', block.copy())
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.evictions == 1 and cache.nbytes == 2 * block.nbytes
+    assert not cache.get('a').flags.writeable